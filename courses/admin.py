@@ -1,7 +1,9 @@
 # courses/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, UserProfile, Course, Enrollment, Instructor, Student, Lesson, LessonProgress
+from django.db.models import Count
+from .models import CustomUser, UserProfile, Course, CourseProgress, Enrollment, Instructor, Payment, Review, Student, Lesson, LessonProgress
+from . import search
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -22,19 +24,31 @@ class InstructorAdmin(admin.ModelAdmin):
     list_display = ['user', 'specialization', 'is_approved']
     list_filter = ['is_approved', 'specialization']
 
+class EnrollmentInline(admin.TabularInline):
+    model = Enrollment
+    extra = 0
+    raw_id_fields = ['course']
+    readonly_fields = ['enrolled_at']
+
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ['user', 'get_username', 'get_enrolled_courses_count']
     search_fields = ['user__username', 'user__email']
-    filter_horizontal = ['enrolled_courses']  # إضافة هذه السطر
+    list_select_related = ['user']
+    # الاشتراكات بتتعدل من جدول Enrollment نفسه (filter_horizontal مابيشتغلش مع through)
+    inlines = [EnrollmentInline]
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(enrolled_courses_count=Count('enrollment'))
     
     def get_username(self, obj):
         return obj.user.username
     get_username.short_description = 'Username'
     
     def get_enrolled_courses_count(self, obj):
-        return obj.enrolled_courses.count()
+        return obj.enrolled_courses_count
     get_enrolled_courses_count.short_description = 'Enrolled Courses'
+    get_enrolled_courses_count.admin_order_field = 'enrolled_courses_count'
     
     # إضافة هذه الدالة لتحديد كيفية عرض حقل user في نموذج الإضافة
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
@@ -51,6 +65,13 @@ class CourseAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description']
     list_editable = ['is_active', 'price']
 
+    def get_search_results(self, request, queryset, search_term):
+        # بدل LIKE '%term%' على كل الصفوف بنسأل الـ full-text index
+        matches = search.matching_course_ids(search_term)
+        if matches is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=matches), False
+
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
     list_display = ['title', 'course', 'order', 'duration']
@@ -62,7 +83,31 @@ class LessonProgressAdmin(admin.ModelAdmin):
     list_display = ['student', 'lesson', 'completed', 'completed_at']
     list_filter = ['completed', 'completed_at']
 
+@admin.register(CourseProgress)
+class CourseProgressAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course', 'completed_count', 'percentage', 'last_activity', 'completed_at']
+    list_filter = ['completed_at']
+    list_select_related = ['student__user', 'course']
+    raw_id_fields = ['student', 'course']
+
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ['student', 'course', 'enrolled_at']
-    list_filter = ['enrolled_at']
\ No newline at end of file
+    list_filter = ['enrolled_at']
+    list_select_related = ['student__user', 'course']
+    raw_id_fields = ['student', 'course']
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course', 'rating', 'created_at']
+    list_filter = ['rating']
+    list_select_related = ['student__user', 'course']
+    raw_id_fields = ['student', 'course']
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ['order_id', 'student', 'course', 'amount', 'status', 'date']
+    list_filter = ['status', 'date']
+    search_fields = ['order_id', 'payment_id']
+    list_select_related = ['student__user', 'course']
+    raw_id_fields = ['student', 'course']
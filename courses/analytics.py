@@ -0,0 +1,196 @@
+# courses/analytics.py
+"""
+إحصائيات المدرب (لوحة التحكم والبروفايل العام) محسوبة في queries مجمعة
+ومتخزنة في الكاش لكل مدرب.
+
+الكاش متخزن بـ tag المدرب وtags كورساته (caching.py)، فبيتمسح أول ما حاجة تخصه تتغير:
+بياناته، كورساته، الدروس، الاشتراكات، التقييمات والمدفوعات. نسب الإكمال بتتحدث مع كل درس يخلص فمش بنمسح عشانها،
+وبتبان بعد ANALYTICS_TIMEOUT بالكتير.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .caching import course_tag, instructor_tag, tagged_cache
+from .models import Course, CourseProgress, Enrollment, Instructor, Payment, Review
+
+ANALYTICS_TIMEOUT = 60 * 10
+TREND_MONTHS = 12
+
+COURSE_FIELDS = (
+    'id', 'title', 'description', 'category', 'price', 'is_paid', 'is_active',
+    'thumbnail', 'created_at', 'enrollment_count', 'lesson_count', 'total_duration',
+)
+
+
+def analytics_key(instructor_id):
+    return f'instructor-analytics:{instructor_id}'
+
+
+def _per_course(subquery, expression, output_field):
+    # قيمة مجمعة لكل كورس كـ subquery مربوطة بيه، عشان الـ JOINs مايضربوش العدادات في بعض
+    return Coalesce(
+        Subquery(
+            subquery.filter(course_id=OuterRef('pk')).order_by().values('course_id')
+            .annotate(value=expression).values('value'),
+            output_field=output_field,
+        ),
+        0,
+        output_field=output_field,
+    )
+
+
+def course_metrics(instructor_id):
+    """
+    كل كورسات المدرب بالمقاييس بتاعتها في query واحدة
+    """
+    money = DecimalField(max_digits=12, decimal_places=2)
+    courses = (
+        Course.objects.filter(instructor_id=instructor_id)
+        .only(*COURSE_FIELDS)
+        .annotate(
+            review_count=_per_course(Review.objects.all(), Count('pk'), IntegerField()),
+            rating_total=_per_course(Review.objects.all(), Sum('rating'), IntegerField()),
+            revenue=_per_course(Payment.objects.filter(status=True), Sum('amount'), money),
+            completed_students=_per_course(
+                CourseProgress.objects.filter(completed_at__isnull=False), Count('pk'), IntegerField()
+            ),
+        )
+        .order_by('-created_at', '-id')
+    )
+    return [
+        {
+            'id': course.id,
+            'title': course.title,
+            'description': course.description,
+            'category': course.category,
+            'price': course.price,
+            'is_paid': course.is_paid,
+            'is_active': course.is_active,
+            'thumbnail_url': course.thumbnail.url if course.thumbnail else '',
+            'enrollment_count': course.enrollment_count,
+            'lesson_count': course.lesson_count,
+            'total_duration': course.total_duration,
+            'review_count': course.review_count,
+            'rating_total': course.rating_total,
+            'average_rating': round(course.rating_total / course.review_count, 1) if course.review_count else None,
+            'revenue': course.revenue,
+            'completed_students': course.completed_students,
+            'completion_rate': _rate(course.completed_students, course.enrollment_count),
+        }
+        for course in courses
+    ]
+
+
+def _rate(part, whole):
+    return round(part * 100 / whole) if whole else 0
+
+
+def enrollments_by_month(instructor_id, now=None):
+    """
+    الاشتراكات الجديدة في كل شهر من آخر TREND_MONTHS شهور، والشهور الفاضية بصفر
+    """
+    now = now or timezone.now()
+    months = []
+    month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(TREND_MONTHS):
+        months.append(month)
+        month = (month - timedelta(days=1)).replace(day=1)
+    months.reverse()
+
+    counts = {
+        row['month'].strftime('%Y-%m'): row['total']
+        for row in Enrollment.objects.filter(course__instructor_id=instructor_id, enrolled_at__gte=months[0])
+        .annotate(month=TruncMonth('enrolled_at'))
+        .values('month')
+        .annotate(total=Count('pk'))
+        .order_by()
+    }
+    return [(key, counts.get(key, 0)) for key in (month.strftime('%Y-%m') for month in months)]
+
+
+def compute_instructor_analytics(instructor_id):
+    """
+    بيانات المدرب وكورساته والإجماليات - 4 queries مهما كان عدد الكورسات.
+    بترجع None لو المدرب مش موجود.
+    """
+    instructor = Instructor.objects.select_related('user').filter(pk=instructor_id).first()
+    if instructor is None:
+        return None
+
+    courses = course_metrics(instructor_id)
+    total_students = Enrollment.objects.filter(course__instructor_id=instructor_id).aggregate(
+        total=Count('student', distinct=True)
+    )['total']
+    enrollments = sum(course['enrollment_count'] for course in courses)
+    reviews = sum(course['review_count'] for course in courses)
+    rating_total = sum(course['rating_total'] for course in courses)
+    completed = sum(course['completed_students'] for course in courses)
+
+    return {
+        'instructor': {
+            'id': instructor.id,
+            'user_id': instructor.user_id,
+            'username': instructor.user.username,
+            'full_name': instructor.user.get_full_name(),
+            'specialization': instructor.specialization,
+            'bio': instructor.bio,
+            'profile_picture_url': instructor.profile_picture.url if instructor.profile_picture else '',
+            'website': instructor.website,
+            'linkedin': instructor.linkedin,
+        },
+        'courses': courses,
+        'stats': {
+            'total_courses': len(courses),
+            'total_students': total_students,
+            'total_enrollments': enrollments,
+            'total_lessons': sum(course['lesson_count'] for course in courses),
+            'review_count': reviews,
+            'average_rating': round(rating_total / reviews, 1) if reviews else None,
+            'revenue': sum((course['revenue'] for course in courses), Decimal('0')),
+            'completion_rate': _rate(completed, enrollments),
+            'enrollments_by_month': enrollments_by_month(instructor_id),
+        },
+    }
+
+
+def get_instructor_analytics(instructor_id):
+    """
+    من الكاش بـ tag المدرب وtags كورساته، فأي تغيير في كورس منهم أو دروسه أو اشتراكاته بيمسحه
+    """
+    return tagged_cache.get_or_set(
+        analytics_key(instructor_id),
+        lambda: compute_instructor_analytics(instructor_id),
+        tags=[instructor_tag(instructor_id)],
+        timeout=ANALYTICS_TIMEOUT,
+        dependencies=lambda analytics: [course_tag(course['id']) for course in analytics['courses']],
+    )
+
+
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # الـ login بيحفظ last_login (والـ password لو اتعمله rehash) بس - مش محتاج يمسح حاجة
+    if update_fields and update_fields <= {'last_login', 'password'}:
+        return
+    tagged_cache.invalidate(*(
+        instructor_tag(pk) for pk in Instructor.objects.filter(user_id=instance.pk).values_list('pk', flat=True)
+    ))
+
+
+def course_row_changed(sender, instance, **kwargs):
+    tagged_cache.invalidate(course_tag(instance.course_id))
+
+
+def connect_signals():
+    # الكورسات والدروس والاشتراكات والمدربين بيمسحوا الـ tags بتاعتهم من caching.py،
+    # هنا الحاجات اللي الإحصائيات بس محتاجاها
+    User = get_user_model()
+    post_save.connect(user_changed, sender=User, dispatch_uid='analytics_user_saved')
+    for model in (Review, Payment):
+        name = model._meta.model_name
+        post_save.connect(course_row_changed, sender=model, dispatch_uid=f'analytics_{name}_saved')
+        post_delete.connect(course_row_changed, sender=model, dispatch_uid=f'analytics_{name}_deleted')
@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def create_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from . import search
+
+    # أول مرة الجدول يتعمل بنملاه من الداتا الموجودة
+    if search.create_index(connections[using]):
+        search.rebuild_index(connections[using])
 
 
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        from . import analytics, caching, instrumentation, search, stats
+
+        instrumentation.install_template_timer()
+        caching.connect_signals()
+        analytics.connect_signals()
+        search.connect_signals()
+        stats.connect_signals()
+        post_migrate.connect(create_search_index, sender=self)
@@ -0,0 +1,15 @@
+# courses/backends.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .roles import with_roles
+
+
+class RoleModelBackend(ModelBackend):
+    """
+    نفس ModelBackend، بس get_user (اللي بيتنادى في كل طلب) بيجيب صفوف الأدوار في نفس الـ query
+    """
+    def get_user(self, user_id):
+        User = get_user_model()
+        user = with_roles(User._default_manager).filter(pk=user_id).first()
+        return user if user is not None and self.user_can_authenticate(user) else None
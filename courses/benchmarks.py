@@ -0,0 +1,364 @@
+# courses/benchmarks.py
+"""
+Benchmark لكل مسار في courses.urls على داتا صناعية بأحجام مختلفة (seeding.generate_dataset).
+
+لكل مسار بنقيس: زمن الطلب (p50 / p95 / p99)، عدد الـ queries، وأعلى ميموري اتحجزت أثناء الطلب.
+النتايج بتتحفظ JSON، والمقارنة مع نتايج commit قديم بتطلع قايمة بالمسارات اللي عدد الـ queries
+بتاعها زاد أو الـ p95 بتاعها بقى أبطأ من الحد المسموح.
+
+كل طلب بيشتغل جوه transaction بترجع rollback، فالطلبات اللي بتكتب (اشتراك، إكمال درس)
+بتكلف نفس الحاجة في كل مرة والداتا مابتتغيرش بين المسارات. الكاش بيتمسح قبل كل طلب،
+فالأرقام بتاعة الـ view نفسها مش بتاعة كاش الصفحات.
+
+benchmark_sessions بيقيس نفس الطلبات بيوزر عامل login على كل session backend (sessions.py).
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Course, Enrollment, Instructor, Lesson
+from .seeding import generate_dataset
+from .sessions import BACKENDS, session_engine
+
+PREFIX = 'bench'
+PASSWORD = 'pass12345'
+
+# أحجام الداتا - كل حجم أكبر من اللي قبله بحوالي 10 مرات
+SIZES = {
+    'small': {'instructors': 5, 'students': 200, 'courses': 20, 'lessons_per_course': 10},
+    'medium': {'instructors': 50, 'students': 2000, 'courses': 200, 'lessons_per_course': 10},
+    'large': {'instructors': 200, 'students': 20000, 'courses': 2000, 'lessons_per_course': 10},
+}
+
+# اسم المسار (name في courses.urls، وبعد ':' اسم للنسخة لو نفس المسار بيتقاس بأكتر من يوزر):
+#   role     مين عامل login (None = زائر)
+#   method   GET أو POST
+#   args     fixture -> الـ args بتاعة reverse
+#   data     fixture -> الـ GET params أو الـ POST body
+#   fresh    client جديد لكل طلب (للمسارات اللي بتغير الـ session زي login و logout)
+#   status   الـ status المتوقع
+ROUTES = {
+    'home': {},
+    'course_list': {},
+    'course_search': {'data': lambda f: {'q': 'python django'}},
+    'course_detail': {'args': lambda f: [f['course_id']]},
+    'course_detail:student': {'role': 'student', 'args': lambda f: [f['course_id']]},
+    'enroll_course': {'role': 'student', 'method': 'POST', 'args': lambda f: [f['other_course_id']], 'status': 302},
+    'my_courses': {'role': 'student'},
+    'my_progress': {'role': 'student'},
+    'mark_lesson_complete': {
+        'role': 'student', 'method': 'POST', 'args': lambda f: [f['lesson_id']],
+        'headers': {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'},
+    },
+    'sync_progress': {
+        'role': 'student', 'method': 'POST', 'json': True,
+        'data': lambda f: {'completions': [{'lesson_id': pk} for pk in f['lesson_ids']]},
+    },
+    'admin_dashboard': {'role': 'admin'},
+    'admin_course_create': {'role': 'admin'},
+    'admin_course_edit': {'role': 'admin', 'args': lambda f: [f['course_id']]},
+    'admin_course_delete': {'role': 'admin', 'args': lambda f: [f['course_id']]},
+    'admin_course_delete:post': {'role': 'admin', 'method': 'POST', 'args': lambda f: [f['course_id']], 'status': 302},
+    'admin_instructors': {'role': 'admin'},
+    'admin_students': {'role': 'admin'},
+    'admin_cache_stats': {'role': 'admin'},
+    'signup': {},
+    'login': {},
+    'login:post': {
+        'method': 'POST', 'fresh': True, 'status': 302,
+        'data': lambda f: {'username': f['student_username'], 'password': PASSWORD},
+    },
+    'logout': {'role': 'student', 'fresh': True, 'status': 302},
+    'instructor_profile': {'args': lambda f: [f['instructor_id']]},
+    'instructor_dashboard': {'role': 'instructor'},
+    'create_course': {'role': 'instructor'},
+    'edit_course': {'role': 'instructor', 'args': lambda f: [f['course_id']]},
+    'become_instructor': {'role': 'student'},
+}
+
+
+# المسارات اللي benchmark_sessions بيقيسها: قراية بس، وواحد بيكتب (الاشتراك بيحط message)
+SESSION_ROUTES = ('my_courses', 'course_detail:student', 'enroll_course')
+
+
+@contextmanager
+def benchmark_database():
+    """
+    داتابيز تست مؤقتة للـ benchmark وبتتمسح في الآخر. الاسم خاص بالـ benchmark وبالـ process
+    (وملف SQLite في الـ temp برة الريبو)، فلو manage.py test أو benchmark تاني شغال في نفس الوقت
+    محدش بيمسح داتابيز التاني.
+    """
+    test_settings = connection.settings_dict['TEST']
+    previous = test_settings.get('NAME')
+    if connection.vendor == 'sqlite':
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), f'elearning_bench_{os.getpid()}.sqlite3')
+    else:
+        test_settings['NAME'] = f"test_{connection.settings_dict['NAME']}_bench_{os.getpid()}"
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        test_settings['NAME'] = previous
+
+
+def url_name(route):
+    return route.split(':', 1)[0]
+
+
+def missing_routes():
+    """
+    المسارات اللي في courses.urls ومالهاش benchmark
+    """
+    from . import urls
+
+    covered = {url_name(route) for route in ROUTES}
+    return sorted(pattern.name for pattern in urls.urlpatterns if pattern.name not in covered)
+
+
+def build_fixture(prefix=PREFIX):
+    """
+    الـ ids اللي المسارات محتاجاها من الداتا المتولدة: أكبر كورس لأول مدرب وطالب مشترك فيه
+    """
+    User = get_user_model()
+    instructor = Instructor.objects.select_related('user').get(user__username=f'{prefix}_instructor_0')
+    course = Course.objects.filter(instructor=instructor).order_by('-enrollment_count', 'pk').first()
+    enrollment = Enrollment.objects.select_related('student__user').filter(course=course).order_by('pk').first()
+    student = enrollment.student
+    other_course = Course.objects.exclude(enrollment__student=student).order_by('pk').first()
+    admin, _ = User.objects.get_or_create(
+        username=f'{prefix}_admin', defaults={'role': 'admin', 'email': f'{prefix}_admin@example.com'},
+    )
+    lesson_ids = list(Lesson.objects.filter(course=course).order_by('order').values_list('pk', flat=True))
+    return {
+        'users': {'student': student.user, 'instructor': instructor.user, 'admin': admin},
+        'student_username': student.user.username,
+        'instructor_id': instructor.pk,
+        'course_id': course.pk,
+        'other_course_id': other_course.pk,
+        'lesson_id': lesson_ids[0],
+        'lesson_ids': lesson_ids,
+    }
+
+
+def percentile(samples, percent):
+    """
+    nearest-rank على عينات مترتبة
+    """
+    ordered = sorted(samples)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class QueryCounter:
+    """
+    بيعد الـ queries من execute_wrapper - أرخص من CaptureQueriesContext ومابيحتاجش DEBUG
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _client(role, fixture):
+    # الـ 500 بتتسجل في الـ status بدل ما توقف كل الـ benchmark
+    client = Client(raise_request_exception=False)
+    if role:
+        client.force_login(fixture['users'][role])
+    return client
+
+
+def request_route(client, route, fixture):
+    spec = ROUTES[route]
+    url = reverse(url_name(route), args=spec.get('args', lambda f: [])(fixture))
+    data = spec.get('data', lambda f: {})(fixture)
+    headers = spec.get('headers', {})
+    if spec.get('method', 'GET') == 'GET':
+        return client.get(url, data, **headers)
+    if spec.get('json'):
+        return client.post(url, json.dumps(data), content_type='application/json', **headers)
+    return client.post(url, data, **headers)
+
+
+def _run_once(client, route, spec, fixture, trace_memory=False):
+    """
+    طلب واحد جوه transaction بترجع rollback: (الزمن بالـ ms، عدد الـ queries، الميموري، الـ status)
+    """
+    cache.clear()
+    counter = QueryCounter()
+    peak = None
+    with transaction.atomic():
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = request_route(client, route, fixture)
+        elapsed = (time.perf_counter() - started) * 1000
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        transaction.set_rollback(True)
+    # الـ messages اللي اتحطت في الـ cookie ماتأثرش على الطلب اللي بعده
+    client.cookies.pop('messages', None)
+    return elapsed, counter.count, peak, response.status_code
+
+
+def benchmark_route(route, fixture, samples=20, warmup=2, clients=None):
+    spec = ROUTES[route]
+    role = spec.get('role')
+    clients = clients if clients is not None else {}
+
+    def client():
+        if spec.get('fresh'):
+            return _client(role, fixture)
+        if role not in clients:
+            clients[role] = _client(role, fixture)
+        return clients[role]
+
+    for _ in range(warmup):
+        _run_once(client(), route, spec, fixture)
+
+    timings, queries, statuses = [], [], set()
+    for _ in range(samples):
+        elapsed, count, _, status = _run_once(client(), route, spec, fixture)
+        timings.append(elapsed)
+        queries.append(count)
+        statuses.add(status)
+    # الميموري في لفة لوحدها عشان tracemalloc بيبطأ الطلب كتير
+    _, _, peak, _ = _run_once(client(), route, spec, fixture, trace_memory=True)
+
+    expected = spec.get('status', 200)
+    return {
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'queries': max(queries),
+        'peak_kb': round(peak / 1024, 1),
+        'status': sorted(statuses),
+        'ok': statuses == {expected},
+    }
+
+
+def run_benchmarks(sizes=('small',), routes=None, samples=20, warmup=2, seed=42, log=None):
+    """
+    بتولد الداتا لكل حجم بالترتيب وتقيس كل المسارات عليها.
+    لازم تشتغل على داتابيز فاضية (الـ command بيعمل داتابيز تست مؤقتة).
+    """
+    log = log or (lambda message: None)
+    routes = list(routes or ROUTES)
+    sizes = sorted(sizes, key=list(SIZES).index)
+    results = {}
+    generated = {}
+    for size in sizes:
+        # كل حجم بيكمل على اللي قبله بـ prefix مختلف، والـ fixture من آخر واحد اتعمل
+        spec = SIZES[size]
+        prefix = f'{PREFIX}{len(generated)}'
+        generate_dataset(seed=seed, prefix=prefix, **{
+            key: value - sum(previous.get(key, 0) for previous in generated.values())
+            if key != 'lessons_per_course' else value
+            for key, value in spec.items()
+        })
+        generated[size] = spec
+        fixture = build_fixture(prefix)
+
+        clients = {}
+        results[size] = {}
+        for route in routes:
+            results[size][route] = benchmark_route(route, fixture, samples=samples, warmup=warmup, clients=clients)
+            result = results[size][route]
+            log(f"{size:7} {route:28} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+                f"{result['queries']:3} queries  {result['peak_kb']:9.1f}KB  {result['status']}")
+    return {'meta': metadata(), 'results': results}
+
+
+def benchmark_sessions(fixture, backends=BACKENDS, routes=SESSION_ROUTES, samples=100, warmup=5):
+    """
+    نفس المسارات بيوزر عامل login على كل session backend: الطلبات في الثانية (على thread واحد)
+    وعدد الـ queries - الفرق بين الـ backends هو اللي الـ session بتكلفه
+    """
+    results = {}
+    for backend in backends:
+        # الـ SessionMiddleware بيقرا SESSION_ENGINE لما الـ client يتعمل، فكل backend بـ clients جديدة
+        with override_settings(SESSION_ENGINE=session_engine(backend)):
+            results[backend] = {}
+            for route in routes:
+                spec = ROUTES[route]
+                client = _client(spec.get('role'), fixture)
+                for _ in range(warmup):
+                    _run_once(client, route, spec, fixture)
+                timings, queries, statuses = [], [], set()
+                for _ in range(samples):
+                    elapsed, count, _, status = _run_once(client, route, spec, fixture)
+                    timings.append(elapsed)
+                    queries.append(count)
+                    statuses.add(status)
+                results[backend][route] = {
+                    'requests_per_second': round(1000 * len(timings) / sum(timings), 1),
+                    'p50_ms': round(percentile(timings, 50), 2),
+                    'queries': max(queries),
+                    'status': sorted(statuses),
+                    'ok': statuses == {spec.get('status', 200)},
+                }
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def compare(baseline, current, max_query_increase=0, max_p95_regression=0.25, min_p95_delta_ms=5):
+    """
+    المسارات اللي بقت أسوأ من الـ baseline:
+      - عدد الـ queries زاد أكتر من max_query_increase
+      - الـ p95 زاد أكتر من max_p95_regression (0.25 = 25%) وأكتر من min_p95_delta_ms
+        (عشان الـ noise في الطلبات اللي بتاخد 2ms مايبقاش regression)
+    المسارات أو الأحجام اللي مش في الاتنين بتتجاهل.
+    """
+    regressions = []
+    for size, routes in current['results'].items():
+        for route, result in routes.items():
+            before = baseline['results'].get(size, {}).get(route)
+            if before is None:
+                continue
+            if result['queries'] - before['queries'] > max_query_increase:
+                regressions.append(
+                    f"{size} {route}: queries {before['queries']} -> {result['queries']}"
+                )
+            delta = result['p95_ms'] - before['p95_ms']
+            if delta > min_p95_delta_ms and delta > before['p95_ms'] * max_p95_regression:
+                regressions.append(
+                    f"{size} {route}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms"
+                )
+    return regressions
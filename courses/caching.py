@@ -0,0 +1,203 @@
+# courses/caching.py
+"""
+طبقة كاش بـ tags فوق أي backend من CACHES (locmem، ملفات، Redis).
+
+كل قيمة بتتخزن ومعاها نسخة (version) كل tag وقت التخزين، زي 'course:5' أو 'instructor:2'.
+مسح tag = نسخة جديدة ليه، فكل القيم اللي اتخزنت بالنسخة القديمة بتبقى miss من غير
+ما نعرف مفاتيحها. القراية round trip واحد (get_many للقيمة ونسخ الـ tags مع بعض)،
+وتاني واحد بس لو القيمة متخزنة بـ tags زيادة اتعرفت بعد ما اتبنت (dependencies).
+
+الـ receivers تحت بتمسح الـ tags اللي اتأثرت بس:
+    Course     -> course:<id>, instructor:<instructor_id> (والمدرب القديم لو اتغير), catalog
+    Lesson     -> course:<course_id>, outline:<course_id>
+    Instructor -> instructor:<id>
+    Enrollment -> course:<course_id>
+"""
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .models import Course, Enrollment, Instructor, Lesson, rows_deleted
+
+TAG_PREFIX = 'tag-version:'
+
+# أي قايمة كورسات (الكتالوج والرئيسية) - بيتمسح لما كورس يتضاف أو يتعدل أو يتمسح
+CATALOG_TAG = 'catalog'
+
+
+def course_tag(course_id):
+    return f'course:{course_id}'
+
+
+def instructor_tag(instructor_id):
+    return f'instructor:{instructor_id}'
+
+
+def outline_tag(course_id):
+    # دروس الكورس بس - التسجيل في الكورس مالوش دعوة بيه
+    return f'outline:{course_id}'
+
+
+def page_tags_for(courses):
+    """
+    tags قايمة كورسات معروضة: كل كورس ومدربه
+    """
+    tags = set()
+    for course in courses:
+        tags.add(course_tag(course.id))
+        tags.add(instructor_tag(course.instructor_id))
+    return sorted(tags)
+
+
+class TaggedCache:
+    """
+    get / set / get_or_set بـ tags، وعدادات hit و miss لكل namespace
+    (أول جزء من المفتاح قبل ':') عشان نعرف الكاش محتاج حجم قد ايه.
+    """
+    def __init__(self, alias=None):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @property
+    def backend(self):
+        # بنجيبه كل مرة عشان override_settings(CACHES=...) في التستات يشتغل
+        return caches[self.alias or getattr(settings, 'COURSES_CACHE_ALIAS', 'default')]
+
+    def _record(self, key, hit):
+        namespace = key.split(':', 1)[0]
+        with self._lock:
+            (self.hits if hit else self.misses)[namespace] += 1
+
+    def _versions(self, tags, found=None):
+        if found is None:
+            found = self.backend.get_many([TAG_PREFIX + tag for tag in tags])
+        return {tag: found.get(TAG_PREFIX + tag) for tag in tags}
+
+    def _lookup(self, key, tags):
+        found = self.backend.get_many([key, *(TAG_PREFIX + tag for tag in tags)])
+        versions = self._versions(tags, found)
+
+        entry = found.get(key)
+        hit = entry is not None and set(tags) <= set(entry[0])
+        if hit:
+            stored = entry[0]
+            extra = [tag for tag in stored if tag not in versions]
+            current = {**versions, **(self._versions(extra) if extra else {})}
+            hit = all(current[tag] is not None and current[tag] == version for tag, version in stored.items())
+        self._record(key, hit)
+        return (hit, entry[1] if hit else None), versions
+
+    def _current_versions(self, versions):
+        # tag ملوش نسخة (أول مرة أو الـ backend شاله) بياخد نسخة جديدة
+        missing = {tag: uuid.uuid4().hex for tag, version in versions.items() if version is None}
+        if missing:
+            self.backend.set_many({TAG_PREFIX + tag: version for tag, version in missing.items()}, None)
+        return {**versions, **missing}
+
+    def get(self, key, tags=(), default=None):
+        (hit, value), _ = self._lookup(key, list(tags))
+        return value if hit else default
+
+    def set(self, key, value, tags=(), timeout=None):
+        versions = self._versions(list(tags))
+        self.backend.set(key, (self._current_versions(versions), value), timeout)
+
+    def get_or_set(self, key, build, tags=(), timeout=None, dependencies=None):
+        """
+        القيمة من الكاش أو build() لو miss. لو build رجعت None مابتتخزنش.
+        الـ tags بتتقرا قبل build، فلو حد مسح tag وإحنا بنبني القيمة اللي هتتخزن هتبقى miss.
+        dependencies(value) بترجع tags زيادة مش معروفة غير بعد البناء (زي كورسات مدرب).
+        """
+        tags = list(tags)
+        (hit, value), versions = self._lookup(key, tags)
+        if hit:
+            return value
+        value = build()
+        if value is not None:
+            if dependencies is not None:
+                extra = [tag for tag in dependencies(value) if tag not in versions]
+                versions.update(self._versions(extra))
+            self.backend.set(key, (self._current_versions(versions), value), timeout)
+        return value
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def invalidate(self, *tags):
+        if tags:
+            self.backend.set_many({TAG_PREFIX + tag: uuid.uuid4().hex for tag in set(tags)}, None)
+
+    def metrics(self):
+        with self._lock:
+            namespaces = sorted(set(self.hits) | set(self.misses))
+            return {
+                namespace: {
+                    'hits': self.hits[namespace],
+                    'misses': self.misses[namespace],
+                    'hit_rate': round(self.hits[namespace] / (self.hits[namespace] + self.misses[namespace]), 3),
+                }
+                for namespace in namespaces
+            }
+
+    def reset_metrics(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+tagged_cache = TaggedCache()
+
+
+def course_changed(sender, instance, **kwargs):
+    tags = [course_tag(instance.pk), instructor_tag(instance.instructor_id), CATALOG_TAG]
+    # لو الكورس اتنقل لمدرب تاني، القديم كمان لازم يتمسح (remember_course_state في models.py)
+    previous = (getattr(instance, '_previous_state', None) or {}).get('instructor_id')
+    if previous and previous != instance.instructor_id:
+        tags.append(instructor_tag(previous))
+    tagged_cache.invalidate(*tags)
+
+
+def course_child_changed(sender, instance, **kwargs):
+    tagged_cache.invalidate(course_tag(instance.course_id))
+
+
+def course_children_deleted(sender, instances, **kwargs):
+    tagged_cache.invalidate(*(course_tag(row.course_id) for row in instances))
+
+
+def lesson_changed(sender, instance, **kwargs):
+    tagged_cache.invalidate(course_tag(instance.course_id), outline_tag(instance.course_id))
+
+
+def lessons_deleted(sender, instances, **kwargs):
+    course_ids = {row.course_id for row in instances}
+    tagged_cache.invalidate(*(tag for pk in course_ids for tag in (course_tag(pk), outline_tag(pk))))
+
+
+def instructor_changed(sender, instance, **kwargs):
+    tagged_cache.invalidate(instructor_tag(instance.pk))
+
+
+def enrollments_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() على الـ M2M بيعمل bulk_create من غير post_save
+    if action == 'post_add' and pk_set:
+        course_ids = [instance.pk] if reverse else pk_set
+        tagged_cache.invalidate(*(course_tag(pk) for pk in course_ids))
+
+
+def connect_signals():
+    post_save.connect(course_changed, sender=Course, dispatch_uid='cache_course_saved')
+    post_delete.connect(course_changed, sender=Course, dispatch_uid='cache_course_deleted')
+    post_save.connect(instructor_changed, sender=Instructor, dispatch_uid='cache_instructor_saved')
+    post_delete.connect(instructor_changed, sender=Instructor, dispatch_uid='cache_instructor_deleted')
+    m2m_changed.connect(enrollments_added, sender=Enrollment, dispatch_uid='cache_enrollments_added')
+    post_save.connect(lesson_changed, sender=Lesson, dispatch_uid='cache_lesson_saved')
+    rows_deleted.connect(lessons_deleted, sender=Lesson, dispatch_uid='cache_lesson_deleted')
+    post_save.connect(course_child_changed, sender=Enrollment, dispatch_uid='cache_enrollment_saved')
+    rows_deleted.connect(course_children_deleted, sender=Enrollment, dispatch_uid='cache_enrollment_deleted')
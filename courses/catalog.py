@@ -0,0 +1,98 @@
+# courses/catalog.py
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import Course
+
+# الحقول اللي كارت الكورس محتاجها بس - أي حقل تاني هيعمل query لكل كارت
+CATALOG_FIELDS = (
+    'id', 'title', 'description', 'price', 'is_paid', 'category',
+    'thumbnail', 'created_at', 'is_active', 'is_featured',
+    'enrollment_count', 'lesson_count', 'total_duration',
+    'instructor__id', 'instructor__user__id', 'instructor__user__username',
+)
+
+CATEGORIES = ['Development', 'Design', 'Business', 'Marketing', 'Data Science', 'Cybersecurity']
+
+# الفلاتر المسموح بيها من الـ query string
+BOOLEAN_FILTERS = ('is_paid', 'is_active', 'is_featured')
+
+PAGE_SIZE = 12
+
+FEATURED_LIMIT = 3
+
+
+def catalog_courses():
+    """
+    كل الكورسات بتاعة الكتالوج في query واحدة مهما كان عددها.
+    المدرب واليوزر بتوعه جايين بالـ JOIN، والعدادات محفوظة على الكورس نفسه.
+    """
+    return (
+        Course.objects
+        .select_related('instructor__user')
+        .only(*CATALOG_FIELDS)
+        .order_by('-created_at', '-id')
+    )
+
+
+def parse_filters(params):
+    """
+    بتحول الـ GET params لفلاتر نظيفة، وأي قيمة مش مفهومة بتتجاهل
+    """
+    filters = {}
+    category = params.get('category')
+    if category in CATEGORIES:
+        filters['category'] = category
+    for name in BOOLEAN_FILTERS:
+        value = params.get(name)
+        if value in ('1', 'true'):
+            filters[name] = True
+        elif value in ('0', 'false'):
+            filters[name] = False
+    return filters
+
+
+def encode_cursor(course):
+    raw = f"{course.created_at.isoformat()}|{course.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, course_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(course_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def catalog_page(filters=None, cursor=None, page_size=PAGE_SIZE):
+    """
+    صفحة من الكتالوج بالـ keyset pagination على (created_at, id).
+    بدل OFFSET بنبدأ من آخر كورس في الصفحة اللي فاتت، فالصفحة رقم 1000 بتكلف زي الأولى.
+    بترجع (الكورسات، الـ cursor بتاع الصفحة الجاية أو None).
+    """
+    courses = catalog_courses().filter(**(filters or {}))
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, course_id = position
+        courses = courses.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=course_id)
+        )
+
+    # بنجيب عنصر زيادة عشان نعرف فيه صفحة بعدها ولا لا من غير COUNT
+    page = list(courses[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor(page[-1])
+    return page, next_cursor
+
+
+def featured_courses(limit=FEATURED_LIMIT):
+    """
+    أحدث الكورسات المميزة المتاحة للرئيسية - query واحدة من الـ index بتاع is_featured
+    """
+    return list(catalog_courses().filter(is_featured=True, is_active=True)[:limit])
@@ -0,0 +1,115 @@
+# courses/hashers.py
+"""
+نفس hashers بتاعة Django بس التكلفة بتاعتها من الـ settings (PASSWORD_SCRYPT_* و PASSWORD_ARGON2_*
+و PASSWORD_PBKDF2_ITERATIONS)، عشان نغيرها من غير كود بعد ما نشوف أرقام benchmark_passwords.
+
+الـ algorithm هو هو بتاع Django، فالـ hashes القديمة بتتقري عادي. Django بيعمل rehash لوحده
+وقت الـ login لو الـ hash مكتوب بـ hasher غير الأول في PASSWORD_HASHERS أو بتكلفة غير الحالية
+(must_update)، فتغيير الإعدادات بيسري على كل يوزر أول ما يعمل login.
+"""
+import base64
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class TunedHasher:
+    # اسم الـ attribute في الـ hasher -> (اسم الـ setting)
+    tuning = {}
+
+    def __init__(self, **params):
+        # params بتتعدى من الـ benchmark بس، الباقي من الـ settings أو قيم Django
+        for attr, setting in self.tuning.items():
+            setattr(self, attr, params.get(attr, getattr(settings, setting, getattr(type(self), attr))))
+
+    def cost(self):
+        return {attr: getattr(self, attr) for attr in self.tuning}
+
+
+class PBKDF2PasswordHasher(TunedHasher, hashers.PBKDF2PasswordHasher):
+    tuning = {'iterations': 'PASSWORD_PBKDF2_ITERATIONS'}
+
+
+class ScryptPasswordHasher(TunedHasher, hashers.ScryptPasswordHasher):
+    tuning = {
+        'work_factor': 'PASSWORD_SCRYPT_WORK_FACTOR',
+        'block_size': 'PASSWORD_SCRYPT_BLOCK_SIZE',
+        'parallelism': 'PASSWORD_SCRYPT_PARALLELISM',
+    }
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # زي Django بالظبط، بس الـ maxmem على قد n و r: الافتراضي بتاع OpenSSL (32MB)
+        # مابيكفيش من أول n=2**15
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=128 * r * (n + p + 2) + 2**20, dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+
+class Argon2PasswordHasher(TunedHasher, hashers.Argon2PasswordHasher):
+    # محتاج argon2-cffi
+    tuning = {
+        'time_cost': 'PASSWORD_ARGON2_TIME_COST',
+        'memory_cost': 'PASSWORD_ARGON2_MEMORY_COST',
+        'parallelism': 'PASSWORD_ARGON2_PARALLELISM',
+    }
+
+
+HASHERS = {
+    'pbkdf2': PBKDF2PasswordHasher,
+    'scrypt': ScryptPasswordHasher,
+    'argon2': Argon2PasswordHasher,
+}
+
+# الإعدادات اللي benchmark_passwords بيقارن بينها: الاسم -> (الـ hasher، التكلفة)
+CONFIGS = {
+    'pbkdf2-600k': ('pbkdf2', {'iterations': 600_000}),
+    'pbkdf2-1m': ('pbkdf2', {'iterations': 1_000_000}),
+    'scrypt-n14': ('scrypt', {'work_factor': 2**14, 'block_size': 8, 'parallelism': 1}),
+    'scrypt-n15': ('scrypt', {'work_factor': 2**15, 'block_size': 8, 'parallelism': 1}),
+    'scrypt-n16': ('scrypt', {'work_factor': 2**16, 'block_size': 8, 'parallelism': 1}),
+    'argon2-t2-m19m': ('argon2', {'time_cost': 2, 'memory_cost': 19 * 1024, 'parallelism': 1}),
+    'argon2-t3-m64m': ('argon2', {'time_cost': 3, 'memory_cost': 64 * 1024, 'parallelism': 1}),
+}
+
+
+def is_available(name):
+    hasher = HASHERS[name]()
+    if hasher.library is None:
+        return True
+    try:
+        hasher._load_library()
+    except ValueError:
+        return False
+    return True
+
+
+def benchmark_config(name, rounds=10, password='pass12345'):
+    """
+    التحقق من باسورد (اللي بيحصل في كل login) rounds مرة على thread واحد = core واحد.
+    بيرجع الـ ms لكل تحقق وعدد الـ logins في الثانية لكل core
+    """
+    hasher_name, params = CONFIGS[name]
+    hasher = HASHERS[hasher_name](**params)
+    encoded = hasher.encode(password, hasher.salt())
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        if not hasher.verify(password, encoded):
+            raise AssertionError(f"{name} failed to verify its own hash")
+        timings.append(time.perf_counter() - started)
+    mean = sum(timings) / len(timings)
+    return {
+        'hasher': hasher_name,
+        'cost': hasher.cost(),
+        'verify_ms': round(mean * 1000, 2),
+        'logins_per_second_per_core': round(1 / mean, 1),
+    }
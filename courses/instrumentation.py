@@ -0,0 +1,230 @@
+# courses/instrumentation.py
+"""
+قياس كل طلب: الوقت الكلي، عدد الـ queries ووقتها، ووقت رسم التمبلت.
+
+الـ queries بتتعد من connection.execute_wrapper، والتمبلت من wrapper على Template.render
+(بنحسب التمبلت الخارجي بس، فالـ include والـ extends مابيتحسبوش مرتين).
+نفس شكل الـ SQL لو اتنفذ كذا مرة في طلب واحد (نفس الـ query بـ params مختلفة = N+1 غالباً)
+بيطلع في duplicates، وحسب REQUEST_METRICS_REPEATED_QUERIES بيتسجل بس أو warning أو exception.
+نفس الكشف متاح لأي كود (تستات، shell) من detect_repeated_queries.
+
+الـ middleware (RequestMetricsMiddleware في middleware.py) بياخد عينة بس من الطلبات
+(REQUEST_METRICS_SAMPLE_RATE)، والطلب اللي مش في العينة مابيتلفش بأي حاجة.
+"""
+import json
+import logging
+import random
+import re
+import time
+import warnings
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('courses.requests')
+
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_SLOW_MS = 500
+# كام مرة نفس الـ SQL يتكرر في طلب واحد عشان يتعلم عليه
+DEFAULT_DUPLICATE_THRESHOLD = 3
+
+# 'log' = يتسجل warning في الـ logger بس، 'warn' = RepeatedQueriesWarning، 'raise' = RepeatedQueriesError
+DEFAULT_REPEATED_QUERIES = 'log'
+
+_current = ContextVar('request_metrics', default=None)
+
+# IN (%s, %s, %s) بأي طول = نفس الشكل، والأرقام (LIMIT و OFFSET بيتكتبوا في الـ SQL نفسه) كمان
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+# الـ savepoints بتاعة atomic مش queries بتاعة الـ view
+IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class RepeatedQueriesError(Exception):
+    pass
+
+
+class RepeatedQueriesWarning(UserWarning):
+    pass
+
+
+def query_shape(sql):
+    """
+    الـ SQL من غير القيم: اتنين بنفس الشكل = نفس الـ query في loop
+    """
+    return NUMBER.sub('N', IN_LIST.sub('(...)', sql))
+
+
+def sample_rate():
+    return getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', DEFAULT_SAMPLE_RATE)
+
+
+def slow_ms():
+    return getattr(settings, 'REQUEST_METRICS_SLOW_MS', DEFAULT_SLOW_MS)
+
+
+def duplicate_threshold():
+    return getattr(settings, 'REQUEST_METRICS_DUPLICATE_THRESHOLD', DEFAULT_DUPLICATE_THRESHOLD)
+
+
+def repeated_queries_action():
+    return getattr(settings, 'REQUEST_METRICS_REPEATED_QUERIES', DEFAULT_REPEATED_QUERIES)
+
+
+def should_sample():
+    rate = sample_rate()
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class RequestMetrics:
+    """
+    عدادات طلب واحد. بتتحط كـ execute_wrapper على الـ connections.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.statements = Counter()
+        self.exact = Counter()
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            if not sql.lstrip().upper().startswith(IGNORED):
+                shape = query_shape(sql)
+                self.statements[shape] += 1
+                self.exact[(shape, sql, repr(params))] += 1
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        return self
+
+    def duplicates(self, threshold=None):
+        """
+        أشكال الـ SQL اللي اتكررت threshold مرة أو أكتر، والأكتر تكرار الأول.
+        identical = كام مرة منهم كانت نفس الـ query بنفس القيم بالظبط (ممكن تتشال بكاش)
+        """
+        threshold = threshold or duplicate_threshold()
+        repeated = []
+        for shape, count in self.statements.most_common():
+            if count < threshold:
+                break
+            identical = sum(
+                times for (other, _, _), times in self.exact.items() if other == shape and times > 1
+            )
+            repeated.append({'sql': shape, 'count': count, 'identical': identical})
+        return repeated
+
+    def check_repeated(self, action=None, threshold=None, label='request'):
+        """
+        بيعمل اللي الـ action بيقوله لو فيه SQL متكرر، وبيرجع القايمة
+        """
+        repeated = self.duplicates(threshold)
+        action = action or repeated_queries_action()
+        if repeated and action in ('warn', 'raise'):
+            message = describe_repeated(repeated, label)
+            if action == 'raise':
+                raise RepeatedQueriesError(message)
+            warnings.warn(message, RepeatedQueriesWarning, stacklevel=3)
+        return repeated
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+    def record(self, request, response):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(self.total_ms, 1),
+            'db_ms': round(self.db_ms, 1),
+            'queries': self.queries,
+            'template_ms': round(self.template_ms, 1),
+            'duplicates': [
+                {**item, 'sql': item['sql'][:300]} for item in self.duplicates()[:5]
+            ],
+        }
+
+
+def describe_repeated(repeated, label='request'):
+    lines = [f"{label} ran the same query shape repeatedly (N+1?):"]
+    lines += [f"  {item['count']}x ({item['identical']} identical): {item['sql'][:300]}" for item in repeated]
+    return '\n'.join(lines)
+
+
+@contextmanager
+def detect_repeated_queries(threshold=None, action='raise', label='block'):
+    """
+    with detect_repeated_queries(): ... - بيعد الـ queries على كل الـ connections
+    وبيعمل raise (أو warn) في الآخر لو نفس الشكل اتنفذ threshold مرة أو أكتر.
+    action=None بيرجع الـ metrics من غير ما يعمل حاجة.
+    """
+    metrics = RequestMetrics()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        yield metrics
+    metrics.finish()
+    if action:
+        metrics.check_repeated(action, threshold, label)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def log_request(record):
+    level = logging.WARNING if record['total_ms'] >= slow_ms() or record['duplicates'] else logging.INFO
+    logger.log(level, json.dumps(record), extra={'metrics': record})
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, context)
+        metrics._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics._template_depth -= 1
+            if metrics._template_depth == 0:
+                metrics.template_ms += (time.perf_counter() - started) * 1000
+    wrapper._timed = True
+    return wrapper
+
+
+def install_template_timer():
+    """
+    بيتنادى مرة من apps.ready. برة طلب متقاس التكلفة lookup واحد في الـ ContextVar.
+    """
+    if not getattr(Template.render, '_timed', False):
+        Template.render = _timed_render(Template.render)
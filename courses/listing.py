@@ -0,0 +1,133 @@
+# courses/listing.py
+"""
+أدوات مشتركة لجداول الأدمن (الطلبة والمدربين): بحث وترتيب وتقسيم صفحات
+على queryset واحد فيه العدادات كـ annotations.
+
+الصفحات بالـ keyset pagination على (عمود الترتيب، pk) زي catalog.py: مفيش COUNT ولا OFFSET،
+فالصفحة رقم 2000 في جدول 50 ألف طالب بتكلف زي الأولى.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+PAGE_SIZE = 25
+
+
+def search_queryset(queryset, query, fields):
+    """
+    بيدور على الكلمة في أي حقل من الحقول (OR)
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    return queryset.filter(condition)
+
+
+def parse_sort(value, columns, default):
+    """
+    columns: {'اسم العمود في الـ URL': 'الحقل أو الـ annotation'}.
+    '-' في الأول يعني تنازلي، وأي قيمة مش معروفة بترجع للـ default.
+    """
+    name = (value or '').lstrip('-')
+    if name not in columns:
+        return default
+    return value
+
+
+def order_for(sort, columns):
+    descending = sort.startswith('-')
+    field = columns[sort.lstrip('-')]
+    # الـ pk في الآخر عشان الترتيب يبقى ثابت بين الصفحات لو القيم متساوية.
+    # مكان الـ NULL محدد (زي SQLite) عشان شرط الـ cursor يبقى صح على أي داتابيز
+    if descending:
+        return [F(field).desc(nulls_last=True), '-pk']
+    return [F(field).asc(nulls_first=True), 'pk']
+
+
+def encode_cursor(value, pk):
+    # التاريخ بيتكتب كامل بالـ microseconds، وإلا الصف اللي على الحد ممكن يتكرر أو يضيع
+    if isinstance(value, datetime):
+        value = {'datetime': value.isoformat()}
+    return base64.urlsafe_b64encode(json.dumps([value, pk]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['datetime'])
+        return value, int(pk)
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        return None
+
+
+def after_position(field, descending, value, pk):
+    """
+    الصفوف اللي بعد (value, pk) في ترتيب order_for
+    """
+    if descending:
+        # تنازلي: الـ NULL في الآخر
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'pk__lt': pk})
+        return Q(**{f'{field}__lt': value}) | Q(**{f'{field}__isnull': True}) | Q(**{field: value, 'pk__lt': pk})
+    # تصاعدي: الـ NULL في الأول
+    if value is None:
+        return Q(**{f'{field}__isnull': True, 'pk__gt': pk}) | Q(**{f'{field}__isnull': False})
+    return Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+
+
+def field_value(obj, field):
+    for name in field.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def next_sorts(sort, columns):
+    """
+    الترتيب اللي هيحصل لو دوسنا على كل عمود: نفس العمود بيقلب الاتجاه
+    """
+    return {
+        name: (name if sort == f'-{name}' else f'-{name}')
+        for name in columns
+    }
+
+
+def admin_list(request, queryset, columns, default_sort, search_fields, per_page=PAGE_SIZE):
+    """
+    بترجع context جاهز للتمبلت: صفوف الصفحة والـ cursor بتاع اللي بعدها والبحث والترتيب.
+    بنجيب صف زيادة عشان نعرف فيه صفحة بعدها من غير COUNT.
+    """
+    query = request.GET.get('q', '').strip()
+    sort = parse_sort(request.GET.get('sort'), columns, default_sort)
+    descending = sort.startswith('-')
+    field = columns[sort.lstrip('-')]
+    queryset = search_queryset(queryset, query, search_fields).order_by(*order_for(sort, columns))
+
+    cursor = request.GET.get('cursor')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        try:
+            queryset = queryset.filter(after_position(field, descending, *position))
+        except (ValidationError, ValueError, TypeError):
+            # cursor متلعب فيه (قيمة مش من نوع العمود) - نبدأ من الأول
+            position = None
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(field_value(rows[-1], field), rows[-1].pk)
+    return {
+        'rows': rows,
+        'next_cursor': next_cursor,
+        'is_first_page': position is None,
+        'query': query,
+        'sort': sort,
+        'next_sort': next_sorts(sort, columns),
+    }
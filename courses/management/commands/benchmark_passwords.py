@@ -0,0 +1,45 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import hashers
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verifications (logins) per second per core for each hasher configuration, "
+        "to pick PASSWORD_* cost settings from data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--configs', default='', help=f"Comma separated: {', '.join(hashers.CONFIGS)}")
+        parser.add_argument('--rounds', type=int, default=10, help="Verifications per configuration")
+        parser.add_argument('--output', help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        names = [name for name in options['configs'].split(',') if name] or list(hashers.CONFIGS)
+        unknown = [name for name in names if name not in hashers.CONFIGS]
+        if unknown:
+            raise CommandError(f"Unknown configs: {', '.join(unknown)}")
+
+        results = {}
+        for name in names:
+            hasher_name = hashers.CONFIGS[name][0]
+            if not hashers.is_available(hasher_name):
+                self.stderr.write(f"{name:16} skipped: {hasher_name} library is not installed")
+                continue
+            results[name] = result = hashers.benchmark_config(name, rounds=options['rounds'])
+            self.stdout.write(
+                f"{name:16} {result['verify_ms']:8.1f}ms per login  "
+                f"{result['logins_per_second_per_core']:7.1f} logins/s/core  {result['cost']}"
+            )
+
+        self.stdout.write(
+            f"Current: PASSWORD_HASHER={settings.PASSWORD_HASHER}, {os.cpu_count()} cores "
+            f"(multiply logins/s/core by the worker processes you run)"
+        )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'cores': os.cpu_count(), 'results': results}, f, indent=2)
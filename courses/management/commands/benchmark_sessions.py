@@ -0,0 +1,60 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import benchmarks
+from courses.seeding import generate_dataset
+from courses.sessions import BACKENDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare authenticated request throughput and query counts across session backends "
+        "(db, cached_db, cache, signed_cookies) on a generated dataset in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(BACKENDS))
+        parser.add_argument('--routes', default=','.join(benchmarks.SESSION_ROUTES))
+        parser.add_argument('--size', default='small', choices=list(benchmarks.SIZES))
+        parser.add_argument('--samples', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        backends = [backend for backend in options['backends'].split(',') if backend]
+        routes = [route for route in options['routes'].split(',') if route]
+        unknown = [backend for backend in backends if backend not in BACKENDS]
+        unknown += [route for route in routes if route not in benchmarks.ROUTES]
+        if unknown:
+            raise CommandError(f"Unknown backends/routes: {', '.join(unknown)}")
+
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        with benchmarks.benchmark_database():
+            generate_dataset(seed=options['seed'], prefix=benchmarks.PREFIX, **benchmarks.SIZES[options['size']])
+            results = benchmarks.benchmark_sessions(
+                benchmarks.build_fixture(), backends=backends, routes=routes,
+                samples=options['samples'], warmup=options['warmup'],
+            )
+
+        for backend, backend_results in results.items():
+            for route, result in backend_results.items():
+                self.stdout.write(
+                    f"{backend:15} {route:24} {result['requests_per_second']:8.1f} req/s  "
+                    f"p50 {result['p50_ms']:7.2f}ms  {result['queries']:3} queries  {result['status']}"
+                )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'meta': benchmarks.metadata(), 'results': results}, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        failed = [
+            f"{backend} {route}: status {result['status']}"
+            for backend, backend_results in results.items()
+            for route, result in backend_results.items()
+            if not result['ok']
+        ]
+        if failed:
+            raise CommandError("Benchmark failures:\n  " + "\n  ".join(failed))
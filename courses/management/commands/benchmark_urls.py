@@ -0,0 +1,75 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every route in courses.urls against generated datasets in a throwaway test database. "
+        "Writes latency percentiles, query counts and peak memory as JSON and fails on regressions "
+        "against --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='small', help=f"Comma separated: {', '.join(benchmarks.SIZES)}")
+        parser.add_argument('--routes', default='', help="Comma separated route names (default: all)")
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write the results to this JSON file")
+        parser.add_argument('--baseline', help="Results JSON of an earlier run to compare against")
+        parser.add_argument('--max-query-increase', type=int, default=0)
+        parser.add_argument('--max-p95-regression', type=float, default=0.25,
+                            help="Allowed p95 slowdown as a fraction (0.25 = 25%%)")
+        parser.add_argument('--min-p95-delta-ms', type=float, default=5.0,
+                            help="Ignore p95 changes smaller than this many milliseconds")
+
+    def handle(self, *args, **options):
+        sizes = [size for size in options['sizes'].split(',') if size]
+        routes = [route for route in options['routes'].split(',') if route] or None
+        unknown = [size for size in sizes if size not in benchmarks.SIZES]
+        unknown += [route for route in routes or [] if route not in benchmarks.ROUTES]
+        if unknown:
+            raise CommandError(f"Unknown sizes/routes: {', '.join(unknown)}")
+        missing = benchmarks.missing_routes()
+        if missing:
+            self.stderr.write(f"Routes without a benchmark: {', '.join(missing)}")
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        # الداتا المتولدة بتتعمل في داتابيز تست وبتتمسح في الآخر، مابتلمسش الداتابيز الحقيقية
+        # الـ 500 بتظهر في الـ status، من غير traceback لكل طلب
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        with benchmarks.benchmark_database():
+            report = benchmarks.run_benchmarks(
+                sizes=sizes, routes=routes, samples=options['samples'], warmup=options['warmup'],
+                seed=options['seed'], log=self.stdout.write,
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        failed = [
+            f"{size} {route}: status {result['status']}"
+            for size, results in report['results'].items()
+            for route, result in results.items()
+            if not result['ok']
+        ]
+        if baseline is not None:
+            failed += benchmarks.compare(
+                baseline, report,
+                max_query_increase=options['max_query_increase'],
+                max_p95_regression=options['max_p95_regression'],
+                min_p95_delta_ms=options['min_p95_delta_ms'],
+            )
+        if failed:
+            raise CommandError("Benchmark failures:\n  " + "\n  ".join(failed))
+        self.stdout.write(self.style.SUCCESS("No regressions."))
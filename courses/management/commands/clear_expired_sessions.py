@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from courses.sessions import clear_expired_sessions, stores_in_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired database sessions in batches (run it from cron). "
+        "Cache and signed-cookie sessions expire by themselves, so there is nothing to delete for them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0,
+                            help="Seconds to wait between batches so live requests can write")
+
+    def handle(self, *args, **options):
+        if not stores_in_db():
+            self.stdout.write(f"{settings.SESSION_ENGINE} does not store sessions in the database.")
+            return
+        deleted = clear_expired_sessions(
+            batch_size=options['batch_size'], pause=options['pause'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired sessions."))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.seeding import flush_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset for performance testing. "
+        "Example (about 1M lesson progress rows): "
+        "--students 50000 --courses 2000 --enrollments-per-student 4 --lessons-per-course 10 --completion-ratio 0.9"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instructors', type=int, default=50)
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--lessons-per-course', type=int, default=10)
+        parser.add_argument('--enrollments-per-student', type=int, default=5)
+        parser.add_argument('--completion-ratio', type=float, default=0.5,
+                            help="Chance of completing each next lesson in an enrolled course")
+        parser.add_argument('--review-ratio', type=float, default=0.2)
+        parser.add_argument('--paid-ratio', type=float, default=0.4)
+        parser.add_argument('--days', type=int, default=365, help="Spread dates over the last N days")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='load', help="Username prefix of the generated users")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true',
+                            help="Delete a previous dataset with the same prefix first")
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            deleted = flush_dataset(options['prefix'])
+            self.stdout.write(f"Flushed {deleted} rows.")
+
+        started = time.monotonic()
+        counts = generate_dataset(
+            instructors=options['instructors'],
+            students=options['students'],
+            courses=options['courses'],
+            lessons_per_course=options['lessons_per_course'],
+            enrollments_per_student=options['enrollments_per_student'],
+            completion_ratio=options['completion_ratio'],
+            review_ratio=options['review_ratio'],
+            paid_ratio=options['paid_ratio'],
+            days=options['days'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(counts.values())} rows in {time.monotonic() - started:.1f}s."
+        ))
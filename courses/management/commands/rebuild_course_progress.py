@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from courses.progress import rebuild_course_progress
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CourseProgress summary table in bulk from LessonProgress"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = rebuild_course_progress(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} course progress rows."))
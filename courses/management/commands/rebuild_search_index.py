@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from courses import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the course/lesson full-text search index from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Courses per batch")
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            self.stdout.write("Full-text index is only used on SQLite; nothing to do.")
+            return
+        total = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} courses."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.stats import refresh_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the admin dashboard stats snapshot (run it from cron more often than STATS_SNAPSHOT_MAX_AGE)"
+
+    def handle(self, *args, **options):
+        snapshot = refresh_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Stats refreshed at {snapshot.computed_at:%Y-%m-%d %H:%M:%S}: "
+            f"{snapshot.total_users} users, {snapshot.total_courses} courses, "
+            f"{snapshot.total_enrollments} enrollments."
+        ))
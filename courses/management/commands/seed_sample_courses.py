@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from courses.seeding import create_sample_courses
+
+
+class Command(BaseCommand):
+    help = "Create the demo courses and lessons shown on the home page (safe to run more than once)"
+
+    def handle(self, *args, **options):
+        courses = create_sample_courses()
+        if courses:
+            self.stdout.write(self.style.SUCCESS(f"Created {len(courses)} sample courses."))
+        else:
+            self.stdout.write("Sample courses already exist.")
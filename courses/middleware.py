@@ -0,0 +1,76 @@
+# courses/middleware.py
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from . import instrumentation
+from .models import Enrollment
+
+
+def get_enrolled_course_ids(user):
+    """
+    ids الكورسات اللي اليوزر مشترك فيها في query واحدة على جدول Enrollment
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    return frozenset(
+        Enrollment.objects.filter(student__user_id=user.id).values_list('course_id', flat=True)
+    )
+
+
+def enrolled_course_ids(request):
+    """
+    الـ set بتاعة الطلب ده - لو الـ middleware مش شغال بنحسبها مرة ونحفظها على الـ request
+    """
+    if not hasattr(request, 'enrolled_course_ids'):
+        request.enrolled_course_ids = get_enrolled_course_ids(request.user)
+    return request.enrolled_course_ids
+
+
+class EnrollmentMiddleware:
+    """
+    بيحط request.enrolled_course_ids كـ lazy object: الـ query مابتتعملش غير
+    أول مرة حد يسأل (الـ tag أو view)، وبعد كده كل التشييكات في الميموري.
+    لازم يبقى بعد AuthenticationMiddleware.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.enrolled_course_ids = SimpleLazyObject(lambda: get_enrolled_course_ids(request.user))
+        return self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """
+    وقت الطلب والـ queries والتمبلت لعينة من الطلبات (instrumentation.py): بيحطهم في
+    هيدر Server-Timing (بيبان في الـ DevTools) وبيسجلهم JSON في الـ logger 'courses.requests'،
+    ولو نفس الـ query اتكررت (N+1) بيعمل اللي REQUEST_METRICS_REPEATED_QUERIES بيقوله.
+    لازم يبقى أول middleware عشان يقيس الباقيين.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not instrumentation.should_sample():
+            return self.get_response(request)
+
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.activate(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            instrumentation.deactivate(token)
+        metrics.finish()
+
+        if getattr(settings, 'REQUEST_METRICS_HEADER', True):
+            response['Server-Timing'] = metrics.server_timing()
+        instrumentation.log_request(metrics.record(request, response))
+        # في التطوير والتستات ممكن يبقى warning أو exception (REQUEST_METRICS_REPEATED_QUERIES)
+        metrics.check_repeated(label=f"{request.method} {request.path}")
+        return response
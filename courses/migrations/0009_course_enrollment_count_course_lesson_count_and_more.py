@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_course_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Student = apps.get_model('courses', 'Student')
+
+    enrolled = (
+        Student.enrolled_courses.through.objects
+        .filter(course_id=OuterRef('pk'))
+        .order_by()
+        .values('course_id')
+    )
+    lessons = (
+        Lesson.objects.filter(course_id=OuterRef('pk'))
+        .order_by()
+        .values('course_id')
+    )
+    Course.objects.update(
+        enrollment_count=Coalesce(Subquery(enrolled.annotate(total=Count('pk')).values('total')), 0),
+        lesson_count=Coalesce(Subquery(lessons.annotate(total=Count('pk')).values('total')), 0),
+        total_duration=Coalesce(Subquery(lessons.annotate(total=Sum('duration')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_student_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='total_duration',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Total lessons duration in minutes'),
+        ),
+        migrations.RunPython(fill_course_counters, migrations.RunPython.noop),
+    ]
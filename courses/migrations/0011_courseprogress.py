@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_course_progress(apps, schema_editor):
+    from django.db.models import Count, Max
+
+    Course = apps.get_model('courses', 'Course')
+    CourseProgress = apps.get_model('courses', 'CourseProgress')
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+
+    totals = dict(Course.objects.values_list('pk', 'lesson_count'))
+    rows = (
+        LessonProgress.objects
+        .filter(completed=True)
+        .values('student_id', 'lesson__course_id')
+        .annotate(completed_count=Count('pk'), last_activity=Max('completed_at'))
+        .order_by()
+    )
+    summaries = []
+    for row in rows:
+        total = totals.get(row['lesson__course_id']) or 0
+        percentage = min(100, int(row['completed_count'] * 100 / total)) if total else 0
+        summaries.append(CourseProgress(
+            student_id=row['student_id'],
+            course_id=row['lesson__course_id'],
+            completed_count=row['completed_count'],
+            percentage=percentage,
+            last_activity=row['last_activity'],
+            completed_at=row['last_activity'] if percentage == 100 else None,
+        ))
+    CourseProgress.objects.bulk_create(summaries, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('percentage', models.PositiveSmallIntegerField(default=0)),
+                ('last_activity', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_progress', to='courses.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_progress', to='courses.student')),
+            ],
+            options={
+                'verbose_name_plural': 'course progress',
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(fill_course_progress, migrations.RunPython.noop),
+    ]
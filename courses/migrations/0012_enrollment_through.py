@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+def merge_enrollments(apps, schema_editor):
+    """
+    بتنقل صفوف الـ M2M القديمة لجدول Enrollment (اللي مش موجود فيه بس)،
+    وبعدين بتمسح جدول الـ M2M وتعيد حساب enrollment_count من الجدول الموحد.
+    """
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Student = apps.get_model('courses', 'Student')
+    OldThrough = Student.enrolled_courses.through
+
+    pairs = OldThrough.objects.values_list('student_id', 'course_id').iterator(chunk_size=5000)
+    Enrollment.objects.bulk_create(
+        (Enrollment(student_id=student_id, course_id=course_id) for student_id, course_id in pairs),
+        batch_size=5000,
+        ignore_conflicts=True,
+    )
+    schema_editor.delete_model(OldThrough)
+
+    enrolled = Enrollment.objects.filter(course_id=OuterRef('pk')).order_by().values('course_id')
+    Course.objects.update(enrollment_count=Coalesce(
+        Subquery(enrolled.annotate(total=Count('pk')).values('total')), 0
+    ))
+
+
+def split_enrollments(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Student = apps.get_model('courses', 'Student')
+    OldThrough = Student.enrolled_courses.through
+
+    schema_editor.create_model(OldThrough)
+    pairs = Enrollment.objects.values_list('student_id', 'course_id').iterator(chunk_size=5000)
+    OldThrough.objects.bulk_create(
+        (OldThrough(student_id=student_id, course_id=course_id) for student_id, course_id in pairs),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_courseprogress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', 'enrolled_at'], name='enrollment_course_date_idx'),
+        ),
+        # الـ M2M بيتحول لواجهة على Enrollment: في الـ state بنغير الحقل،
+        # وفي الداتابيز بننقل البيانات ونمسح الجدول القديم
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(merge_enrollments, split_enrollments),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='student',
+                    name='enrolled_courses',
+                    field=models.ManyToManyField(blank=True, related_name='enrolled_students', through='courses.Enrollment', to='courses.course'),
+                ),
+            ],
+        ),
+    ]
@@ -1,6 +1,10 @@
 # courses/models.py
 from django.contrib.auth.models import AbstractUser  # تأكدي من هذا السطر
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .roles import roles_for
 
 class CustomUser(AbstractUser):  # كان فيه خطأ في الكتابة
     ROLE_CHOICES = (
@@ -31,17 +35,18 @@ class CustomUser(AbstractUser):  # كان فيه خطأ في الكتابة
     def __str__(self):
         return self.username
     
+    # من roles.py: الصفوف نفسها هي الأساس مش حقل role (بيتحملوا مع يوزر الطلب)
     @property
     def is_student(self):
-        return self.role == 'student'
+        return roles_for(self).is_student
     
     @property
     def is_instructor(self):
-        return self.role == 'instructor'
+        return roles_for(self).is_instructor
     
     @property
     def is_admin(self):
-        return self.role == 'admin' or self.is_superuser
+        return roles_for(self).is_admin
 
 # باقي الموديلات غيري User لـ CustomUser
 class Instructor(models.Model):
@@ -62,29 +67,44 @@ class Instructor(models.Model):
     
     @property
     def total_students(self):
-        from django.db.models import Count
-        return self.course_set.aggregate(total=Count('enrolled_students'))['total'] or 0
+        # طلبة مختلفين - الطالب المشترك في كورسين بيتعد مرة واحدة
+        return Enrollment.objects.filter(course__instructor=self).aggregate(
+            total=Count('student', distinct=True)
+        )['total']
 
 class Student(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE,limit_choices_to={'role': 'student'} )
-    enrolled_courses = models.ManyToManyField('Course', blank=True, related_name='enrolled_students')
+    # جدول Enrollment هو المكان الوحيد اللي الاشتراكات بتتسجل فيه، والـ M2M ده واجهة عليه
+    enrolled_courses = models.ManyToManyField('Course', through='Enrollment', blank=True, related_name='enrolled_students')
     
     def __str__(self):
         return f"Student: {self.user.username}"
     
     def get_completed_lessons_count(self, course):
-        return LessonProgress.objects.filter(
-            student=self, 
-            lesson__course=course, 
-            completed=True
-        ).count()
+        return self.course_progress.filter(course=course).values_list(
+            'completed_count', flat=True
+        ).first() or 0
     
     def get_course_progress(self, course):
-        total_lessons = course.total_lessons
-        if total_lessons == 0:
-            return 0
-        completed_lessons = self.get_completed_lessons_count(course)
-        return (completed_lessons / total_lessons) * 100
+        return self.course_progress.filter(course=course).values_list(
+            'percentage', flat=True
+        ).first() or 0
+    
+    def get_courses_progress(self):
+        """
+        التقدم في كل الكورسات المشترك فيها في query واحدة من جدول CourseProgress.
+        كل كورس راجع عليه completed_lessons و progress (نسبة مئوية صحيحة).
+        """
+        summary = CourseProgress.objects.filter(student=self, course_id=OuterRef('pk'))
+        return list(
+            self.enrolled_courses
+            .select_related('instructor__user')
+            .annotate(
+                completed_lessons=Coalesce(Subquery(summary.values('completed_count')[:1]), 0),
+                progress=Coalesce(Subquery(summary.values('percentage')[:1]), 0),
+            )
+            .order_by('title')
+        )
 
 # باقي الموديلات تفضل كما هي مع تغيير User لـ CustomUser
 class Course(models.Model):
@@ -98,17 +118,31 @@ class Course(models.Model):
     category = models.CharField(max_length=100, default='Development')
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+    # عدادات محسوبة مسبقاً - بتتحدث من الـ signals تحت
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    total_duration = models.PositiveIntegerField(default=0, editable=False, help_text="Total lessons duration in minutes")
+    
+    class Meta:
+        # نفس ترتيب الكتالوج (created_at, id) عشان الـ keyset pagination تقرا من الـ index على طول
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='course_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='course_category_created_idx'),
+            models.Index(fields=['is_paid', '-created_at', '-id'], name='course_paid_created_idx'),
+            models.Index(fields=['is_active', '-created_at', '-id'], name='course_active_created_idx'),
+            models.Index(fields=['is_featured', '-created_at', '-id'], name='course_featured_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
     @property
     def total_lessons(self):
-        return self.lesson_set.count()
+        return self.lesson_count
     
     @property
     def total_enrollments(self):
-        return self.enrolled_students.count()
+        return self.enrollment_count
 
 class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -136,17 +170,85 @@ class LessonProgress(models.Model):
     def __str__(self):
         return f"{self.student.user.username} - {self.lesson.title}"
 
+class CourseProgress(models.Model):
+    """
+    ملخص تقدم الطالب في كورس - بيتحدث مع كل درس يخلص بدل ما نعد LessonProgress في كل قراية
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='course_progress')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='student_progress')
+    completed_count = models.PositiveIntegerField(default=0)
+    percentage = models.PositiveSmallIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['student', 'course']
+        verbose_name_plural = 'course progress'
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.course.title} ({self.percentage}%)"
+
 class Enrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
+        # الـ unique بيعمل index على (student, course) لتشييك الاشتراك،
+        # والتاني لطلبة الكورس مرتبين بتاريخ الاشتراك
         unique_together = ['student', 'course']
+        indexes = [
+            models.Index(fields=['course', 'enrolled_at'], name='enrollment_course_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.user.username} - {self.course.title}"
 
+class Review(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='reviews')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    rating = models.IntegerField(default=5)
+    comment = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['course', 'student']
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.course.title} ({self.rating})"
+
+class Payment(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    order_id = models.CharField(max_length=100, unique=True)
+    payment_id = models.CharField(max_length=100, blank=True, null=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateTimeField(auto_now_add=True)
+    # True = الدفع اتأكد
+    status = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.order_id} - {self.amount}"
+
+class StatsSnapshot(models.Model):
+    """
+    أرقام لوحة الأدمن محسوبة مسبقاً في صف واحد بدل COUNT(*) على كل الجداول في كل تحميل.
+    بيتحسب من الأول بـ refresh_stats، والعدادات بتزيد وتقل من الـ signals بين كل refresh والتاني.
+    """
+    total_users = models.PositiveIntegerField(default=0)
+    total_students = models.PositiveIntegerField(default=0)
+    total_instructors = models.PositiveIntegerField(default=0)
+    total_admins = models.PositiveIntegerField(default=0)
+    total_courses = models.PositiveIntegerField(default=0)
+    active_courses = models.PositiveIntegerField(default=0)
+    total_enrollments = models.PositiveIntegerField(default=0)
+    # {"2026-10-18": 12, ...} الاشتراكات الجديدة في آخر كام يوم
+    enrollments_by_day = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Stats snapshot at {self.computed_at:%Y-%m-%d %H:%M}"
+
 class UserProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='user_profile')
     phone_number = models.CharField(max_length=15, blank=True, null=True)
@@ -155,30 +257,213 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # الحقول اللي اليوزر بيعدلها - بنفتكر قيمتها من الداتابيز عشان نعرف اتغيرت ولا لا
+    EDITABLE_FIELDS = ('phone_number', 'date_of_birth', 'address')
+
     def __str__(self):
         return f"Profile of {self.user.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded = {
+            name: getattr(instance, name) for name in cls.EDITABLE_FIELDS if name in field_names
+        }
+        return instance
+
+    def changed_fields(self):
+        """
+        الحقول اللي اتغيرت من ساعة ما اتحملت. بروفايل لسه ما اتحفظش = كل الحقول
+        """
+        loaded = getattr(self, '_loaded', None)
+        if loaded is None:
+            return list(self.EDITABLE_FIELDS)
+        return [name for name, value in loaded.items() if getattr(self, name) != value]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self._loaded = {name: getattr(self, name) for name in self.EDITABLE_FIELDS}
+        elif getattr(self, '_loaded', None) is not None:
+            # اللي اتكتب بس بقى clean، والباقي لو اتعدل لسه هيتحفظ في الـ save الجاي
+            self._loaded.update(
+                (name, getattr(self, name)) for name in self.EDITABLE_FIELDS if name in update_fields
+            )
     
     @property
     def is_admin(self):
-        return self.user.is_superuser
+        return roles_for(self.user).is_admin
     
     @property
     def is_instructor(self):
-        return hasattr(self.user, 'instructor')
+        return roles_for(self.user).is_instructor
     
     @property
     def is_student(self):
-        return hasattr(self.user, 'student')
+        return roles_for(self.user).is_student
 
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
 
-@receiver(post_save, sender=CustomUser)
-def create_user_profile(sender, instance, created, **kwargs):
+# بيتبعت مرة واحدة لكل عملية مسح (Model.delete أو QuerySet.delete أو cascade) بكل الصفوف
+# اللي اتمسحت من الموديل، بدل post_delete لكل صف. الموديلات اللي بتبعته في track_deletes تحت
+rows_deleted = Signal()
+
+
+def _delete_batch(origin, model):
+    batches = origin.__dict__.setdefault('_delete_batches', {})
+    return batches.setdefault(model, {'expected': 0, 'rows': []})
+
+
+def track_deletes(model):
+    """
+    مسح كورس فيه 50 اشتراك كان بيعمل 50 UPDATE لنفس العداد (post_delete لكل صف).
+    الـ Collector بتاع Django بيبعت pre_delete لكل الصفوف قبل ما يمسح أي حاجة، فبنعدهم هناك،
+    ومع آخر post_delete بنبعت rows_deleted مرة واحدة.
+    """
+    def counted(sender, instance, origin=None, **kwargs):
+        _delete_batch(origin if origin is not None else instance, sender)['expected'] += 1
+
+    def collected(sender, instance, origin=None, **kwargs):
+        origin = origin if origin is not None else instance
+        batch = _delete_batch(origin, sender)
+        batch['rows'].append(instance)
+        if len(batch['rows']) >= batch['expected']:
+            del origin._delete_batches[sender]
+            rows_deleted.send(sender=sender, instances=batch['rows'], origin=origin)
+
+    name = model._meta.model_name
+    pre_delete.connect(counted, sender=model, weak=False, dispatch_uid=f'count_{name}_deletes')
+    post_delete.connect(collected, sender=model, weak=False, dispatch_uid=f'collect_{name}_deletes')
+
+
+def deleting_course(origin):
+    # الكورس نفسه بيتمسح (والصفوف دي cascade منه) - عداداته مش محتاجة تتحدث
+    return isinstance(origin, Course) or (isinstance(origin, models.QuerySet) and origin.model is Course)
+
+
+def update_course_counters(course_ids, enrollments=False, lessons=False):
+    """
+    إعادة حساب عدادات الكورسات في UPDATE واحد بدل ما نعد في كل صفحة
+    """
+    course_ids = [pk for pk in course_ids if pk is not None]
+    if not course_ids:
+        return
+
+    values = {}
+    if enrollments:
+        enrolled = (
+            Enrollment.objects
+            .filter(course_id=OuterRef('pk'))
+            .order_by()
+            .values('course_id')
+        )
+        values['enrollment_count'] = Coalesce(
+            Subquery(enrolled.annotate(total=Count('pk')).values('total')), 0
+        )
+    if lessons:
+        course_lessons = (
+            Lesson.objects.filter(course_id=OuterRef('pk'))
+            .order_by()
+            .values('course_id')
+        )
+        values['lesson_count'] = Coalesce(
+            Subquery(course_lessons.annotate(total=Count('pk')).values('total')), 0
+        )
+        values['total_duration'] = Coalesce(
+            Subquery(course_lessons.annotate(total=Sum('duration')).values('total')), 0
+        )
+    if values:
+        Course.objects.filter(pk__in=course_ids).update(**values)
+
+@receiver(pre_save, sender=Course)
+def remember_course_state(sender, instance, raw=False, **kwargs):
+    # receivers الكاش (المدرب القديم) والإحصائيات (is_active القديم) محتاجين القيم قبل الحفظ - query واحدة للاتنين
+    instance._previous_state = (
+        Course.objects.filter(pk=instance.pk).values('instructor_id', 'is_active').first()
+        if instance.pk and not raw else None
+    )
+
+@receiver(m2m_changed, sender=Enrollment)
+def sync_enrollment_count(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() بيعمل bulk_create من غير post_save، فبنمسكه هنا.
+    # الـ remove و clear بيمسحوا صفوف Enrollment فبيوصلوا لـ rows_deleted تحت
+    if action != 'post_add':
+        return
+    course_ids = [instance.pk] if reverse else (pk_set or [])
+    update_course_counters(course_ids, enrollments=True)
+
+@receiver(post_save, sender=Enrollment)
+def sync_enrollment_row(sender, instance, **kwargs):
+    update_course_counters([instance.course_id], enrollments=True)
+
+@receiver(rows_deleted, sender=Enrollment)
+def sync_deleted_enrollments(sender, instances, origin, **kwargs):
+    if not deleting_course(origin):
+        update_course_counters({row.course_id for row in instances}, enrollments=True)
+
+@receiver(post_save, sender=Lesson)
+def sync_lesson_counters(sender, instance, created, **kwargs):
+    from .progress import refresh_course_progress
+
+    # الـ outline اللي في الكاش بيتمسح من receivers الـ tags في caching.py
+    update_course_counters([instance.course_id], lessons=True)
+    # تعديل درس موجود مابيغيرش نسب التقدم، الإضافة والمسح بس
     if created:
+        refresh_course_progress(instance.course_id)
+
+@receiver(rows_deleted, sender=Lesson)
+def sync_deleted_lessons(sender, instances, origin, **kwargs):
+    from .progress import refresh_course_progress
+
+    if deleting_course(origin):
+        return
+    course_ids = {row.course_id for row in instances}
+    update_course_counters(course_ids, lessons=True)
+    for course_id in course_ids:
+        refresh_course_progress(course_id)
+
+track_deletes(Enrollment)
+track_deletes(Lesson)
+
+def create_profiles(users, batch_size=1000):
+    """
+    بروفايلات لليوزرز اللي اتعملوا بـ bulk_create (الـ seeding، أي import) في inserts على دفعات.
+    bulk_create مابيبعتش post_save، فده البديل بتاع create_user_profile.
+    اليوزر اللي عنده بروفايل بيتساب، وبيرجع عدد البروفايلات اللي اتعملت فعلاً.
+    """
+    user_ids = [user.pk for user in users]
+    created = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        existing = set(UserProfile.objects.filter(user_id__in=batch).values_list('user_id', flat=True))
+        missing = [UserProfile(user_id=pk) for pk in batch if pk not in existing]
+        # ignore_conflicts لو حد عمل بروفايل لنفس اليوزر بين الـ SELECT والـ INSERT
+        UserProfile.objects.bulk_create(missing, ignore_conflicts=True)
+        created += len(missing)
+    return created
+
+@receiver(post_save, sender=CustomUser)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # raw = loaddata، والـ fixture فيها البروفايل لو محتاجينه
+    if created and not raw:
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=CustomUser)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'user_profile'):
-        instance.user_profile.save()
\ No newline at end of file
+def save_user_profile(sender, instance, created, raw=False, **kwargs):
+    """
+    لو حد عدل user.user_profile وحفظ اليوزر، البروفايل يتحفظ معاه - بس الحقول اللي اتغيرت.
+    أي save تاني لليوزر (login بيحفظ last_login) مابيلمسش البروفايل ولا بيعمل lookup عليه.
+    """
+    if created or raw:
+        return
+    profile = instance._state.fields_cache.get('user_profile')
+    if profile is None:
+        return
+    if profile._state.adding:
+        profile.save()
+        return
+    changed = profile.changed_fields()
+    if changed:
+        profile.save(update_fields=[*changed, 'updated_at'])
\ No newline at end of file
@@ -0,0 +1,28 @@
+# courses/outline.py
+from .caching import outline_tag, tagged_cache
+from .models import Lesson
+
+OUTLINE_FIELDS = ('id', 'title', 'content', 'order', 'duration', 'video_url')
+
+# الـ outline بيتمسح مع outline:<id> أول ما أي درس يتغير (مش مع التسجيل في الكورس)، فالـ timeout ده احتياطي بس
+OUTLINE_TIMEOUT = 60 * 60 * 24
+
+
+def outline_key(course_id):
+    return f'course-outline:{course_id}'
+
+
+def get_outline(course_id):
+    """
+    قايمة دروس الكورس مترتبة (dicts مش objects) من الكاش، ولو مش موجودة بتتجاب في query واحدة
+    """
+    return tagged_cache.get_or_set(
+        outline_key(course_id),
+        lambda: list(
+            Lesson.objects.filter(course_id=course_id)
+            .order_by('order', 'id')
+            .values(*OUTLINE_FIELDS)
+        ),
+        tags=[outline_tag(course_id)],
+        timeout=OUTLINE_TIMEOUT,
+    )
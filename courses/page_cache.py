@@ -0,0 +1,114 @@
+# courses/page_cache.py
+"""
+كاش للصفحة كلها (HTML جاهز) للزوار اللي مش عاملين login.
+
+الصفحة العامة بتطلع نفس الـ HTML لكل زائر، فبنخزنها في tagged_cache بالـ tags بتاعة
+البيانات اللي فيها (الكورس، المدرب، الكتالوج) وبتتمسح مع أي تغيير فيهم من receivers
+الـ caching.py. كل نسخة ليها ETag (hash المحتوى) و Last-Modified (وقت ما اتبنت)،
+فالمتصفح اللي معاه نفس النسخة بياخد 304 من غير body.
+
+أي طلب فيه user عامل login أو messages مستنية أو صفحة حطت CSRF token أو cookie
+بيعدي من غير كاش خالص.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .caching import tagged_cache
+
+DEFAULT_TIMEOUT = 60 * 5
+
+
+def page_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def page_key(request):
+    path = f"{request.get_host()}{request.get_full_path()}"
+    return 'page:' + hashlib.md5(path.encode()).hexdigest()
+
+
+def add_page_tags(request, *tags):
+    """
+    الـ view بتضيف tags مش معروفة غير بعد الـ query (زي كورسات الصفحة)
+    """
+    request._page_cache_tags = [*getattr(request, '_page_cache_tags', []), *tags]
+
+
+def is_cacheable_request(request):
+    user = getattr(request, 'user', None)
+    return (
+        request.method in ('GET', 'HEAD')
+        and user is not None
+        and not user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def is_cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def _finish(request, response, entry):
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    # الـ proxies مايدوش نسخة الزوار لحد عامل login
+    patch_vary_headers(response, ['Cookie'])
+    return get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'], response=response,
+    )
+
+
+def anonymous_page_cache(tags):
+    """
+    tags(request, *args, **kwargs) بترجع الـ tags المعروفة قبل تنفيذ الـ view،
+    والـ view تقدر تزود عليها بـ add_page_tags.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            rendered = {}
+
+            def build():
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+                rendered['response'] = response
+                if not is_cacheable_response(request, response):
+                    return None
+                return {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'etag': '"%s"' % hashlib.md5(response.content).hexdigest(),
+                    'last_modified': int(time.time()),
+                    'tags': getattr(request, '_page_cache_tags', []),
+                }
+
+            entry = tagged_cache.get_or_set(
+                page_key(request),
+                build,
+                tags=tags(request, *args, **kwargs),
+                timeout=page_timeout(),
+                dependencies=lambda entry: entry['tags'],
+            )
+            if entry is None:
+                return rendered['response']
+            # أول مرة بنرجع الـ response الأصلي (فيه الـ context للتستات والـ debug toolbar)
+            response = rendered.get('response') or HttpResponse(entry['content'], content_type=entry['content_type'])
+            return _finish(request, response, entry)
+        return wrapped
+    return decorator
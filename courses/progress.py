@@ -0,0 +1,220 @@
+# courses/progress.py
+"""
+كتابة وتصليح جدول CourseProgress (ملخص تقدم الطالب في كل كورس).
+
+القراية كلها بتيجي من CourseProgress، والكتابة بتحصل في نفس الـ transaction
+اللي بيتسجل فيها الدرس في LessonProgress عشان الاتنين مايختلفوش.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, Count, DateTimeField, F, IntegerField, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual, LessThanOrEqual
+from django.utils import timezone
+
+from .models import Course, CourseProgress, Lesson, LessonProgress
+
+
+def percentage_of(completed, total):
+    if not total:
+        return 0
+    return min(100, int(completed * 100 / total))
+
+
+def summary_updates(completed, total, now):
+    """
+    قيم UPDATE لملخص التقدم من عدد الدروس اللي خلصت (completed) وعدد دروس الكورس (total).
+    الاتنين expressions فالحساب كله بيحصل جوه الداتابيز في UPDATE واحد،
+    ومفيش قراية قبل الكتابة يقدر طلب تاني يسبقنا فيها.
+    """
+    finished = GreaterThan(total, 0) & GreaterThanOrEqual(completed, total)
+    return {
+        'completed_count': completed,
+        'percentage': Case(
+            When(LessThanOrEqual(total, 0), then=Value(0)),
+            When(GreaterThanOrEqual(completed, total), then=Value(100)),
+            default=completed * 100 / total,
+            output_field=IntegerField(),
+        ),
+        'completed_at': Case(
+            When(finished, then=Coalesce(F('completed_at'), Value(now))),
+            default=Value(None),
+            output_field=DateTimeField(),
+        ),
+    }
+
+
+def refresh_student_progress(student_id, course_ids, now=None):
+    """
+    بتحدث ملخصات طالب واحد في شوية كورسات من LessonProgress مباشرة.
+    الصف بيتعمل بـ upsert لو مش موجود، وبعدين UPDATE واحد بيحسب العدد والنسبة.
+    """
+    now = now or timezone.now()
+    course_ids = sorted(set(course_ids))
+    CourseProgress.objects.bulk_create(
+        [CourseProgress(student_id=student_id, course_id=course_id, last_activity=now) for course_id in course_ids],
+        update_conflicts=True,
+        unique_fields=['student', 'course'],
+        update_fields=['last_activity'],
+    )
+
+    completed = Coalesce(Subquery(
+        LessonProgress.objects
+        .filter(student_id=student_id, completed=True, lesson__course_id=OuterRef('course_id'))
+        .order_by()
+        .values('lesson__course_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+    total = Coalesce(Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('lesson_count')), 0)
+    CourseProgress.objects.filter(student_id=student_id, course_id__in=course_ids).update(
+        **summary_updates(completed, total, now)
+    )
+
+
+def record_lesson_completions(student_id, completions):
+    """
+    بتكتب دفعة دروس خلصت لطالب واحد: upsert واحد لكل الصفوف في LessonProgress
+    وبعدها ملخصات الكورسات اللي اتأثرت في نفس الـ transaction.
+    completions عبارة عن [(lesson_id, course_id, completed_at), ...].
+    """
+    # نفس الدرس مرتين في دفعة واحدة بيكسر ON CONFLICT في PostgreSQL، فبناخد آخر وقت بس
+    latest_per_lesson = {}
+    for lesson_id, course_id, completed_at in completions:
+        previous = latest_per_lesson.get(lesson_id)
+        if previous is None or completed_at > previous[1]:
+            latest_per_lesson[lesson_id] = (course_id, completed_at)
+    if not latest_per_lesson:
+        return
+    completions = [(lesson_id, course_id, completed_at) for lesson_id, (course_id, completed_at) in latest_per_lesson.items()]
+
+    with transaction.atomic():
+        LessonProgress.objects.bulk_create(
+            [
+                LessonProgress(student_id=student_id, lesson_id=lesson_id, completed=True, completed_at=completed_at)
+                for lesson_id, _, completed_at in completions
+            ],
+            update_conflicts=True,
+            unique_fields=['student', 'lesson'],
+            update_fields=['completed', 'completed_at'],
+        )
+        latest = max(completed_at for _, _, completed_at in completions)
+        refresh_student_progress(student_id, [course_id for _, course_id, _ in completions], latest)
+
+
+def _summary_upsert_sql():
+    progress = CourseProgress._meta.db_table
+    return (
+        # العدد والإجمالي بيتحسبوا جوه الـ statement نفسه، زي summary_updates بالظبط
+        "WITH counts AS (SELECT "
+        f"(SELECT COUNT(*) FROM {LessonProgress._meta.db_table} lp "
+        f"INNER JOIN {Lesson._meta.db_table} l ON l.id = lp.lesson_id "
+        "WHERE lp.student_id = %s AND l.course_id = %s AND lp.completed) AS completed, "
+        f"COALESCE((SELECT lesson_count FROM {Course._meta.db_table} WHERE id = %s), 0) AS total) "
+        f"INSERT INTO {progress} (student_id, course_id, completed_count, percentage, last_activity, completed_at) "
+        "SELECT %s, %s, completed, "
+        "CASE WHEN total <= 0 THEN 0 WHEN completed >= total THEN 100 ELSE completed * 100 / total END, "
+        "%s, CASE WHEN total > 0 AND completed >= total THEN %s END "
+        # WHERE TRUE عشان SQLite مايفهمش ON CONFLICT على إنه جزء من الـ SELECT
+        "FROM counts WHERE TRUE "
+        "ON CONFLICT (student_id, course_id) DO UPDATE SET "
+        "completed_count = EXCLUDED.completed_count, percentage = EXCLUDED.percentage, "
+        "last_activity = EXCLUDED.last_activity, "
+        f"completed_at = CASE WHEN EXCLUDED.completed_at IS NULL THEN NULL "
+        f"ELSE COALESCE({progress}.completed_at, EXCLUDED.completed_at) END"
+    )
+
+
+def upsert_course_progress(student_id, course_id, now):
+    """
+    ملخص طالب واحد في كورس واحد في statement واحد (INSERT ... ON CONFLICT DO UPDATE)،
+    وبيرجع {'completed_count', 'percentage'} من الـ RETURNING من غير قراية تانية
+    """
+    sql = _summary_upsert_sql()
+    now = connection.ops.adapt_datetimefield_value(now)
+    params = [student_id, course_id, course_id, student_id, course_id, now, now]
+    with connection.cursor() as cursor:
+        if connection.features.can_return_columns_from_insert:
+            cursor.execute(sql + " RETURNING completed_count, percentage", params)
+            completed_count, percentage = cursor.fetchone()
+        else:
+            cursor.execute(sql, params)
+            completed_count, percentage = CourseProgress.objects.filter(
+                student_id=student_id, course_id=course_id,
+            ).values_list('completed_count', 'percentage').get()
+    return {'completed_count': completed_count, 'percentage': percentage}
+
+
+def record_lesson_completion(student, lesson, completed_at=None):
+    """
+    بتعلم الدرس إنه خلص بـ INSERT ... ON CONFLICT DO UPDATE واحد، فلو نفس الطالب
+    داس مرتين في نفس اللحظة مفيش IntegrityError ولا صف مكرر. وبعدها ملخص الكورس
+    بـ upsert تاني في نفس الـ transaction، وبترجع الملخص الجديد.
+    """
+    completed_at = completed_at or timezone.now()
+    with transaction.atomic():
+        LessonProgress.objects.bulk_create(
+            [LessonProgress(student_id=student.pk, lesson_id=lesson.pk, completed=True, completed_at=completed_at)],
+            update_conflicts=True,
+            unique_fields=['student', 'lesson'],
+            update_fields=['completed', 'completed_at'],
+        )
+        return upsert_course_progress(student.pk, lesson.course_id, completed_at)
+
+
+def refresh_course_progress(course_id):
+    """
+    بتعيد حساب ملخصات كورس واحد لكل الطلبة بعد ما دروسه تتغير (درس اتضاف أو اتمسح)
+    """
+    total = Course.objects.filter(pk=course_id).values_list('lesson_count', flat=True).first()
+    if total is None:
+        return
+
+    completed = Coalesce(Subquery(
+        LessonProgress.objects
+        .filter(student_id=OuterRef('student_id'), lesson__course_id=course_id, completed=True)
+        .order_by()
+        .values('student_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+    CourseProgress.objects.filter(course_id=course_id).update(
+        **summary_updates(completed, Value(total), timezone.now())
+    )
+
+
+def rebuild_course_progress(batch_size=5000):
+    """
+    بتبني الجدول كله من LessonProgress من الأول - للتصليح بعد imports أو لو حصل drift.
+    بترجع عدد الصفوف اللي اتكتبت.
+    """
+    totals = dict(Course.objects.values_list('pk', 'lesson_count'))
+    rows = (
+        LessonProgress.objects
+        .filter(completed=True)
+        .values('student_id', 'lesson__course_id')
+        .annotate(completed_count=Count('pk'), last_activity=Max('completed_at'))
+        .order_by('student_id', 'lesson__course_id')
+    )
+
+    now = timezone.now()
+    written = 0
+    with transaction.atomic():
+        CourseProgress.objects.all().delete()
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            percentage = percentage_of(row['completed_count'], totals.get(row['lesson__course_id']))
+            batch.append(CourseProgress(
+                student_id=row['student_id'],
+                course_id=row['lesson__course_id'],
+                completed_count=row['completed_count'],
+                percentage=percentage,
+                last_activity=row['last_activity'],
+                completed_at=(row['last_activity'] or now) if percentage == 100 else None,
+            ))
+            if len(batch) >= batch_size:
+                CourseProgress.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        CourseProgress.objects.bulk_create(batch)
+        written += len(batch)
+    return written
@@ -0,0 +1,72 @@
+# courses/roles.py
+"""
+مصدر واحد لصلاحيات اليوزر بدل hasattr(user, 'student') و user.role و userprofile في كل حتة.
+
+RoleModelBackend (backends.py) بيحمل يوزر الـ session ومعاه صفوف Student و Instructor و UserProfile
+في JOIN واحد، فكل التشييكات بعد كده (في الـ views والـ decorators والتمبلت) من غير queries.
+القاعدة:
+    أدمن  = is_superuser أو role == 'admin'
+    مدرب  = عنده صف Instructor (become_instructor بيعمل الصف من غير ما يغير الـ role)
+    طالب  = عنده صف Student
+"""
+from django.core.exceptions import ObjectDoesNotExist
+
+ROLE_RELATIONS = ('student', 'instructor', 'user_profile')
+
+
+def with_roles(queryset):
+    return queryset.select_related(*ROLE_RELATIONS)
+
+
+class Roles:
+    __slots__ = ('student', 'instructor', 'is_admin')
+
+    def __init__(self, student, instructor, is_admin):
+        self.student = student
+        self.instructor = instructor
+        self.is_admin = is_admin
+
+    @property
+    def is_student(self):
+        return self.student is not None
+
+    @property
+    def is_instructor(self):
+        return self.instructor is not None
+
+    @property
+    def student_id(self):
+        return self.student.pk if self.student else None
+
+    @property
+    def instructor_id(self):
+        return self.instructor.pk if self.instructor else None
+
+
+ANONYMOUS = Roles(None, None, False)
+
+
+def _related(user, name):
+    try:
+        return getattr(user, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def roles_for(user):
+    """
+    أدوار اليوزر، محفوظة عليه بعد أول مرة. يوزر الطلب جاي من RoleModelBackend بصفوفه،
+    فده مابيعملش queries. يوزر جاي من مكان تاني بيكلف query لكل علاقة مش محملة.
+    """
+    if not user.is_authenticated:
+        return ANONYMOUS
+    roles = getattr(user, '_roles', None)
+    if roles is None:
+        roles = Roles(
+            student=_related(user, 'student'),
+            instructor=_related(user, 'instructor'),
+            is_admin=user.is_superuser or user.role == 'admin',
+        )
+        user._roles = roles
+    return roles
+
@@ -0,0 +1,229 @@
+# courses/search.py
+"""
+البحث في الكورسات والدروس.
+
+على SQLite بنستخدم جدول FTS5 (inverted index) فيه صف واحد لكل كورس، والـ rowid هو id الكورس:
+العنوان والوصف، وعناوين ومحتوى كل دروسه متجمعين في عمودين. صف لكل كورس معناه إن الترتيب
+والـ LIMIT/OFFSET بيتعملوا جوه FTS5 نفسه (ORDER BY rank) من غير GROUP BY على آلاف الدروس.
+على أي داتابيز تانية بنرجع لـ LIKE العادي.
+"""
+import re
+from itertools import groupby
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+from .catalog import catalog_courses
+from .models import Course, Lesson, deleting_course, rows_deleted
+
+INDEX_TABLE = 'courses_course_search'
+# الجدول القديم (صف لكل درس) - بيتمسح أول ما الجديد يتعمل
+LEGACY_TABLES = ('courses_search_index',)
+
+# وزن كل عمود بالترتيب: عنوان الكورس، الوصف، عناوين الدروس، محتوى الدروس
+RANK_FUNCTION = 'bm25(10.0, 1.0, 5.0, 1.0)'
+
+MAX_TERMS = 10
+PAGE_SIZE = 12
+
+
+def fts_enabled(using=None):
+    return (using or connection).vendor == 'sqlite'
+
+
+def create_index(using=None):
+    """
+    بيعمل جدول الـ FTS لو مش موجود، وبيرجع True لو اتعمل دلوقتي
+    """
+    conn = using or connection
+    if not fts_enabled(conn):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [INDEX_TABLE]
+        )
+        if cursor.fetchone():
+            return False
+        for table in LEGACY_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {INDEX_TABLE} USING fts5("
+            "title, description, lesson_titles, lesson_content, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    return True
+
+
+def _lesson_columns(using, course_ids):
+    """
+    {course_id: (عناوين الدروس، محتواها)} بترتيب الدروس في الكورس
+    """
+    lessons = (
+        Lesson.objects.using(using).filter(course_id__in=course_ids)
+        .order_by('course_id', 'order', 'id').values_list('course_id', 'title', 'content')
+    )
+    return {
+        course_id: ('\n'.join(row[1] for row in rows), '\n'.join(row[2] for row in rows))
+        for course_id, rows in ((pk, list(group)) for pk, group in groupby(lessons, key=lambda row: row[0]))
+    }
+
+
+def index_courses(course_ids, using=None):
+    """
+    بيكتب صفوف الكورسات دي من الأول (الكورس ودروسه في 2 queries) - للـ bulk_create اللي مابيبعتش signals
+    """
+    conn = using or connection
+    if not fts_enabled(conn):
+        return 0
+    course_ids = list(course_ids)
+    if not course_ids:
+        return 0
+    courses = Course.objects.using(conn.alias).filter(pk__in=course_ids).values_list('id', 'title', 'description')
+    lessons = _lesson_columns(conn.alias, course_ids)
+    rows = [(pk, title, description, *lessons.get(pk, ('', ''))) for pk, title, description in courses]
+    with conn.cursor() as cursor:
+        _delete_rows(course_ids, cursor)
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (rowid, title, description, lesson_titles, lesson_content) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+    return len(rows)
+
+
+def rebuild_index(using=None, batch_size=500):
+    """
+    بيمسح الـ index ويبنيه من الأول - للـ bulk imports اللي مابتبعتش signals
+    """
+    conn = using or connection
+    if not fts_enabled(conn):
+        return 0
+    create_index(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+
+    course_ids = list(Course.objects.using(conn.alias).order_by('id').values_list('id', flat=True))
+    return sum(
+        index_courses(course_ids[start:start + batch_size], conn)
+        for start in range(0, len(course_ids), batch_size)
+    )
+
+
+def _delete_rows(course_ids, cursor):
+    cursor.execute(
+        f"DELETE FROM {INDEX_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(course_ids))})", course_ids,
+    )
+
+
+def index_course(sender, instance, **kwargs):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        # UPDATE للعنوان والوصف بس، عشان مانقراش كل الدروس مع كل تعديل في الكورس
+        cursor.execute(
+            f"UPDATE {INDEX_TABLE} SET title = %s, description = %s WHERE rowid = %s",
+            [instance.title, instance.description, instance.pk],
+        )
+        if not cursor.rowcount:
+            cursor.execute(
+                f"INSERT INTO {INDEX_TABLE} (rowid, title, description, lesson_titles, lesson_content) "
+                "VALUES (%s, %s, %s, '', '')",
+                [instance.pk, instance.title, instance.description],
+            )
+
+
+def unindex_course(sender, instance, **kwargs):
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            _delete_rows([instance.pk], cursor)
+
+
+def _reindex_lessons(course_ids):
+    lessons = _lesson_columns(connection.alias, course_ids)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {INDEX_TABLE} SET lesson_titles = %s, lesson_content = %s WHERE rowid = %s",
+            [(*lessons.get(pk, ('', '')), pk) for pk in course_ids],
+        )
+
+
+def index_lesson(sender, instance, **kwargs):
+    if fts_enabled():
+        _reindex_lessons([instance.course_id])
+
+
+def unindex_lessons(sender, instances, origin=None, **kwargs):
+    # مرة واحدة لكل كورس اتمسح منه دروس، ولو الكورس نفسه بيتمسح unindex_course بيشيل الصف كله
+    if fts_enabled() and not deleting_course(origin):
+        _reindex_lessons(sorted({row.course_id for row in instances}))
+
+
+def connect_signals():
+    post_save.connect(index_course, sender=Course, dispatch_uid='search_index_course')
+    post_delete.connect(unindex_course, sender=Course, dispatch_uid='search_unindex_course')
+    post_save.connect(index_lesson, sender=Lesson, dispatch_uid='search_index_lesson')
+    rows_deleted.connect(unindex_lessons, sender=Lesson, dispatch_uid='search_unindex_lesson')
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def fts_query(terms):
+    # كل كلمة phrase لوحدها مع prefix match، والكلمات كلها لازم تتطابق (AND)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def matching_course_ids(query):
+    """
+    Subquery بالـ ids المطابقة، تتحط في filter(pk__in=...) زي ما هي
+    """
+    terms = search_terms(query)
+    if not terms or not fts_enabled():
+        return None
+    return RawSQL(f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s", [fts_query(terms)])
+
+
+def like_search(query):
+    """
+    البحث القديم بـ LIKE '%term%' - بيستخدم لو مفيش FTS وفي الـ benchmark للمقارنة
+    """
+    courses = Course.objects.all()
+    for term in search_terms(query):
+        courses = courses.filter(
+            Q(title__icontains=term) | Q(description__icontains=term)
+            | Q(lesson__title__icontains=term) | Q(lesson__content__icontains=term)
+        )
+    return courses.distinct().order_by('-created_at', '-id')
+
+
+def search_courses(query, page=1, page_size=PAGE_SIZE):
+    """
+    صفحة من نتايج البحث مرتبة بالأهمية.
+    بترجع (الكورسات، فيه صفحة بعدها ولا لا).
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+    offset = (page - 1) * page_size
+
+    if not fts_enabled():
+        results = list(like_search(query).select_related('instructor__user')[offset:offset + page_size + 1])
+        return results[:page_size], len(results) > page_size
+
+    # ORDER BY rank بيترتب جوه FTS5، والـ rowid (id الكورس) بيفصل التعادل عشان الصفحات
+    # كلها تبقى من نفس الترتيب من غير تكرار أو نط
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s AND rank MATCH %s "
+            "ORDER BY rank, rowid LIMIT %s OFFSET %s",
+            [fts_query(terms), RANK_FUNCTION, page_size + 1, offset],
+        )
+        ranked_ids = [row[0] for row in cursor.fetchall()]
+
+    has_next = len(ranked_ids) > page_size
+    ranked_ids = ranked_ids[:page_size]
+    courses = catalog_courses().in_bulk(ranked_ids)
+    return [courses[pk] for pk in ranked_ids if pk in courses], has_next
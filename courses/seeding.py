@@ -0,0 +1,302 @@
+# courses/seeding.py
+"""
+بيانات تجريبية للتطوير والـ demo. بتتعمل من الـ management commands بس، مش من أي view.
+
+كل الصفوف بتتعمل بـ bulk_create، وعشان bulk_create مابيبعتش signals بنعمل اللي الـ signals
+كانت هتعمله بإيدنا: عدادات الكورسات، الـ snapshot بتاع الإحصائيات، ومسح كاش الكتالوج.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import search
+from .caching import CATALOG_TAG, tagged_cache
+from .models import (
+    Course, Enrollment, Instructor, Lesson, LessonProgress, Payment, Review, Student, create_profiles,
+    update_course_counters,
+)
+from .progress import rebuild_course_progress
+from .stats import refresh_stats
+
+SAMPLE_COURSES = [
+    {
+        'title': 'Web Development with Django & React',
+        'description': 'Complete course to learn full-stack web development from beginner to advanced level. Build real-world projects and master modern web technologies.',
+        'category': 'Development',
+        'price': 0,
+        'is_paid': False,
+    },
+    {
+        'title': 'Python Programming Mastery',
+        'description': 'Learn Python from basics to advanced topics including OOP, data structures, APIs, and web development with Django.',
+        'category': 'Development',
+        'price': 99,
+        'is_paid': True,
+    },
+    {
+        'title': 'Data Science Fundamentals',
+        'description': 'Master data analysis, machine learning, statistics, and Python for data science. Work with real datasets and build predictive models.',
+        'category': 'Data Science',
+        'price': 149,
+        'is_paid': True,
+    },
+]
+
+SAMPLE_LESSONS = [
+    {'title': 'Introduction to the Course', 'content': 'Welcome and course overview', 'duration': 10},
+    {'title': 'Getting Started', 'content': 'Setup development environment', 'duration': 20},
+    {'title': 'Core Concepts', 'content': 'Learn fundamental concepts and techniques', 'duration': 45},
+    {'title': 'Hands-on Projects', 'content': 'Build real-world applications', 'duration': 60},
+    {'title': 'Advanced Topics', 'content': 'Dive deeper into advanced concepts', 'duration': 40},
+]
+
+
+def sample_instructor():
+    """
+    أول superuser لو موجود، وإلا يوزر admin_instructor
+    """
+    User = get_user_model()
+    user = User.objects.filter(is_superuser=True).first()
+    if user is None:
+        user = User.objects.filter(username='admin_instructor').first() or User.objects.create_user(
+            username='admin_instructor', email='admin@elearn.com', password='admin123', role='instructor',
+        )
+    instructor, _ = Instructor.objects.get_or_create(user=user)
+    return instructor
+
+
+def after_bulk_courses(course_ids, batch_size=500):
+    """
+    اللي الـ signals كانت هتعمله لو الصفوف اتعملت واحد واحد (ما عدا الـ search index)
+    """
+    course_ids = list(course_ids)
+    # على دفعات عشان حد الـ parameters في SQLite
+    for start in range(0, len(course_ids), batch_size):
+        update_course_counters(course_ids[start:start + batch_size], enrollments=True, lessons=True)
+    refresh_stats()
+    tagged_cache.invalidate(CATALOG_TAG)
+
+
+@transaction.atomic
+def create_sample_courses():
+    """
+    الكورسات التجريبية ودروسها (featured عشان تظهر في الرئيسية).
+    الكورس اللي عنوانه موجود مابيتعملش تاني، فالأمر ينفع يتشغل أكتر من مرة.
+    بترجع الكورسات الجديدة بس.
+    """
+    existing = set(Course.objects.filter(
+        title__in=[course['title'] for course in SAMPLE_COURSES]
+    ).values_list('title', flat=True))
+    missing = [course for course in SAMPLE_COURSES if course['title'] not in existing]
+    if not missing:
+        return []
+
+    instructor = sample_instructor()
+    courses = Course.objects.bulk_create(
+        Course(instructor=instructor, is_featured=True, **course) for course in missing
+    )
+    Lesson.objects.bulk_create(
+        Lesson(course=course, order=order, **lesson)
+        for course in courses
+        for order, lesson in enumerate(SAMPLE_LESSONS, 1)
+    )
+    search.index_courses([course.pk for course in courses])
+    after_bulk_courses([course.pk for course in courses])
+    return courses
+
+
+# ========== داتا كبيرة للـ benchmarks ==========
+
+CATEGORY_CHOICES = ['Development', 'Design', 'Business', 'Marketing', 'Data Science', 'Cybersecurity']
+WORDS = (
+    'python django react data machine learning web design security cloud api testing '
+    'marketing business sql linux docker network mobile excel finance analytics'
+).split()
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """
+    auto_now_add بيكتب timezone.now() فوق أي قيمة حتى في bulk_create،
+    فبنقفله مؤقتاً عشان التواريخ تتوزع على فترة (ويبقى ليها معنى في الإحصائيات)
+    """
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+def _insert(model, rows, batch_size):
+    """
+    bulk_create على دفعات من generator من غير ما نحمل كل الصفوف في الميموري، وبترجع العدد
+    """
+    total = 0
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+    return total
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate_dataset(instructors=50, students=2000, courses=200, lessons_per_course=10,
+                     enrollments_per_student=5, completion_ratio=0.5, review_ratio=0.2, paid_ratio=0.4,
+                     days=365, seed=42, prefix='load', batch_size=5000, log=None):
+    """
+    داتا صناعية بالحجم المطلوب: يوزرز ومدربين وطلبة وكورسات ودروس واشتراكات وتقدم وتقييمات ومدفوعات.
+    كل درس بيخلص باحتمال completion_ratio بالترتيب (أول درس مايخلصش الباقي مابيخلصش)،
+    والتواريخ متوزعة على آخر days يوم.
+    نفس الـ seed = نفس الداتا (التواريخ نسبة لوقت التشغيل). كل اليوزرز بيبدأوا بـ prefix،
+    فالـ flush_dataset بيمسحهم من غير ما يلمس الداتا الحقيقية.
+    بترجع عدد الصفوف اللي اتعملت في كل جدول.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    now = timezone.now()
+    counts = {}
+
+    def when():
+        return now - timedelta(seconds=rng.randrange(days * 86400))
+
+    def step(name, total):
+        counts[name] = total
+        log(f"{name}: {total}")
+
+    User = get_user_model()
+    # الـ hashing بطيء عن قصد، فبنحسبه مرة واحدة لكل اليوزرز
+    password = make_password('pass12345')
+
+    with transaction.atomic(), explicit_dates(
+        Course._meta.get_field('created_at'),
+        Enrollment._meta.get_field('enrolled_at'),
+        Review._meta.get_field('created_at'),
+        Payment._meta.get_field('date'),
+    ):
+        users = User.objects.bulk_create(
+            [
+                User(username=f'{prefix}_instructor_{i}', email=f'{prefix}_instructor_{i}@example.com',
+                     password=password, role='instructor', first_name=_sentence(rng, 1))
+                for i in range(instructors)
+            ] + [
+                User(username=f'{prefix}_student_{i}', email=f'{prefix}_student_{i}@example.com',
+                     password=password, role='student', first_name=_sentence(rng, 1))
+                for i in range(students)
+            ],
+            batch_size=batch_size,
+        )
+        step('users', len(users))
+        step('profiles', create_profiles(users, batch_size))
+
+        instructor_rows = Instructor.objects.bulk_create(
+            [
+                Instructor(user=user, bio=_sentence(rng, 12), specialization=rng.choice(CATEGORY_CHOICES))
+                for user in users[:instructors]
+            ],
+            batch_size=batch_size,
+        )
+        student_rows = Student.objects.bulk_create(
+            [Student(user=user) for user in users[instructors:]], batch_size=batch_size,
+        )
+        step('instructors', len(instructor_rows))
+        step('students', len(student_rows))
+
+        course_rows = Course.objects.bulk_create(
+            [
+                Course(
+                    title=f'{_sentence(rng, 3)} {i}',
+                    description=_sentence(rng, 25),
+                    instructor=rng.choice(instructor_rows),
+                    category=rng.choice(CATEGORY_CHOICES),
+                    is_featured=rng.random() < 0.05,
+                    created_at=when(),
+                    **(
+                        {'is_paid': True, 'price': Decimal(rng.randrange(10, 300))}
+                        if rng.random() < paid_ratio else {}
+                    ),
+                )
+                for i in range(courses)
+            ],
+            batch_size=batch_size,
+        )
+        step('courses', len(course_rows))
+
+        lessons = Lesson.objects.bulk_create(
+            [
+                Lesson(course=course, order=order, title=_sentence(rng, 4), content=_sentence(rng, 40),
+                       duration=rng.randrange(5, 60))
+                for course in course_rows
+                for order in range(1, lessons_per_course + 1)
+            ],
+            batch_size=batch_size,
+        )
+        course_lessons = {}
+        for lesson in lessons:
+            course_lessons.setdefault(lesson.course_id, []).append(lesson.pk)
+        step('lessons', len(lessons))
+
+        # الاشتراكات متولدة مرة واحدة كـ (طالب، كورس، تاريخ) والجداول التانية بتتبني منها
+        per_student = min(enrollments_per_student, len(course_rows))
+        enrollments = [
+            (student.pk, course, when())
+            for student in student_rows
+            for course in rng.sample(course_rows, per_student)
+        ]
+        step('enrollments', _insert(Enrollment, (
+            Enrollment(student_id=student_id, course_id=course.pk, enrolled_at=enrolled_at)
+            for student_id, course, enrolled_at in enrollments
+        ), batch_size))
+
+        def progress_rows():
+            for student_id, course, enrolled_at in enrollments:
+                for lesson_id in course_lessons.get(course.pk, []):
+                    if rng.random() >= completion_ratio:
+                        break
+                    yield LessonProgress(
+                        student_id=student_id, lesson_id=lesson_id, completed=True,
+                        completed_at=min(enrolled_at + timedelta(hours=rng.randrange(1, 24 * 30)), now),
+                    )
+
+        step('lesson_progress', _insert(LessonProgress, progress_rows(), batch_size))
+        step('reviews', _insert(Review, (
+            Review(student_id=student_id, course_id=course.pk, rating=rng.randint(1, 5),
+                   comment=_sentence(rng, 10),
+                   created_at=min(enrolled_at + timedelta(days=rng.randrange(1, 60)), now))
+            for student_id, course, enrolled_at in enrollments
+            if rng.random() < review_ratio
+        ), batch_size))
+        step('payments', _insert(Payment, (
+            Payment(student_id=student_id, course_id=course.pk, amount=course.price, status=True,
+                    order_id=f'{prefix}-{seed}-{number}', payment_id=f'pay-{number}', date=enrolled_at)
+            for number, (student_id, course, enrolled_at) in enumerate(enrollments)
+            if course.is_paid
+        ), batch_size))
+
+        after_bulk_courses([course.pk for course in course_rows])
+        step('course_progress', rebuild_course_progress(batch_size=batch_size))
+        search.rebuild_index(batch_size=batch_size)
+    return counts
+
+
+def flush_dataset(prefix='load'):
+    """
+    بيمسح كل يوزرز الداتا الصناعية وكل حاجة مربوطة بيهم (cascade)
+    """
+    User = get_user_model()
+    deleted, _ = User.objects.filter(username__startswith=f'{prefix}_').delete()
+    refresh_stats()
+    tagged_cache.invalidate(CATALOG_TAG)
+    return deleted
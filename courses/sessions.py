@@ -0,0 +1,52 @@
+# courses/sessions.py
+"""
+الـ session backend بيتختار من SESSION_BACKEND في الـ settings:
+    db              كل طلب لليوزر بيقرا django_session، وأي تعديل بيكتب فيها (الافتراضي بتاع Django)
+    cached_db       القراية من الكاش والكتابة في الاتنين - الـ DB بيتقري بس لو الكاش مافيهوش الـ session
+    cache           الكاش بس: مفيش DB خالص، بس الـ sessions بتروح لو الكاش اتمسح أو اتملى
+    signed_cookies  الـ session كلها في cookie متوقعة: مفيش تخزين خالص، بس logout مابيلغيش نسخة قديمة من الـ cookie
+
+clear_expired_sessions بيمسح المنتهي على دفعات بدل DELETE واحد كبير زي clearsessions
+(على SQLite الـ DELETE الكبير بيقفل الداتابيز كلها لحد ما يخلص).
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+BACKENDS = ('db', 'cached_db', 'cache', 'signed_cookies')
+
+
+def session_engine(backend):
+    return f'django.contrib.sessions.backends.{backend}'
+
+
+def stores_in_db(engine=None):
+    """
+    هل الـ engine بيكتب في django_session (db و cached_db) - التانيين مالهمش حاجة تتمسح
+    """
+    store = import_module(engine or settings.SESSION_ENGINE).SessionStore
+    return issubclass(store, DBSessionStore)
+
+
+def clear_expired_sessions(batch_size=1000, pause=0, log=None):
+    """
+    بيمسح الـ sessions المنتهية batch_size في المرة، وبيستنى pause ثانية بين كل دفعة
+    عشان الطلبات اللي شغالة تلحق تكتب. بيرجع عدد اللي اتمسح.
+    """
+    now = timezone.now()
+    total = 0
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:batch_size]
+        )
+        if not keys:
+            return total
+        total += Session.objects.filter(pk__in=keys).delete()[0]
+        if log:
+            log(f"Deleted {total} expired sessions")
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,180 @@
+# courses/stats.py
+"""
+إحصائيات لوحة الأدمن من StatsSnapshot (صف واحد pk=1).
+
+الحساب الكامل بيمر على كل جدول مرة واحدة (3 queries)، والقراية lookup واحد بالـ pk.
+بين كل حساب والتاني الـ signals بتزود وتقلل العدادات بـ UPDATE واحد، والحساب الكامل
+من الـ command (refresh_stats من cron) أو من لوحة الأدمن لو الصف أقدم من STATS_SNAPSHOT_MAX_AGE.
+الصفحة الرئيسية بتقرا بس ومابتحسبش حاجة، إلا أول مرة خالص لو الصف مش موجود.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from .models import Course, Enrollment, Instructor, StatsSnapshot, Student, rows_deleted
+
+SNAPSHOT_ID = 1
+DEFAULT_MAX_AGE = 300
+# طلب واحد بس بيحسب في نفس الوقت (cache.add)، والباقيين بيرجعوا الـ snapshot اللي موجود.
+# على locmem القفل لكل process لوحده، فمع أكتر من worker محتاج كاش مشترك زي Redis
+REFRESH_LOCK_KEY = 'stats-snapshot:refresh-lock'
+REFRESH_LOCK_TIMEOUT = 60
+TREND_DAYS = 14
+
+# زي roles.py: الطالب والمدرب بصف Student أو Instructor (الـ signup و become_instructor
+# مابيغيروش role)، والأدمن بـ role أو is_superuser
+ADMIN_FILTER = Q(role='admin') | Q(is_superuser=True)
+
+
+def max_age():
+    return getattr(settings, 'STATS_SNAPSHOT_MAX_AGE', DEFAULT_MAX_AGE)
+
+
+def compute_stats(now=None):
+    """
+    بتحسب كل الأرقام من الجداول نفسها - query لكل جدول
+    """
+    now = now or timezone.now()
+    User = get_user_model()
+
+    # العلاقات one-to-one، فالـ LEFT JOIN مابيكررش اليوزر والـ Count بيعد الصفوف الموجودة بس
+    values = User.objects.aggregate(
+        total_users=Count('pk'),
+        total_students=Count('student'),
+        total_instructors=Count('instructor'),
+        total_admins=Count('pk', filter=ADMIN_FILTER),
+    )
+    # عدد الاشتراكات جاي من العداد اللي على كل كورس بدل COUNT على جدول Enrollment
+    values.update(Course.objects.aggregate(
+        total_courses=Count('pk'),
+        active_courses=Count('pk', filter=Q(is_active=True)),
+        total_enrollments=Sum('enrollment_count', default=0),
+    ))
+
+    since = (now - timedelta(days=TREND_DAYS - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    per_day = dict(
+        Enrollment.objects.filter(enrolled_at__gte=since)
+        .annotate(day=TruncDate('enrolled_at'))
+        .values('day')
+        .annotate(total=Count('pk'))
+        .values_list('day', 'total')
+    )
+    values['enrollments_by_day'] = {
+        day.isoformat(): per_day.get(day, 0)
+        for day in (since.date() + timedelta(days=offset) for offset in range(TREND_DAYS))
+    }
+    return values
+
+
+def refresh_stats(now=None):
+    now = now or timezone.now()
+    snapshot, _ = StatsSnapshot.objects.update_or_create(
+        pk=SNAPSHOT_ID, defaults={**compute_stats(now), 'computed_at': now}
+    )
+    return snapshot
+
+
+def get_stats(max_age_seconds=None, refresh=True):
+    """
+    الـ snapshot الحالي. refresh=False (الصفحة الرئيسية) بيرجعه حتى لو قديم.
+    لو مش موجود، أو قديم و refresh=True، طلب واحد بس بيحسبه تاني والباقيين بيرجعوا اللي موجود
+    """
+    if max_age_seconds is None:
+        max_age_seconds = max_age()
+    now = timezone.now()
+    snapshot = StatsSnapshot.objects.filter(pk=SNAPSHOT_ID).first()
+    if snapshot is not None and (not refresh or now - snapshot.computed_at <= timedelta(seconds=max_age_seconds)):
+        return snapshot
+    if cache.add(REFRESH_LOCK_KEY, True, REFRESH_LOCK_TIMEOUT):
+        try:
+            return refresh_stats(now)
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+    # حد تاني بيحسب دلوقتي - ولو لسه مفيش صف خالص الأرقام أصفار لحد ما يخلص
+    return snapshot or StatsSnapshot(pk=SNAPSHOT_ID, computed_at=now)
+
+
+def _bump(delta, *fields):
+    # لو الصف مش موجود الـ UPDATE مش بيعمل حاجة، وأول قراية هتحسبه من الأول
+    StatsSnapshot.objects.filter(pk=SNAPSHOT_ID).update(
+        **{field: Greatest(F(field) + delta, 0) for field in fields}
+    )
+
+
+def _user_fields(user):
+    fields = ['total_users']
+    if user.role == 'admin' or user.is_superuser:
+        fields.append('total_admins')
+    return fields
+
+
+def user_created(sender, instance, created, **kwargs):
+    if created:
+        _bump(1, *_user_fields(instance))
+
+
+def user_deleted(sender, instance, **kwargs):
+    _bump(-1, *_user_fields(instance))
+
+
+ROLE_COUNTERS = {Student: 'total_students', Instructor: 'total_instructors'}
+
+
+def role_created(sender, instance, created, **kwargs):
+    if created:
+        _bump(1, ROLE_COUNTERS[sender])
+
+
+def role_deleted(sender, instance, **kwargs):
+    _bump(-1, ROLE_COUNTERS[sender])
+
+
+def course_created(sender, instance, created, **kwargs):
+    if created:
+        _bump(1, 'total_courses', *(['active_courses'] if instance.is_active else []))
+        return
+    # تفعيل أو إيقاف كورس من صفحات التعديل (القيمة القديمة من remember_course_state في models.py)
+    previous = getattr(instance, '_previous_state', None)
+    if previous and previous['is_active'] != instance.is_active:
+        _bump(1 if instance.is_active else -1, 'active_courses')
+
+
+def course_deleted(sender, instance, **kwargs):
+    _bump(-1, 'total_courses', *(['active_courses'] if instance.is_active else []))
+
+
+def enrollment_created(sender, instance, created, **kwargs):
+    if created:
+        _bump(1, 'total_enrollments')
+
+
+def enrollments_added(sender, instance, action, pk_set, **kwargs):
+    # add() على الـ M2M بيعمل bulk_create من غير post_save، والـ pk_set فيه الجديد بس
+    if action == 'post_add' and pk_set:
+        _bump(len(pk_set), 'total_enrollments')
+
+
+def enrollments_deleted(sender, instances, **kwargs):
+    # مرة واحدة لكل عملية مسح (كورس بـ 50 اشتراك = UPDATE واحد)
+    _bump(-len(instances), 'total_enrollments')
+
+
+def connect_signals():
+    User = get_user_model()
+    post_save.connect(user_created, sender=User, dispatch_uid='stats_user_created')
+    post_delete.connect(user_deleted, sender=User, dispatch_uid='stats_user_deleted')
+    for model in ROLE_COUNTERS:
+        name = model._meta.model_name
+        post_save.connect(role_created, sender=model, dispatch_uid=f'stats_{name}_created')
+        post_delete.connect(role_deleted, sender=model, dispatch_uid=f'stats_{name}_deleted')
+    post_save.connect(course_created, sender=Course, dispatch_uid='stats_course_created')
+    post_delete.connect(course_deleted, sender=Course, dispatch_uid='stats_course_deleted')
+    post_save.connect(enrollment_created, sender=Enrollment, dispatch_uid='stats_enrollment_created')
+    m2m_changed.connect(enrollments_added, sender=Enrollment, dispatch_uid='stats_enrollments_added')
+    rows_deleted.connect(enrollments_deleted, sender=Enrollment, dispatch_uid='stats_enrollments_deleted')
@@ -1,23 +1,27 @@
 # courses/templatetags/course_tags.py
 from django import template
-from courses.models import Student
+from courses.middleware import enrolled_course_ids, get_enrolled_course_ids
 
 register = template.Library()
 
-@register.simple_tag
-def is_enrolled(user, course):
+@register.simple_tag(takes_context=True)
+def is_enrolled(context, user, course):
     """
-    فانكشن بسيطة بتشوف هل اليوزر ده طالب ومشترك في الكورس ده ولا لا
+    فانكشن بسيطة بتشوف هل اليوزر ده طالب ومشترك في الكورس ده ولا لا.
+    الاشتراكات بتتحمل مرة واحدة لكل request، فجريد فيه 50 كورس = query واحدة.
     """
     if not user.is_authenticated:
         return False
-    
+
     # لو أدمن أو مدرب، نعتبره مش مشترك (عشان تظهرله زراير التعديل)
-    if hasattr(user, 'userprofile') and user.userprofile.role in ['admin', 'instructor']:
+    if user.is_admin or user.is_instructor:
         return False
 
-    try:
-        student = user.student
-        return student.enrolled_courses.filter(id=course.id).exists()
-    except:
-        return False
\ No newline at end of file
+    request = context.get('request')
+    if request is not None and request.user == user:
+        return course.id in enrolled_course_ids(request)
+    # يوزر تاني غير صاحب الطلب (أو مفيش request) - بنحفظ الـ set على الـ context
+    cache = context.render_context.setdefault('enrolled_course_ids', {})
+    if user.id not in cache:
+        cache[user.id] = get_enrolled_course_ids(user)
+    return course.id in cache[user.id]
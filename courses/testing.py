@@ -0,0 +1,43 @@
+# courses/testing.py
+"""
+أدوات للتستات عشان نقفل عدد الـ queries بتاع الـ views.
+
+QueryAssertionsMixin بيشغل كشف الـ N+1 على كل طلب بيعدي على الـ middleware في التست
+(أي شكل SQL يتكرر repeated_query_threshold مرة = RepeatedQueriesError)، وبيدي
+assertMaxQueries و assertNoRepeatedQueries لأي كود تاني.
+"""
+from contextlib import contextmanager
+
+from django.test.utils import override_settings
+
+from .instrumentation import DEFAULT_DUPLICATE_THRESHOLD, describe_repeated, detect_repeated_queries
+
+
+class QueryAssertionsMixin:
+    repeated_query_threshold = DEFAULT_DUPLICATE_THRESHOLD
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(override_settings(
+            REQUEST_METRICS_SAMPLE_RATE=1,
+            REQUEST_METRICS_REPEATED_QUERIES='raise',
+            REQUEST_METRICS_DUPLICATE_THRESHOLD=cls.repeated_query_threshold,
+        ))
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, threshold=None):
+        with detect_repeated_queries(action=None) as metrics:
+            yield metrics
+        repeated = metrics.duplicates(threshold or self.repeated_query_threshold)
+        if repeated:
+            self.fail(describe_repeated(repeated, 'block'))
+
+    @contextmanager
+    def assertMaxQueries(self, maximum, threshold=None):
+        """
+        عدد الـ queries مايعديش maximum ومفيش N+1
+        """
+        with self.assertNoRepeatedQueries(threshold) as metrics:
+            yield metrics
+        self.assertLessEqual(metrics.queries, maximum, f"{metrics.queries} queries, budget {maximum}")
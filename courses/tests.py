@@ -1,3 +1,1971 @@
-from django.test import TestCase
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin.sites import site
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.template import RequestContext, Template
+from django.test import Client, RequestFactory
+from django.test import TestCase as DjangoTestCase, TransactionTestCase as DjangoTransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from elearning_platform import views as project_views
+
+from . import benchmarks, hashers, instrumentation, search, stats
+from .instrumentation import RepeatedQueriesError, RepeatedQueriesWarning, detect_repeated_queries
+from .middleware import EnrollmentMiddleware, RequestMetricsMiddleware
+from .backends import RoleModelBackend
+from .hashers import ScryptPasswordHasher
+from .caching import CATALOG_TAG, TaggedCache, course_tag, instructor_tag, outline_tag, tagged_cache
+from .outline import get_outline, outline_key
+from .page_cache import page_key
+from .testing import QueryAssertionsMixin
+from .analytics import compute_instructor_analytics, get_instructor_analytics
+from .permissions import instructor_required as permissions_instructor_required
+from .progress import rebuild_course_progress, record_lesson_completion
+from .roles import ANONYMOUS, roles_for, with_roles
+from .sessions import clear_expired_sessions, session_engine
+from .seeding import flush_dataset, generate_dataset
+from .stats import get_stats, refresh_stats
+from .decorators import admin_required, instructor_required, student_required
+from .views import course_detail
+from .models import Course, CourseProgress, CustomUser, Enrollment, Instructor, Lesson, LessonProgress, Payment, Review, StatsSnapshot, Student, UserProfile, create_profiles, update_course_counters
+
+# الـ benchmarks تقيلة، بتشتغل بس لما نطلبها:  RUN_BENCHMARKS=1 python manage.py test courses
+RUN_BENCHMARKS = bool(os.environ.get('RUN_BENCHMARKS'))
+
+
+class CacheIsolationMixin:
+    # الـ rollback بتاع التست مابيمسحش الكاش، وصفحة اتخزنت في تست ممكن تطلع في التاني
+    def run(self, result=None):
+        cache.clear()
+        return super().run(result)
+
+
+# التستات بتعمل يوزرز كتير و login كتير - MD5 هنا بس، والتستات اللي بتختبر الـ hashing بتغيره
+FAST_HASHERS = override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher', *settings.PASSWORD_HASHERS],
+)
+
+
+@FAST_HASHERS
+class TestCase(CacheIsolationMixin, DjangoTestCase):
+    pass
+
+
+@FAST_HASHERS
+class TransactionTestCase(CacheIsolationMixin, DjangoTransactionTestCase):
+    pass
+
+
+def make_instructor(username='teacher'):
+    user = CustomUser.objects.create_user(username=username, password='pass12345', role='instructor')
+    return Instructor.objects.create(user=user, bio='Bio', specialization='Python')
+
+
+def make_student(username='learner'):
+    user = CustomUser.objects.create_user(username=username, password='pass12345', role='student')
+    return Student.objects.create(user=user)
+
+
+def make_courses(instructor, count, **extra):
+    fields = {'description': 'Description', **extra}
+    courses = Course.objects.bulk_create(
+        Course(title=f'Course {i}', instructor=instructor, **fields)
+        for i in range(count)
+    )
+    # bulk_create مابيبعتش post_save، فالكتالوج المتخزن لازم يتمسح بإيدنا
+    tagged_cache.invalidate(CATALOG_TAG)
+    return courses
+
+
+class CourseCountersTests(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.course = Course.objects.create(title='Django', description='Web', instructor=self.instructor)
+        self.student = make_student()
+
+    def test_enroll_and_unenroll_update_enrollment_count(self):
+        self.student.enrolled_courses.add(self.course)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+        # إضافة نفس الكورس مرة تانية ماينفعش تزود العداد
+        self.student.enrolled_courses.add(self.course)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+        self.course.enrolled_students.add(make_student('second'))
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 2)
+
+        self.student.enrolled_courses.remove(self.course)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+        self.course.enrolled_students.clear()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+
+    def test_clear_from_student_side(self):
+        other = Course.objects.create(title='React', description='Web', instructor=self.instructor)
+        self.student.enrolled_courses.add(self.course, other)
+        self.student.enrolled_courses.clear()
+        self.assertEqual(
+            list(Course.objects.order_by('pk').values_list('enrollment_count', flat=True)),
+            [0, 0],
+        )
+
+    def test_lesson_create_update_delete_update_counters(self):
+        first = Lesson.objects.create(course=self.course, title='One', content='...', duration=10)
+        Lesson.objects.create(course=self.course, title='Two', content='...', duration=15)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.lesson_count, self.course.total_duration), (2, 25))
+
+        first.duration = 20
+        first.save()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_duration, 35)
+
+        first.delete()
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.lesson_count, self.course.total_duration), (1, 15))
+        self.assertEqual(self.course.total_lessons, 1)
+
+
+class CascadeDeleteTests(QueryAssertionsMixin, TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.course, self.other = make_courses(self.instructor, 2)
+        Lesson.objects.bulk_create(
+            Lesson(course=self.course, title=f'Lesson {i}', content='...', order=i) for i in range(10)
+        )
+        self.students = [make_student(f'learner{i}') for i in range(20)]
+        Enrollment.objects.bulk_create(
+            Enrollment(student=student, course=course) for student in self.students for course in (self.course, self.other)
+        )
+        update_course_counters([self.course.pk, self.other.pk], enrollments=True, lessons=True)
+        refresh_stats()
+
+    def test_deleting_a_course_does_not_update_counters_per_row(self):
+        with self.assertMaxQueries(20):
+            self.course.delete()
+        snapshot = StatsSnapshot.objects.get()
+        self.assertEqual((snapshot.total_courses, snapshot.total_enrollments), (1, 20))
+
+    def test_bulk_deletes_apply_counters_once(self):
+        with self.assertNoRepeatedQueries():
+            Enrollment.objects.filter(student__in=self.students[:10]).delete()
+        self.assertEqual(
+            list(Course.objects.order_by('pk').values_list('enrollment_count', flat=True)), [10, 10],
+        )
+        self.assertEqual(StatsSnapshot.objects.get().total_enrollments, 20)
+
+        with self.assertNoRepeatedQueries():
+            Lesson.objects.filter(course=self.course, order__lt=5).delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.lesson_count, 5)
+
+    def test_deleting_a_student_updates_each_course_once(self):
+        self.students[0].user.delete()
+        self.assertEqual(
+            list(Course.objects.order_by('pk').values_list('enrollment_count', flat=True)), [19, 19],
+        )
+        self.assertEqual(StatsSnapshot.objects.get().total_enrollments, 38)
+
+
+class EnrollmentStoreTests(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.course = Course.objects.create(title='Django', description='Web', instructor=self.instructor)
+        self.student = make_student()
+
+    def test_m2m_and_enrollment_table_are_the_same_rows(self):
+        self.student.enrolled_courses.add(self.course)
+        enrollment = Enrollment.objects.get()
+        self.assertEqual((enrollment.student, enrollment.course), (self.student, self.course))
+        self.assertIsNotNone(enrollment.enrolled_at)
+
+        Enrollment.objects.create(student=make_student('second'), course=self.course)
+        self.assertEqual(self.course.enrolled_students.count(), 2)
+
+    def test_direct_enrollment_writes_update_the_counter(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+        enrollment.delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 0)
+
+    def test_enroll_course_writes_one_enrollment(self):
+        self.client.force_login(self.student.user)
+        for _ in range(2):
+            self.client.post(reverse('enroll_course', args=[self.course.id]))
+        self.assertEqual(Enrollment.objects.filter(student=self.student, course=self.course).count(), 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+    def test_enrollment_check_is_one_indexed_lookup(self):
+        Enrollment.objects.create(student=self.student, course=self.course)
+        lesson = Lesson.objects.create(course=self.course, title='One', content='...')
+        self.client.force_login(self.student.user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('mark_lesson_complete', args=[lesson.id]), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        lookups = [q['sql'] for q in ctx.captured_queries if 'courses_enrollment' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertNotIn('courses_student_enrolled_courses', ' '.join(q['sql'] for q in ctx.captured_queries))
+
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + lookups[0].replace('%s', '1'))
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('USING COVERING INDEX courses_enrollment_student_id_course_id', plan)
+
+
+class EnrolledTagTests(TestCase):
+    GRID = Template(
+        "{% load course_tags %}{% for course in courses %}"
+        "{% is_enrolled user course as enrolled %}{% if enrolled %}E{% else %}-{% endif %}"
+        "{% endfor %}"
+    )
+
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.courses = make_courses(self.instructor, 50)
+        self.student = make_student()
+        Enrollment.objects.bulk_create(Enrollment(student=self.student, course=course) for course in self.courses[-5:])
+
+    def render_grid(self, user):
+        if user.is_authenticated:
+            # يوزر الطلب بيوصل من RoleModelBackend وأدواره محملة معاه
+            user = with_roles(CustomUser.objects).get(pk=user.pk)
+        request = RequestFactory().get('/')
+        request.user = user
+        EnrollmentMiddleware(lambda request: None)(request)
+        with CaptureQueriesContext(connection) as ctx:
+            html = self.GRID.render(RequestContext(request, {'user': user, 'courses': self.courses}))
+        return html, ctx.captured_queries
+
+    def test_fifty_card_grid_costs_one_enrollment_query(self):
+        html, queries = self.render_grid(self.student.user)
+        self.assertEqual(html, '-' * 45 + 'E' * 5)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('courses_enrollment', queries[0]['sql'])
+
+    def test_instructors_and_anonymous_users_are_never_enrolled(self):
+        html, queries = self.render_grid(self.instructor.user)
+        self.assertEqual((html, queries), ('-' * 50, []))
+        html, queries = self.render_grid(AnonymousUser())
+        self.assertEqual((html, queries), ('-' * 50, []))
+
+    def test_catalog_marks_enrolled_courses(self):
+        self.client.force_login(self.student.user)
+        response = self.client.get(reverse('course_list'))
+        self.assertContains(response, 'Continue Learning', count=5)
+
+
+class RoleResolutionTests(TestCase):
+    def setUp(self):
+        self.student = make_student()
+        self.instructor = make_instructor()
+
+    def session_request(self, user):
+        self.client.force_login(user)
+        request = RequestFactory().get('/')
+        request.session = SessionStore(self.client.session.session_key)
+        return request
+
+    def test_session_user_and_roles_cost_one_query_after_the_session(self):
+        from django.contrib.auth import get_user
+
+        request = self.session_request(self.instructor.user)
+        with self.assertNumQueries(2):
+            user = get_user(request)
+            roles = roles_for(user)
+            self.assertEqual(
+                (user.is_admin, user.is_instructor, user.is_student, roles.instructor_id),
+                (False, True, False, self.instructor.pk),
+            )
+            self.assertTrue(user.user_profile)
+
+    def test_signup_logs_the_new_user_in(self):
+        for account_type in ('student', 'instructor'):
+            self.client.logout()
+            response = self.client.post(reverse('signup'), {
+                'username': f'new_{account_type}', 'email': f'{account_type}@example.com',
+                'password1': 'pass12345', 'password2': 'pass12345', 'account_type': account_type,
+            })
+            self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+            user = CustomUser.objects.get(username=f'new_{account_type}')
+            self.assertEqual(self.client.session['_auth_user_id'], str(user.pk))
+            self.assertEqual(self.client.session['_auth_user_backend'], 'courses.backends.RoleModelBackend')
+            self.assertEqual(getattr(roles_for(user), f'is_{account_type}'), True)
+
+    def test_backend_skips_inactive_users(self):
+        CustomUser.objects.filter(pk=self.student.user.pk).update(is_active=False)
+        self.assertIsNone(RoleModelBackend().get_user(self.student.user.pk))
+
+    def test_instructor_row_wins_over_role_field(self):
+        # become_instructor بيعمل صف Instructor ويسيب role زي ما هو
+        user = self.student.user
+        Instructor.objects.create(user=user, bio='Bio', specialization='Python')
+        self.assertEqual(user.role, 'student')
+        request = RequestFactory().get('/')
+        request.user = with_roles(CustomUser.objects).get(pk=user.pk)
+        view = lambda request: 'ok'
+        self.assertEqual(instructor_required(view)(request), 'ok')
+        self.assertEqual(student_required(view)(request), 'ok')
+        self.assertEqual(admin_required(view)(request).status_code, 403)
+
+    def test_admin_role_or_superuser(self):
+        admin = CustomUser.objects.create_user(username='boss', password='pass12345', role='admin')
+        superuser = CustomUser.objects.create_superuser(username='root', password='pass12345', email='r@x.com')
+        self.assertEqual([roles_for(admin).is_admin, roles_for(superuser).is_admin], [True, True])
+        self.assertIs(roles_for(AnonymousUser()), ANONYMOUS)
+
+    def test_anonymous_users_are_sent_to_login(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        response = permissions_instructor_required(lambda request: 'ok')(request)
+        self.assertEqual((response.status_code, response.url), (302, reverse('login')))
+
+
+class UserProfileSignalTests(TestCase):
+    def profile_queries(self, queries):
+        return [query['sql'] for query in queries if 'courses_userprofile' in query['sql']]
+
+    def test_new_user_gets_a_profile(self):
+        user = CustomUser.objects.create_user(username='fresh', password='pass12345')
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+
+    def test_login_does_not_touch_the_profile(self):
+        make_student()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('login'), {'username': 'learner', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(any('last_login' in query['sql'] for query in ctx.captured_queries))
+        self.assertEqual(self.profile_queries(ctx.captured_queries), [])
+
+    def test_saving_a_user_saves_only_changed_profile_fields(self):
+        user = with_roles(CustomUser.objects).get(pk=make_student().user.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        self.assertEqual(self.profile_queries(ctx.captured_queries), [])
+
+        user.user_profile.phone_number = '0100'
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        [update] = self.profile_queries(ctx.captured_queries)
+        self.assertIn('phone_number', update)
+        self.assertNotIn('address', update)
+        self.assertEqual(UserProfile.objects.get(user=user).phone_number, '0100')
+
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        self.assertEqual(self.profile_queries(ctx.captured_queries), [])
+
+    def test_bulk_created_users_get_profiles_in_bulk(self):
+        users = CustomUser.objects.bulk_create(CustomUser(username=f'bulk{i}') for i in range(30))
+        UserProfile.objects.create(user=users[0])
+        with self.assertNumQueries(2):
+            self.assertEqual(create_profiles(users), 29)
+        self.assertEqual(create_profiles(users), 0)
+        self.assertEqual(UserProfile.objects.filter(user__in=users).count(), 30)
+
+    def test_partial_save_keeps_other_edits_dirty(self):
+        profile = UserProfile.objects.get(user=make_student().user)
+        profile.phone_number = '0100'
+        profile.address = 'Cairo'
+        profile.save(update_fields=['phone_number'])
+        self.assertEqual(profile.changed_fields(), ['address'])
+        profile.save()
+        self.assertEqual(profile.changed_fields(), [])
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).address, 'Cairo')
+
+
+# hashers رخيصة عشان التست يبقى سريع - المهم إن التكلفة مختلفة عن المتخزنة
+TUNED_HASHERS = override_settings(
+    PASSWORD_HASHERS=['courses.hashers.ScryptPasswordHasher', 'courses.hashers.PBKDF2PasswordHasher'],
+    PASSWORD_SCRYPT_WORK_FACTOR=2**11,
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+)
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='learner', password='pass12345')
+
+    def store_hash(self, encoded):
+        CustomUser.objects.filter(pk=self.user.pk).update(password=encoded)
+
+    def login(self, password='pass12345'):
+        self.client.post(reverse('login'), {'username': 'learner', 'password': password})
+        return CustomUser.objects.get(pk=self.user.pk).password
+
+    def test_tests_use_the_fast_hasher(self):
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+    @TUNED_HASHERS
+    def test_login_rehashes_with_the_preferred_hasher(self):
+        self.store_hash(make_password('pass12345', hasher='pbkdf2_sha256'))
+        self.assertTrue(self.login().startswith('scrypt$2048$'))
+
+    @TUNED_HASHERS
+    def test_login_rehashes_when_the_cost_changes(self):
+        self.store_hash(ScryptPasswordHasher(work_factor=2**10).encode('pass12345', 'somesalt'))
+        upgraded = self.login()
+        self.assertTrue(upgraded.startswith('scrypt$2048$'))
+        # الـ hash الجديد بيتقري، والـ login اللي بعده مابيكتبش تاني
+        self.client.logout()
+        self.assertEqual(self.login(), upgraded)
+
+    @TUNED_HASHERS
+    def test_failed_login_keeps_the_old_hash(self):
+        old = make_password('pass12345', hasher='pbkdf2_sha256')
+        self.store_hash(old)
+        self.assertEqual(self.login('wrong'), old)
+
+    def test_scrypt_cost_above_the_openssl_default_memory_limit(self):
+        hasher = ScryptPasswordHasher(work_factor=2**15, block_size=8, parallelism=1)
+        self.assertTrue(hasher.verify('pass12345', hasher.encode('pass12345', hasher.salt())))
+
+
+class SessionBackendTests(TestCase):
+    def setUp(self):
+        self.student = make_student()
+
+    def session_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('my_courses'))
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in ctx.captured_queries if 'django_session' in query['sql']]
+
+    def test_db_is_the_default_without_a_shared_cache(self):
+        # الـ locmem لكل process لوحده - الـ sessions في الكاش بتبقى مشتركة مع redis بس
+        self.assertEqual(settings.CACHE_BACKEND, 'locmem')
+        self.assertEqual(settings.SESSION_ENGINE, session_engine('db'))
+
+    def test_cached_db_skips_the_session_table(self):
+        with override_settings(SESSION_ENGINE=session_engine('cached_db')):
+            self.client.force_login(self.student.user)
+            self.assertEqual(self.session_queries(), [])
+
+    def test_clearing_the_page_cache_keeps_users_logged_in(self):
+        with override_settings(SESSION_ENGINE=session_engine('cache')):
+            self.client.force_login(self.student.user)
+            cache.clear()
+            self.assertEqual(self.session_queries(), [])
+        self.assertFalse(Session.objects.exists())
+
+    def test_signed_cookie_sessions_store_nothing(self):
+        with override_settings(SESSION_ENGINE=session_engine('signed_cookies')):
+            self.client.force_login(self.student.user)
+            self.assertEqual(self.session_queries(), [])
+        self.assertFalse(Session.objects.exists())
+
+    def test_expired_sessions_are_deleted_in_batches(self):
+        past, future = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'old{i}', session_data='', expire_date=past) for i in range(25)]
+            + [Session(session_key=f'live{i}', session_data='', expire_date=future) for i in range(3)]
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(clear_expired_sessions(batch_size=10), 25)
+        self.assertEqual(sum(query['sql'].startswith('DELETE') for query in ctx.captured_queries), 3)
+        self.assertEqual(Session.objects.count(), 3)
+
+    def test_cleanup_command_skips_backends_without_a_table(self):
+        Session.objects.create(session_key='old', session_data='', expire_date=timezone.now() - timedelta(days=1))
+        out = StringIO()
+        with override_settings(SESSION_ENGINE=session_engine('signed_cookies')):
+            call_command('clear_expired_sessions', stdout=out)
+        self.assertIn('does not store sessions', out.getvalue())
+        call_command('clear_expired_sessions', stdout=out)
+        self.assertFalse(Session.objects.exists())
+
+
+class CatalogQueryBudgetTests(TestCase):
+    def catalog_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('course_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_catalog(self):
+        instructor = make_instructor()
+        make_courses(instructor, 10)
+        small = self.catalog_queries()
+
+        make_courses(instructor, 9990)
+        large = self.catalog_queries()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 2)
+
+
+class CatalogPaginationTests(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+
+    def test_cursor_walks_every_course_once(self):
+        make_courses(self.instructor, 30)
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(reverse('course_list'), {'cursor': cursor} if cursor else {})
+            seen += [course.id for course in response.context['courses']]
+            cursor = response.context['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(Course.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_deep_page_costs_the_same_as_first_page(self):
+        make_courses(self.instructor, 500)
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(reverse('course_list'))
+        cursor = response.context['next_cursor']
+        for _ in range(20):
+            response = self.client.get(reverse('course_list'), {'cursor': cursor})
+            cursor = response.context['next_cursor']
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(reverse('course_list'), {'cursor': cursor})
+        self.assertEqual(len(first), len(deep))
+        self.assertNotIn('OFFSET', deep.captured_queries[-1]['sql'])
+
+    def test_filters(self):
+        make_courses(self.instructor, 3, category='Design', is_paid=True, price=10)
+        make_courses(self.instructor, 2, category='Business', is_featured=True)
+        make_courses(self.instructor, 1, is_active=False)
+
+        def matches(**params):
+            return len(self.client.get(reverse('course_list'), params).context['courses'])
+
+        self.assertEqual(matches(category='Design'), 3)
+        self.assertEqual(matches(is_paid='1'), 3)
+        self.assertEqual(matches(is_paid='0'), 3)
+        self.assertEqual(matches(is_featured='1'), 2)
+        self.assertEqual(matches(is_active='0'), 1)
+        self.assertEqual(matches(category='Business', is_featured='1'), 2)
+        # قيمة مش معروفة بتتجاهل
+        self.assertEqual(matches(category='Nope'), 6)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        make_courses(self.instructor, 3)
+        response = self.client.get(reverse('course_list'), {'cursor': 'garbage!'})
+        self.assertEqual(len(response.context['courses']), 3)
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        instructor = make_instructor()
+        self.django = Course.objects.create(title='Django for beginners', description='Build web apps', instructor=instructor)
+        self.react = Course.objects.create(title='Frontend basics', description='Components and hooks', instructor=instructor)
+        self.lesson = Lesson.objects.create(course=self.react, title='Routing', content='Talking to a Django API')
+
+    def results(self, query, page=1):
+        return [course.id for course in search.search_courses(query, page)[0]]
+
+    def test_title_match_ranks_above_lesson_match(self):
+        self.assertEqual(self.results('django'), [self.django.id, self.react.id])
+
+    def test_prefix_and_all_terms(self):
+        self.assertEqual(self.results('compon hook'), [self.react.id])
+        # الكلمات ممكن تيجي من الكورس ومن دروسه (زي LIKE)، بس لازم كلها تبقى في نفس الكورس
+        self.assertEqual(self.results('django hooks'), [self.react.id])
+        self.assertEqual(self.results('django kotlin'), [])
+
+    def test_index_follows_lesson_and_course_changes(self):
+        self.lesson.content = 'Talking to a Rails API'
+        self.lesson.save()
+        self.assertEqual(self.results('django'), [self.django.id])
+        self.assertEqual(self.results('rails'), [self.react.id])
+
+        self.lesson.delete()
+        self.assertEqual(self.results('rails'), [])
+
+        self.django.title = 'Flask for beginners'
+        self.django.save()
+        self.assertEqual(self.results('flask'), [self.django.id])
+
+        self.django.delete()
+        self.assertEqual(self.results('flask'), [])
+
+    def test_rebuild_picks_up_bulk_created_rows(self):
+        Course.objects.bulk_create([Course(title='Kotlin', description='Android', instructor=self.django.instructor)])
+        self.assertEqual(self.results('kotlin'), [])
+        search.rebuild_index()
+        self.assertEqual(len(self.results('kotlin')), 1)
+
+    def test_pagination(self):
+        make_courses(self.django.instructor, search.PAGE_SIZE + 3, description='pagination sample')
+        search.rebuild_index()
+        first, has_next = search.search_courses('pagination', 1)
+        second, has_more = search.search_courses('pagination', 2)
+        self.assertEqual((len(first), has_next), (search.PAGE_SIZE, True))
+        self.assertEqual((len(second), has_more), (3, False))
+
+    def test_pages_follow_one_ranking(self):
+        # الأقدم هو أحسن نتيجة (الكلمة في العنوان)، والباقي متعادلين في الوصف
+        best = Course.objects.create(title='Window design', description='Old course', instructor=self.django.instructor)
+        others = make_courses(self.django.instructor, 5, description='window sample')
+        search.rebuild_index()
+        pages = [search.search_courses('window', page, page_size=2) for page in (1, 2, 3)]
+        ids = [course.id for courses, _ in pages for course in courses]
+        self.assertEqual(ids, [best.id] + [course.id for course in others])
+        self.assertEqual([has_next for _, has_next in pages], [True, True, False])
+
+    def test_search_view_and_junk_input(self):
+        response = self.client.get(reverse('course_search'), {'q': 'django'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Django for beginners')
+
+        response = self.client.get(reverse('course_search'), {'q': '"* OR (', 'page': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['courses']), [])
+
+    def test_admin_search_uses_index(self):
+        request = RequestFactory().get('/')
+        queryset, may_have_duplicates = site._registry[Course].get_search_results(
+            request, Course.objects.all(), 'hooks'
+        )
+        self.assertEqual(list(queryset), [self.react])
+        self.assertFalse(may_have_duplicates)
+
+
+class CourseDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title='Django', description='Web', instructor=make_instructor())
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=f'Lesson {i}', content='...', order=i)
+            for i in range(1, 6)
+        ]
+        self.student = make_student()
+        self.student.enrolled_courses.add(self.course)
+        LessonProgress.objects.create(student=self.student, lesson=self.lessons[0], completed=True)
+
+    def detail_queries(self, user):
+        request = RequestFactory().get(reverse('course_detail', args=[self.course.id]))
+        request.user = user
+        # الـ navbar في base.html بيسأل عن user.instructor - ده مش جزء من الصفحة نفسها
+        hasattr(user, 'instructor')
+        with CaptureQueriesContext(connection) as ctx:
+            response = course_detail(request, self.course.id)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_enrolled_student_costs_two_queries(self):
+        user = CustomUser.objects.get(pk=self.student.user_id)
+        get_outline(self.course.id)
+        response, queries = self.detail_queries(user)
+        self.assertEqual(queries, 2)
+        self.assertContains(response, '</i>Completed\n', count=1)
+        self.assertContains(response, '</i>Mark Complete', count=4)
+
+    def test_outline_is_cached_and_invalidated(self):
+        with CaptureQueriesContext(connection) as ctx:
+            get_outline(self.course.id)
+            get_outline(self.course.id)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        self.lessons[1].title = 'Renamed'
+        self.lessons[1].save()
+        self.assertEqual(get_outline(self.course.id)[1]['title'], 'Renamed')
+
+        self.lessons[4].delete()
+        self.assertEqual(len(get_outline(self.course.id)), 4)
+
+        Lesson.objects.create(course=self.course, title='Extra', content='...', order=0)
+        self.assertEqual(get_outline(self.course.id)[0]['title'], 'Extra')
+
+    def test_anonymous_and_not_enrolled(self):
+        response = self.client.get(reverse('course_detail', args=[self.course.id]))
+        self.assertFalse(response.context['is_enrolled'])
+        self.assertContains(response, 'Please')
+
+        other = make_student('other')
+        self.client.force_login(other.user)
+        response = self.client.get(reverse('course_detail', args=[self.course.id]))
+        self.assertFalse(response.context['is_enrolled'])
+        self.assertEqual(response.context['completed_lessons'], set())
+
+
+class StudentProgressTests(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.student = make_student()
+
+    def enroll_in_course(self, title, lessons, completed):
+        course = Course.objects.create(title=title, description='...', instructor=self.instructor)
+        course_lessons = [
+            Lesson.objects.create(course=course, title=f'{title} {i}', content='...', order=i)
+            for i in range(lessons)
+        ]
+        self.student.enrolled_courses.add(course)
+        for lesson in course_lessons[:completed]:
+            record_lesson_completion(self.student, lesson)
+        return course
+
+    def test_progress_for_all_courses_in_one_query(self):
+        self.enroll_in_course('A', lessons=4, completed=1)
+        self.enroll_in_course('B', lessons=2, completed=2)
+        self.enroll_in_course('C', lessons=0, completed=0)
+        # تقدم طالب تاني ماينفعش يدخل في الحساب
+        record_lesson_completion(make_student('other'), Lesson.objects.get(title='A 3'))
+
+        with self.assertNumQueries(1):
+            courses = self.student.get_courses_progress()
+            rows = [(c.title, c.completed_lessons, c.progress, c.instructor.user.username) for c in courses]
+        self.assertEqual(rows, [('A', 1, 25, 'teacher'), ('B', 2, 100, 'teacher'), ('C', 0, 0, 'teacher')])
+
+    def test_query_count_independent_of_course_count(self):
+        self.client.force_login(self.student.user)
+        self.enroll_in_course('first', lessons=3, completed=1)
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(reverse('my_progress'))
+        self.assertEqual(response.json()['courses'][0]['progress'], 33)
+
+        for i in range(10):
+            self.enroll_in_course(f'more {i}', lessons=3, completed=2)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse('my_progress'))
+        self.assertEqual(len(response.json()['courses']), 11)
+        self.assertEqual(len(few), len(many))
+
+        with CaptureQueriesContext(connection) as page:
+            response = self.client.get(reverse('my_courses'))
+        self.assertContains(response, 'style="width: 66%;"', count=10)
+        self.assertLessEqual(len(page), len(many) + 1)
+
+
+class CourseProgressSummaryTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title='Django', description='Web', instructor=make_instructor())
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=f'Lesson {i}', content='...', order=i)
+            for i in range(4)
+        ]
+        self.student = make_student()
+        self.student.enrolled_courses.add(self.course)
+
+    def summary(self):
+        return CourseProgress.objects.get(student=self.student, course=self.course)
+
+    def test_completion_updates_summary(self):
+        record_lesson_completion(self.student, self.lessons[0])
+        record_lesson_completion(self.student, self.lessons[0])
+        summary = self.summary()
+        self.assertEqual((summary.completed_count, summary.percentage), (1, 25))
+        self.assertIsNotNone(summary.last_activity)
+        self.assertIsNone(summary.completed_at)
+        self.assertIsNotNone(LessonProgress.objects.get(lesson=self.lessons[0]).completed_at)
+
+        for lesson in self.lessons[1:]:
+            record_lesson_completion(self.student, lesson)
+        summary = self.summary()
+        self.assertEqual((summary.completed_count, summary.percentage), (4, 100))
+        self.assertIsNotNone(summary.completed_at)
+        self.assertEqual(self.student.get_course_progress(self.course), 100)
+        self.assertEqual(self.student.get_completed_lessons_count(self.course), 4)
+
+    def test_lesson_added_or_removed_refreshes_summary(self):
+        for lesson in self.lessons:
+            record_lesson_completion(self.student, lesson)
+
+        Lesson.objects.create(course=self.course, title='Bonus', content='...', order=9)
+        summary = self.summary()
+        self.assertEqual((summary.completed_count, summary.percentage), (4, 80))
+        self.assertIsNone(summary.completed_at)
+
+        self.lessons[0].delete()
+        summary = self.summary()
+        self.assertEqual((summary.completed_count, summary.percentage), (3, 75))
+
+    def test_rebuild_from_lesson_progress(self):
+        record_lesson_completion(self.student, self.lessons[0])
+        # صفوف اتكتبت من غير ما الملخص يتحدث (import مثلاً)
+        LessonProgress.objects.bulk_create([
+            LessonProgress(student=self.student, lesson=lesson, completed=True) for lesson in self.lessons[1:3]
+        ])
+        CourseProgress.objects.update(completed_count=0, percentage=0)
+
+        self.assertEqual(rebuild_course_progress(batch_size=1), 1)
+        summary = self.summary()
+        self.assertEqual((summary.completed_count, summary.percentage), (3, 75))
+
+    def test_course_detail_reads_summary(self):
+        record_lesson_completion(self.student, self.lessons[0])
+        self.client.force_login(self.student.user)
+        response = self.client.get(reverse('course_detail', args=[self.course.id]))
+        self.assertEqual(response.context['progress_percentage'], 25)
+        self.assertEqual(response.context['completed_count'], 1)
+
+
+class MarkLessonCompleteTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title='Django', description='Web', instructor=make_instructor())
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=f'Lesson {i}', content='...', order=i)
+            for i in range(4)
+        ]
+        self.student = make_student()
+        self.student.enrolled_courses.add(self.course)
+        self.client.force_login(self.student.user)
+
+    def mark(self, lesson, **headers):
+        return self.client.post(reverse('mark_lesson_complete', args=[lesson.id]), **headers)
+
+    def test_json_variant(self):
+        response = self.mark(self.lessons[0], HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json(), {
+            'lesson_id': self.lessons[0].id, 'completed': True, 'completed_count': 1, 'progress': 25,
+        })
+        response = self.mark(self.lessons[0], HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['completed_count'], 1)
+
+    def test_redirect_variant_and_not_enrolled(self):
+        response = self.mark(self.lessons[1])
+        self.assertRedirects(response, reverse('course_detail', args=[self.course.id]))
+        progress = LessonProgress.objects.get(student=self.student, lesson=self.lessons[1])
+        self.assertTrue(progress.completed)
+        self.assertIsNotNone(progress.completed_at)
+
+        self.client.force_login(make_student('outsider').user)
+        response = self.mark(self.lessons[1], HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(LessonProgress.objects.count(), 1)
+
+    def test_write_path_query_budget(self):
+        record_lesson_completion(self.student, self.lessons[0])
+        with CaptureQueriesContext(connection) as ctx:
+            summary = record_lesson_completion(self.student, self.lessons[2])
+        writes = [q['sql'] for q in ctx.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        # upsert للدرس و upsert للملخص بيرجع الأرقام الجديدة، من غير UPDATE ولا SELECT بعدهم
+        self.assertEqual(len(writes), 2)
+        self.assertTrue(all('ON CONFLICT' in sql for sql in writes))
+        self.assertEqual(summary, {'completed_count': 2, 'percentage': 50})
+
+    def test_get_is_not_allowed(self):
+        response = self.client.get(reverse('mark_lesson_complete', args=[self.lessons[0].id]))
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(LessonProgress.objects.exists())
+
+
+class ConcurrentCompletionTests(TransactionTestCase):
+    THREADS = 16
+
+    def test_many_threads_marking_the_same_lesson(self):
+        course = Course.objects.create(title='Django', description='Web', instructor=make_instructor())
+        lesson = Lesson.objects.create(course=course, title='Only lesson', content='...')
+        student = make_student()
+        student.enrolled_courses.add(course)
+
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            try:
+                barrier.wait()
+                record_lesson_completion(student, lesson)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(LessonProgress.objects.filter(student=student, lesson=lesson).count(), 1)
+        summary = CourseProgress.objects.get(student=student, course=course)
+        self.assertEqual((summary.completed_count, summary.percentage), (1, 100))
+
+
+# الطلبات هنا بتستنى الـ lock بالقصد، فمن غير كده كل واحد بيتسجل slow request في الـ console
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+class ConcurrentWritesTests(TransactionTestCase):
+    """
+    طلبات بتكتب من threads كتير على نفس ملف SQLite في نفس اللحظة - WAL و BEGIN IMMEDIATE
+    و busy_timeout (DATABASES في الـ settings) بيخلوها تستنى دورها بدل "database is locked"
+    """
+    THREADS = 12
+    LESSONS = 5
+
+    def setUp(self):
+        # journal_mode بيتحفظ في ملف الداتابيز، فكل connections الـ threads هتبقى WAL حتى مع SQLITE_WAL=0
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                self.assertEqual(cursor.execute('PRAGMA journal_mode=WAL').fetchone()[0], 'wal')
+
+    def test_enrollments_and_completions_from_many_threads(self):
+        course = make_courses(make_instructor(), 1)[0]
+        lessons = Lesson.objects.bulk_create(
+            Lesson(course=course, title=f'Lesson {i}', content='...', order=i) for i in range(self.LESSONS)
+        )
+        update_course_counters([course.pk], lessons=True)
+        clients = []
+        for i in range(self.THREADS):
+            client = Client()
+            client.force_login(make_student(f'learner{i}').user)
+            clients.append(client)
+
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(client):
+            try:
+                barrier.wait()
+                for _ in range(2):
+                    response = client.post(reverse('enroll_course', args=[course.pk]))
+                    self.assertEqual(response.status_code, 302)
+                    for lesson in lessons:
+                        response = client.post(
+                            reverse('mark_lesson_complete', args=[lesson.pk]), HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+                        )
+                        self.assertEqual(response.status_code, 200)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=[client]) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        course.refresh_from_db()
+        self.assertEqual(course.enrollment_count, self.THREADS)
+        self.assertEqual(LessonProgress.objects.filter(lesson__course=course).count(), self.THREADS * self.LESSONS)
+        self.assertEqual(
+            list(CourseProgress.objects.filter(course=course).values_list('percentage', flat=True).distinct()), [100],
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite connection settings')
+class SQLiteSettingsTests(TestCase):
+    def test_connections_use_busy_timeout_and_immediate_transactions(self):
+        with connection.cursor() as cursor:
+            journal_mode, busy_timeout = [
+                cursor.execute(f'PRAGMA {name}').fetchone()[0] for name in ('journal_mode', 'busy_timeout')
+            ]
+        self.assertEqual(busy_timeout, settings.DATABASES['default']['OPTIONS']['timeout'] * 1000)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertEqual(journal_mode == 'wal', settings.SQLITE_WAL)
+
+
+class HomePageTests(TestCase):
+    def test_home_is_read_only_and_shows_featured_courses(self):
+        instructor = make_instructor()
+        make_courses(instructor, 2, is_featured=True)
+        make_courses(instructor, 5)
+        make_courses(instructor, 1, is_featured=True, is_active=False)
+        refresh_stats()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in ctx.captured_queries))
+        self.assertEqual(len(response.context['featured_courses']), 2)
+        self.assertTrue(all(course.is_featured and course.is_active for course in response.context['featured_courses']))
+        self.assertEqual(response.context['total_courses'], 7)
+        self.assertEqual(response.context['total_instructors'], 1)
+
+    def test_missing_snapshot_is_computed_once_and_a_stale_one_is_served(self):
+        self.client.post(reverse('signup'), {
+            'username': 'new_teacher', 'email': 't@example.com',
+            'password1': 'pass12345', 'password2': 'pass12345', 'account_type': 'instructor',
+        })
+        self.client.logout()
+        StatsSnapshot.objects.all().delete()
+        self.assertEqual(self.client.get(reverse('home')).context['total_instructors'], 1)
+
+        stale = timezone.now() - timedelta(days=1)
+        StatsSnapshot.objects.update(total_instructors=0, computed_at=stale)
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['total_instructors'], 0)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in ctx.captured_queries))
+        self.assertEqual(StatsSnapshot.objects.get().computed_at, stale)
+
+    def test_empty_database_is_not_seeded_by_the_home_page(self):
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Course.objects.exists())
+        self.assertEqual(response.context['total_courses'], 0)
+
+
+class SeedSampleCoursesTests(TestCase):
+    def test_seed_creates_courses_with_counters_once(self):
+        call_command('seed_sample_courses', stdout=StringIO())
+        self.assertEqual(Course.objects.filter(is_featured=True).count(), 3)
+        self.assertEqual(Lesson.objects.count(), 15)
+        for course in Course.objects.all():
+            self.assertEqual(course.lesson_count, 5)
+            self.assertEqual(course.total_duration, 175)
+        self.assertEqual(get_stats().total_courses, 3)
+
+        call_command('seed_sample_courses', stdout=StringIO())
+        self.assertEqual(Course.objects.count(), 3)
+        self.assertEqual(len(self.client.get(reverse('home')).context['featured_courses']), 3)
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self, **options):
+        return generate_dataset(instructors=3, students=30, courses=8, lessons_per_course=4,
+                                enrollments_per_student=3, batch_size=7, **options)
+
+    def snapshot(self):
+        return (
+            list(Course.objects.order_by('title').values_list('title', 'category', 'price', 'lesson_count')),
+            list(Review.objects.order_by('student__user__username', 'course__title')
+                 .values_list('student__user__username', 'course__title', 'rating')),
+            LessonProgress.objects.count(),
+        )
+
+    def test_counts_and_denormalized_counters_match_the_rows(self):
+        counts = self.generate()
+        self.assertEqual(counts['users'], CustomUser.objects.count())
+        self.assertEqual(counts['enrollments'], 90)
+        self.assertEqual(counts['lesson_progress'], LessonProgress.objects.count())
+        self.assertEqual(counts['payments'], Payment.objects.count())
+        self.assertEqual(CourseProgress.objects.count(), counts['course_progress'])
+        for course in Course.objects.all():
+            self.assertEqual(course.enrollment_count, Enrollment.objects.filter(course=course).count())
+            self.assertEqual(course.lesson_count, 4)
+        self.assertEqual(get_stats().total_enrollments, 90)
+        # bulk_create مابيبعتش signals، فالـ index لازم يكون اتبنى
+        course = Course.objects.first()
+        self.assertIn(course, Course.objects.filter(pk__in=search.matching_course_ids(course.title)))
+
+    def test_same_seed_gives_the_same_data(self):
+        self.generate(seed=7)
+        first = self.snapshot()
+        flush_dataset()
+        self.assertFalse(CustomUser.objects.filter(username__startswith='load_').exists())
+        self.assertFalse(Course.objects.exists())
+
+        self.generate(seed=7)
+        self.assertEqual(self.snapshot(), first)
+        flush_dataset()
+        self.generate(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+
+class StatsSnapshotTests(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.courses = make_courses(self.instructor, 3)
+        self.student = make_student()
+        self.student.enrolled_courses.add(*self.courses[:2])
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin')
+
+    def test_refresh_counts_everything(self):
+        snapshot = refresh_stats()
+        self.assertEqual(
+            (snapshot.total_users, snapshot.total_students, snapshot.total_instructors, snapshot.total_admins),
+            (3, 1, 1, 1),
+        )
+        self.assertEqual((snapshot.total_courses, snapshot.active_courses, snapshot.total_enrollments), (3, 3, 2))
+        self.assertEqual(len(snapshot.enrollments_by_day), 14)
+        self.assertEqual(snapshot.enrollments_by_day[timezone.now().date().isoformat()], 2)
+
+    def test_signals_keep_counters_current_between_refreshes(self):
+        refresh_stats()
+        Course.objects.create(title='New', description='...', instructor=self.instructor)
+        self.student.enrolled_courses.add(self.courses[2])
+        Enrollment.objects.filter(course=self.courses[0]).delete()
+        make_student('second')
+
+        snapshot = StatsSnapshot.objects.get()
+        self.assertEqual((snapshot.total_courses, snapshot.total_enrollments), (4, 2))
+        self.assertEqual((snapshot.total_users, snapshot.total_students), (4, 2))
+
+    def test_activating_and_deactivating_courses_moves_the_active_counter(self):
+        refresh_stats()
+        course = self.courses[0]
+        course.is_active = False
+        course.save()
+        course.title = 'Renamed'
+        course.save()
+        self.assertEqual(StatsSnapshot.objects.values_list('active_courses', flat=True).get(), 2)
+        course.is_active = True
+        course.save()
+        self.assertEqual(StatsSnapshot.objects.values_list('active_courses', flat=True).get(), 3)
+
+    def test_roles_are_counted_by_their_rows_not_the_role_field(self):
+        refresh_stats()
+        # الـ signup مابيحطش role، و become_instructor بيعمل صف Instructor بس
+        self.client.post(reverse('signup'), {
+            'username': 'new_teacher', 'email': 't@example.com',
+            'password1': 'pass12345', 'password2': 'pass12345', 'account_type': 'instructor',
+        })
+        Instructor.objects.create(user=self.student.user, bio='Bio', specialization='Python')
+        counters = ('total_users', 'total_students', 'total_instructors', 'total_admins')
+        snapshot = StatsSnapshot.objects.values_list(*counters).get()
+        self.assertEqual(snapshot, (4, 1, 3, 1))
+        self.assertEqual(StatsSnapshot.objects.values_list(*counters).get(), tuple(
+            getattr(refresh_stats(), counter) for counter in counters
+        ))
+        self.student.delete()
+        self.assertEqual(StatsSnapshot.objects.values_list('total_students', 'total_instructors').get(), (0, 3))
+
+    def test_stale_snapshot_is_recomputed_on_read(self):
+        refresh_stats()
+        StatsSnapshot.objects.update(total_courses=0, computed_at=timezone.now() - timedelta(seconds=120))
+        with self.settings(STATS_SNAPSHOT_MAX_AGE=600):
+            self.assertEqual(get_stats().total_courses, 0)
+        with self.settings(STATS_SNAPSHOT_MAX_AGE=60):
+            self.assertEqual(get_stats().total_courses, 3)
+
+    def test_only_one_request_recomputes_a_stale_snapshot(self):
+        refresh_stats()
+        StatsSnapshot.objects.update(total_courses=0, computed_at=timezone.now() - timedelta(days=1))
+        # طلب تاني ماسك القفل: اللي بعده بيرجع القديم من غير COUNT ولا كتابة
+        cache.add(stats.REFRESH_LOCK_KEY, True)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_stats().total_courses, 0)
+        cache.delete(stats.REFRESH_LOCK_KEY)
+        self.assertEqual(get_stats().total_courses, 3)
+        self.assertIsNone(cache.get(stats.REFRESH_LOCK_KEY))
+
+    def test_dashboard_reads_the_snapshot_without_counting(self):
+        refresh_stats()
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.context['total_enrollments'], 2)
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql']])
+        self.assertEqual(len([q for q in ctx.captured_queries if 'courses_statssnapshot' in q['sql']]), 1)
+
+
+class AdminListTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin')
+        self.client.force_login(self.admin)
+        self.instructor = make_instructor()
+        self.courses = make_courses(self.instructor, 3)
+
+    def add_students(self, count, start=0):
+        students = [make_student(f'student{start + i:03d}') for i in range(count)]
+        for i, student in enumerate(students):
+            student.enrolled_courses.add(*self.courses[:i % 4])
+        return students
+
+    def list_queries(self, name, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(name), params)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_students(3)
+        make_instructor('teacher2')
+        _, few_students = self.list_queries('admin_students')
+        _, few_instructors = self.list_queries('admin_instructors')
+
+        self.add_students(30, start=3)
+        for i in range(10):
+            make_instructor(f'teacher{i + 3}')
+        response, many_students = self.list_queries('admin_students')
+        self.assertEqual(few_students, many_students)
+        self.assertEqual(len(response.context['rows']), 25)
+        # من غير COUNT: صف زيادة بيقول فيه صفحة بعدها
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertEqual(few_instructors, self.list_queries('admin_instructors')[1])
+
+    def test_cursor_pages_cover_every_row_once(self):
+        students = self.add_students(30)
+        # last_login فيه NULL وقيم متكررة - الحد بين الصفحات لازم يفضل ثابت
+        when = timezone.now()
+        CustomUser.objects.filter(pk__in=[s.user_id for s in students[:5]]).update(last_login=when)
+        for sort in ('last_login', '-last_login', '-courses', 'username'):
+            seen, cursor = [], None
+            while True:
+                params = {'sort': sort, **({'cursor': cursor} if cursor else {})}
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(reverse('admin_students'), params)
+                self.assertFalse([q['sql'] for q in ctx.captured_queries if 'COUNT(*)' in q['sql']])
+                seen += [student.pk for student in response.context['rows']]
+                cursor = response.context['next_cursor']
+                if not cursor:
+                    break
+            self.assertEqual(sorted(seen), sorted(s.pk for s in students), sort)
+            self.assertEqual(len(seen), len(set(seen)), sort)
+
+        response = self.client.get(reverse('admin_students'), {'cursor': 'garbage'})
+        self.assertTrue(response.context['is_first_page'])
+        self.assertEqual(len(response.context['rows']), 25)
+
+    def test_project_dashboard_is_for_superusers_only(self):
+        # role='admin' بيكفي لـ dashboard بتاع courses، بس اللي في elearning_platform للـ superuser بس
+        request = RequestFactory().get('/admin-dashboard/')
+        request.user = self.admin
+        self.assertEqual(project_views.admin_dashboard(request).status_code, 302)
+        request.user = CustomUser.objects.create_superuser(username='root', password='pass')
+        self.assertEqual(project_views.admin_dashboard(request).status_code, 200)
+
+    def test_sort_by_count_and_search(self):
+        self.add_students(8)
+        response, _ = self.list_queries('admin_students', sort='-courses')
+        counts = [student.enrolled_courses_count for student in response.context['rows']]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(counts[0], 3)
+
+        response, _ = self.list_queries('admin_students', q='student005')
+        self.assertEqual([s.user.username for s in response.context['rows']], ['student005'])
+        self.assertContains(response, '@student005')
+
+        # عمود مش معروف بيرجع للترتيب الافتراضي
+        response, _ = self.list_queries('admin_students', sort='password')
+        self.assertEqual(response.context['sort'], '-joined')
+
+    def test_instructor_counts(self):
+        self.add_students(8)
+        response, _ = self.list_queries('admin_instructors', sort='-students')
+        instructor = response.context['rows'][0]
+        self.assertEqual((instructor.courses_count, instructor.total_students_count), (3, 6))
+
+
+class InstructorAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = make_instructor()
+        self.courses = make_courses(self.instructor, 3, is_paid=True, price=50)
+        Lesson.objects.create(course=self.courses[0], title='Only lesson', content='...')
+        self.students = [make_student(f'student{i}') for i in range(3)]
+        self.students[0].enrolled_courses.add(*self.courses[:2])
+        self.students[1].enrolled_courses.add(self.courses[0])
+        record_lesson_completion(self.students[0], Lesson.objects.get())
+        Review.objects.create(course=self.courses[0], student=self.students[0], rating=5)
+        Review.objects.create(course=self.courses[0], student=self.students[1], rating=4)
+        Payment.objects.create(course=self.courses[0], student=self.students[0], order_id='A1', amount=50, status=True)
+        Payment.objects.create(course=self.courses[0], student=self.students[1], order_id='A2', amount=50)
+
+    def test_metrics(self):
+        analytics = compute_instructor_analytics(self.instructor.id)
+        stats = analytics['stats']
+        self.assertEqual((stats['total_courses'], stats['total_students'], stats['total_enrollments']), (3, 2, 3))
+        self.assertEqual((stats['average_rating'], stats['review_count']), (4.5, 2))
+        self.assertEqual(stats['revenue'], 50)
+        self.assertEqual(stats['completion_rate'], 33)
+        self.assertEqual(stats['enrollments_by_month'][-1], (timezone.now().strftime('%Y-%m'), 3))
+        self.assertEqual(len(stats['enrollments_by_month']), 12)
+
+        first = next(course for course in analytics['courses'] if course['id'] == self.courses[0].id)
+        self.assertEqual((first['enrollment_count'], first['completion_rate'], first['average_rating']), (2, 50, 4.5))
+        self.assertEqual(self.instructor.total_students, 2)
+
+    def test_query_count_does_not_depend_on_course_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            compute_instructor_analytics(self.instructor.id)
+        make_courses(self.instructor, 20)
+        with CaptureQueriesContext(connection) as more:
+            compute_instructor_analytics(self.instructor.id)
+        self.assertEqual(len(ctx.captured_queries), len(more.captured_queries))
+
+    def test_public_profile_is_served_from_cache(self):
+        url = reverse('instructor_profile', args=[self.instructor.id])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertContains(response, self.courses[0].title)
+        self.assertEqual(self.client.get(reverse('instructor_profile', args=[9999])).status_code, 404)
+
+    def test_signals_invalidate_the_cache(self):
+        get_instructor_analytics(self.instructor.id)
+        self.students[2].enrolled_courses.add(self.courses[2])
+        self.assertEqual(get_instructor_analytics(self.instructor.id)['stats']['total_students'], 3)
+
+        Review.objects.create(course=self.courses[1], student=self.students[0], rating=3)
+        self.assertEqual(get_instructor_analytics(self.instructor.id)['stats']['review_count'], 3)
+
+        payment = Payment.objects.get(order_id='A2')
+        payment.status = True
+        payment.save()
+        self.assertEqual(get_instructor_analytics(self.instructor.id)['stats']['revenue'], 100)
+
+        self.instructor.bio = 'New bio'
+        self.instructor.save()
+        self.assertEqual(get_instructor_analytics(self.instructor.id)['instructor']['bio'], 'New bio')
+
+    def test_dashboard(self):
+        self.client.force_login(self.instructor.user)
+        response = self.client.get(reverse('instructor_dashboard'))
+        self.assertEqual(response.context['total_students'], 2)
+        self.assertContains(response, '$50')
+
+
+class TaggedCacheTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.backends = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tagged-tests'},
+            'files': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': self.tmpdir},
+        }
+
+    def each_backend(self):
+        for alias in self.backends:
+            with self.subTest(backend=alias), self.settings(CACHES=self.backends):
+                caches[alias].clear()
+                yield TaggedCache(alias)
+
+    def test_invalidating_a_tag_drops_only_its_entries(self):
+        for tagged in self.each_backend():
+            tagged.set('outline:1', ['a'], tags=['course:1'])
+            tagged.set('outline:2', ['b'], tags=['course:2'])
+            tagged.set('list:all', ['a', 'b'], tags=['course:1', 'course:2'])
+
+            tagged.invalidate('course:1')
+            self.assertIsNone(tagged.get('outline:1', tags=['course:1']))
+            self.assertIsNone(tagged.get('list:all', tags=['course:1', 'course:2']))
+            self.assertEqual(tagged.get('outline:2', tags=['course:2']), ['b'])
+
+    def test_get_or_set_with_dependencies(self):
+        for tagged in self.each_backend():
+            calls = []
+
+            def build():
+                calls.append(1)
+                return {'courses': [7, 8]}
+
+            def dependencies(value):
+                return [f'course:{pk}' for pk in value['courses']]
+
+            for _ in range(2):
+                tagged.get_or_set('stats:1', build, tags=['instructor:1'], dependencies=dependencies)
+            self.assertEqual(len(calls), 1)
+
+            tagged.invalidate('course:8')
+            tagged.get_or_set('stats:1', build, tags=['instructor:1'], dependencies=dependencies)
+            self.assertEqual(len(calls), 2)
+
+            self.assertIsNone(tagged.get_or_set('stats:2', lambda: None))
+            self.assertEqual(tagged.metrics()['stats'], {'hits': 1, 'misses': 3, 'hit_rate': 0.25})
+
+
+class CacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = make_instructor()
+        self.course = Course.objects.create(title='Django', description='Web', instructor=self.instructor)
+        self.other = Course.objects.create(title='React', description='Web', instructor=self.instructor)
+
+    def assert_cached(self, key, tags, expected=True):
+        self.assertEqual(tagged_cache.get(key, tags=tags) is not None, expected)
+
+    def test_lesson_changes_invalidate_only_their_course(self):
+        get_outline(self.course.id)
+        get_outline(self.other.id)
+        lesson = Lesson.objects.create(course=self.course, title='One', content='...')
+        self.assert_cached(outline_key(self.course.id), [outline_tag(self.course.id)], False)
+        self.assert_cached(outline_key(self.other.id), [outline_tag(self.other.id)])
+        self.assertEqual([row['title'] for row in get_outline(self.course.id)], ['One'])
+
+        lesson.delete()
+        self.assertEqual(get_outline(self.course.id), [])
+
+    def test_enrollments_keep_the_outline(self):
+        Lesson.objects.create(course=self.course, title='One', content='...')
+        get_outline(self.course.id)
+        student = make_student()
+        student.enrolled_courses.add(self.course)
+        Enrollment.objects.get(course=self.course).save()
+        Enrollment.objects.filter(course=self.course).delete()
+        self.assert_cached(outline_key(self.course.id), [outline_tag(self.course.id)])
+
+    def test_model_receivers(self):
+        other_instructor = make_instructor('teacher2')
+        tags = {
+            'course': course_tag(self.course.id),
+            'other': course_tag(self.other.id),
+            'instructor': instructor_tag(self.instructor.id),
+            'other_instructor': instructor_tag(other_instructor.id),
+        }
+
+        def warm():
+            for name, tag in tags.items():
+                tagged_cache.set(f'test:{name}', name, tags=[tag])
+
+        def still_cached():
+            return {name for name, tag in tags.items() if tagged_cache.get(f'test:{name}', tags=[tag])}
+
+        warm()
+        make_student().enrolled_courses.add(self.course)
+        self.assertEqual(still_cached(), {'other', 'instructor', 'other_instructor'})
+
+        warm()
+        Enrollment.objects.filter(course=self.course).delete()
+        self.assertEqual(still_cached(), {'other', 'instructor', 'other_instructor'})
+
+        warm()
+        self.instructor.save()
+        self.assertEqual(still_cached(), {'course', 'other', 'other_instructor'})
+
+        warm()
+        self.course.instructor = other_instructor
+        self.course.save()
+        self.assertEqual(still_cached(), {'other'})
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        self.course = Course.objects.create(title='Django', description='Description', instructor=self.instructor)
+        self.url = reverse('course_detail', args=[self.course.id])
+
+    def get(self, url=None, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url or self.url, **headers)
+        return response, len(ctx.captured_queries)
+
+    def test_second_anonymous_request_is_served_without_queries(self):
+        for url in (self.url, reverse('course_list'), reverse('home'),
+                    reverse('instructor_profile', args=[self.instructor.id])):
+            first, _ = self.get(url)
+            second, queries = self.get(url)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(queries, 0, url)
+            self.assertEqual(first.content, second.content)
+            self.assertEqual(first['ETag'], second['ETag'])
+            self.assertIn('Cookie', second['Vary'])
+
+    def test_conditional_requests_get_304(self):
+        first, _ = self.get()
+        response, queries = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(queries, 0)
+
+        response, _ = self.get(HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_purge_the_cached_page(self):
+        first, _ = self.get()
+        self.course.title = 'Django 5'
+        self.course.save()
+        response, queries = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(queries, 0)
+        self.assertContains(response, 'Django 5')
+
+        self.get()
+        Lesson.objects.create(course=self.course, title='New lesson', content='Content', order=1)
+        response, queries = self.get()
+        self.assertGreater(queries, 0)
+        self.assertContains(response, 'New lesson')
+
+    def test_catalog_page_is_purged_by_its_courses_instructor(self):
+        self.get(reverse('course_list'))
+        self.instructor.specialization = 'Go'
+        self.instructor.save()
+        _, queries = self.get(reverse('course_list'))
+        self.assertGreater(queries, 0)
+
+    def test_logged_in_users_bypass_the_cache(self):
+        anonymous, _ = self.get()
+        student = make_student()
+        self.client.force_login(student.user)
+        response, queries = self.get()
+        self.assertGreater(queries, 0)
+        self.assertNotIn('ETag', response)
+        self.assertNotEqual(anonymous.content, response.content)
+
+    def test_pending_messages_bypass_the_cache(self):
+        request = RequestFactory().get(self.url)
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        messages.info(request, 'Welcome back')
+        response = course_detail(request, self.course.id)
+        self.assertNotIn('ETag', response)
+        self.assertIsNone(tagged_cache.get(page_key(request), [course_tag(self.course.id)]))
+
+
+class SyncProgressTests(TestCase):
+    def setUp(self):
+        instructor = make_instructor()
+        self.course = Course.objects.create(title='Django', description='Web', instructor=instructor)
+        self.other_course = Course.objects.create(title='React', description='Web', instructor=instructor)
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=f'Lesson {i}', content='...', order=i)
+            for i in range(4)
+        ]
+        self.locked = Lesson.objects.create(course=self.other_course, title='Locked', content='...')
+        self.student = make_student()
+        self.student.enrolled_courses.add(self.course)
+        self.client.force_login(self.student.user)
+
+    def sync(self, completions):
+        return self.client.post(
+            reverse('sync_progress'), json.dumps({'completions': completions}), content_type='application/json'
+        )
+
+    def test_accepts_enrolled_lessons_and_rejects_the_rest(self):
+        completions = [
+            {'lesson_id': lesson.id, 'completed_at': f'2026-01-0{i + 1}T10:00:00Z'}
+            for i, lesson in enumerate(self.lessons[:3])
+        ]
+        completions.append({'lesson_id': self.locked.id})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.sync(completions)
+        self.assertEqual(response.json(), {
+            'accepted': [lesson.id for lesson in self.lessons[:3]], 'rejected': [self.locked.id],
+        })
+        self.assertEqual(LessonProgress.objects.filter(student=self.student).count(), 3)
+        summary = CourseProgress.objects.get(student=self.student, course=self.course)
+        self.assertEqual((summary.completed_count, summary.percentage), (3, 75))
+        self.assertEqual(summary.last_activity.day, 3)
+        self.assertEqual(
+            LessonProgress.objects.get(lesson=self.lessons[0]).completed_at.isoformat(), '2026-01-01T10:00:00+00:00'
+        )
+        progress_inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "courses_lessonprogress"')]
+        self.assertEqual(len(progress_inserts), 1)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        def queries(lessons):
+            with CaptureQueriesContext(connection) as ctx:
+                self.sync([{'lesson_id': lesson.id} for lesson in lessons])
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(self.lessons[:1]), queries(self.lessons))
+
+    def test_bad_payloads(self):
+        self.assertEqual(self.sync([{'lesson_id': 'x'}]).status_code, 400)
+        self.assertEqual(self.sync([{'lesson_id': self.lessons[0].id, 'completed_at': 'yesterday'}]).status_code, 400)
+        response = self.client.post(reverse('sync_progress'), '{"nope": 1}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('sync_progress')).status_code, 405)
+        self.assertFalse(LessonProgress.objects.exists())
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        make_courses(self.instructor, 5)
+
+    def timings(self, response):
+        parts = {}
+        for item in response['Server-Timing'].split(', '):
+            name, *fields = item.split(';')
+            parts[name] = dict(field.split('=', 1) for field in fields)
+        return parts
+
+    def test_server_timing_reports_queries_and_template_time(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('course_list'))
+        timing = self.timings(response)
+        self.assertEqual(timing['db']['desc'], f'"{len(ctx.captured_queries)} queries"')
+        self.assertGreater(float(timing['tpl']['dur']), 0)
+        self.assertGreaterEqual(float(timing['total']['dur']), float(timing['tpl']['dur']))
+
+        self.client.force_login(make_student().user)
+        timing = self.timings(self.client.get(reverse('my_progress')))
+        self.assertEqual(float(timing['tpl']['dur']), 0)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_left_alone(self):
+        response = self.client.get(reverse('course_list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_repeated_sql_is_flagged_and_logged(self):
+        metrics = instrumentation.RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            for course in Course.objects.all():
+                Instructor.objects.get(pk=course.instructor_id)
+            list(Course.objects.all())
+        repeated = metrics.finish().duplicates()
+        self.assertEqual(len(repeated), 1)
+        self.assertIn('courses_instructor', repeated[0]['sql'])
+        self.assertEqual((repeated[0]['count'], repeated[0]['identical']), (5, 5))
+
+        with self.assertLogs('courses.requests', 'WARNING') as logs, override_settings(REQUEST_METRICS_SLOW_MS=0):
+            self.client.get(reverse('course_list'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'course_list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['duplicates'], [])
+
+
+class RepeatedQueryDetectionTests(QueryAssertionsMixin, TestCase):
+    def setUp(self):
+        self.instructor = make_instructor()
+        make_courses(self.instructor, 5)
+
+    def test_query_shape_ignores_values(self):
+        self.assertEqual(
+            instrumentation.query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            instrumentation.query_shape('SELECT * FROM t WHERE id IN (%s) LIMIT 5'),
+        )
+
+    def test_lazy_relation_in_a_loop_is_caught(self):
+        with self.assertRaises(RepeatedQueriesError):
+            with detect_repeated_queries():
+                [course.instructor.user.username for course in Course.objects.all()]
+        with detect_repeated_queries():
+            [course.instructor.user.username for course in Course.objects.select_related('instructor__user')]
+
+        with self.assertWarns(RepeatedQueriesWarning):
+            with detect_repeated_queries(action='warn'):
+                [course.lesson_set.count() for course in Course.objects.all()]
+
+        with self.assertRaises(AssertionError):
+            with self.assertNoRepeatedQueries():
+                [course.enrolled_students.count() for course in Course.objects.all()]
+
+    def test_middleware_raises_for_n_plus_one_views(self):
+        from django.http import HttpResponse
+
+        def view(request):
+            return HttpResponse(', '.join(course.instructor.user.username for course in Course.objects.all()))
+
+        request = RequestFactory().get('/')
+        with self.assertLogs('courses.requests', 'WARNING') as logs:
+            with self.assertRaises(RepeatedQueriesError):
+                RequestMetricsMiddleware(view)(request)
+        [record] = logs.records
+        self.assertEqual(len(record.metrics['duplicates']), 2)
+
+
+class ViewQueryBudgetTests(QueryAssertionsMixin, TestCase):
+    """
+    كل صفحة بعدد queries ثابت، والـ mixin بيوقع أي طلب فيه N+1.
+    القوايم فيها أكتر من repeated_query_threshold عنصر عشان أي query جوه loop تبان.
+    """
+    BUDGETS = {
+        'home': 2,
+        'course_list': 1,
+        'course_search': 2,
+        'course_detail': 2,
+        'course_detail:student': 6,
+        'enroll_course': 10,
+        'my_courses': 5,
+        'my_progress': 4,
+        'mark_lesson_complete': 7,
+        'sync_progress': 9,
+        'admin_dashboard': 5,
+        'admin_course_create': 3,
+        'admin_course_edit': 4,
+        'admin_course_delete': 5,
+        'admin_instructors': 5,
+        'admin_students': 5,
+        'admin_cache_stats': 2,
+        'signup': 0,
+        'login': 0,
+        'logout': 4,
+        'instructor_profile': 4,
+        'instructor_dashboard': 8,
+        'create_course': 4,
+        'edit_course': 4,
+        'become_instructor': 3,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_dataset(prefix='bench0', instructors=2, students=30, courses=12, lessons_per_course=4,
+                         enrollments_per_student=4)
+
+    def test_views_stay_within_their_query_budget(self):
+        fixture = benchmarks.build_fixture('bench0')
+        for route, budget in self.BUDGETS.items():
+            role = benchmarks.ROUTES[route].get('role')
+            client = Client()
+            if role:
+                client.force_login(fixture['users'][role])
+            cache.clear()
+            with self.subTest(route=route), transaction.atomic():
+                with self.assertMaxQueries(budget):
+                    response = benchmarks.request_route(client, route, fixture)
+                self.assertEqual(response.status_code, benchmarks.ROUTES[route].get('status', 200))
+                transaction.set_rollback(True)
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_every_url_has_a_benchmark(self):
+        self.assertEqual(benchmarks.missing_routes(), [])
+
+    def test_routes_run_against_generated_data(self):
+        generate_dataset(prefix='bench0', instructors=2, students=20, courses=4, lessons_per_course=3,
+                         enrollments_per_student=2)
+        fixture = benchmarks.build_fixture('bench0')
+        enrollments = Enrollment.objects.count()
+        clients = {}
+        for route in ('course_list', 'course_detail:student', 'enroll_course', 'mark_lesson_complete', 'admin_students'):
+            result = benchmarks.benchmark_route(route, fixture, samples=3, warmup=0, clients=clients)
+            self.assertTrue(result['ok'], (route, result))
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['peak_kb'], 0)
+        # الطلبات بتترجع rollback
+        self.assertEqual(Enrollment.objects.count(), enrollments)
+
+    def test_compare_flags_query_and_p95_regressions(self):
+        def report(queries, p95):
+            return {'results': {'small': {'course_list': {'queries': queries, 'p95_ms': p95}}}}
+
+        self.assertEqual(benchmarks.compare(report(2, 20.0), report(2, 22.0)), [])
+        # زيادة صغيرة بالـ ms مش regression حتى لو النسبة كبيرة
+        self.assertEqual(benchmarks.compare(report(2, 2.0), report(2, 4.0)), [])
+        self.assertEqual(len(benchmarks.compare(report(2, 20.0), report(3, 20.0))), 1)
+        self.assertEqual(len(benchmarks.compare(report(2, 20.0), report(2, 40.0))), 1)
+        self.assertEqual(benchmarks.compare(report(2, 20.0), report(3, 20.0), max_query_increase=1), [])
+        self.assertEqual(benchmarks.compare({'results': {}}, report(9, 90.0)), [])
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(benchmarks.percentile(samples, 50), 50)
+        self.assertEqual(benchmarks.percentile(samples, 95), 95)
+        self.assertEqual(benchmarks.percentile([7], 99), 7)
+
+
+@skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class SearchBenchmark(TestCase):
+    COURSES = 1000
+    LESSONS_PER_COURSE = 100
+    QUERIES = ['python', 'django models', 'secur netw', 'word1234', 'word77 word1500']
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        words = ('python django react hooks models views security network design data '
+                 'science business marketing testing deploy cloud linux api database').split()
+        words += [f'word{i}' for i in range(2000)]
+
+        def text(count):
+            return ' '.join(rng.choice(words) for _ in range(count))
+
+        instructor = make_instructor()
+        courses = Course.objects.bulk_create(
+            Course(title=text(4), description=text(40), instructor=instructor) for _ in range(cls.COURSES)
+        )
+        for course in courses:
+            Lesson.objects.bulk_create(
+                Lesson(course=course, title=text(5), content=text(60), order=order)
+                for order in range(cls.LESSONS_PER_COURSE)
+            )
+        search.rebuild_index()
+
+    def measure(self, run):
+        timings = {}
+        for query in self.QUERIES:
+            samples = []
+            for _ in range(3):
+                start = time.perf_counter()
+                run(query)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[query] = statistics.median(samples)
+        return timings
+
+    def test_fts_vs_like(self):
+        fts = self.measure(lambda q: search.search_courses(q))
+        # نفس شغل search_courses من غير FTS: الصفحة بالمدرب وصف زيادة لـ has_next
+        like = self.measure(lambda q: list(
+            search.like_search(q).select_related('instructor__user')[:search.PAGE_SIZE + 1]
+        ))
+        print(f"\nsearch over {self.COURSES * self.LESSONS_PER_COURSE} lessons (median ms)")
+        for query in self.QUERIES:
+            print(f"  {query!r:20} FTS5 {fts[query]:8.1f}   LIKE {like[query]:8.1f}")
+        # LIKE بيبان سريع لما الكلمة منتشرة ويلاقي 12 نتيجة بدري، الفرق في أسوأ حالة (scan كامل)
+        self.assertLess(max(fts.values()), max(like.values()))
+
+
+@skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class SyncProgressBenchmark(TestCase):
+    COMPLETIONS = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        instructor = make_instructor()
+        courses = make_courses(instructor, 10)
+        cls.lessons = Lesson.objects.bulk_create(
+            Lesson(course=course, title=f'Lesson {i}', content='...', order=i)
+            for course in courses for i in range(cls.COMPLETIONS // 10)
+        )
+        update_course_counters([course.id for course in courses], lessons=True)
+        cls.student = make_student()
+        cls.student.enrolled_courses.add(*courses)
+
+    def run_and_count(self, send):
+        LessonProgress.objects.all().delete()
+        CourseProgress.objects.all().delete()
+        self.client.force_login(self.student.user)
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            send()
+            elapsed = (time.perf_counter() - start) * 1000
+        self.assertEqual(LessonProgress.objects.count(), self.COMPLETIONS)
+        return elapsed, len(ctx.captured_queries)
+
+    def test_batch_vs_individual_requests(self):
+        def individual():
+            for lesson in self.lessons:
+                self.client.post(reverse('mark_lesson_complete', args=[lesson.id]), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        def batch():
+            self.client.post(
+                reverse('sync_progress'),
+                json.dumps({'completions': [{'lesson_id': lesson.id} for lesson in self.lessons]}),
+                content_type='application/json',
+            )
+
+        one_by_one = self.run_and_count(individual)
+        batched = self.run_and_count(batch)
+        print(
+            f"\nsyncing {self.COMPLETIONS} completions: "
+            f"{self.COMPLETIONS} requests {one_by_one[0]:.0f}ms / {one_by_one[1]} queries, "
+            f"one batch {batched[0]:.0f}ms / {batched[1]} queries"
+        )
+        self.assertLess(batched[0], one_by_one[0])
+
+
+@skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class AdminListBenchmark(TestCase):
+    STUDENTS = 50_000
+    INSTRUCTORS = 2_000
+    BUDGET_MS = 750
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin')
+        users = CustomUser.objects.bulk_create(
+            [CustomUser(username=f'teacher{i:05d}', email=f'teacher{i}@example.com', role='instructor') for i in range(cls.INSTRUCTORS)]
+            + [CustomUser(username=f'student{i:06d}', email=f'student{i}@example.com', role='student') for i in range(cls.STUDENTS)],
+            batch_size=5000,
+        )
+        instructors = Instructor.objects.bulk_create(
+            [Instructor(user=user, bio='...', specialization='Web') for user in users[:cls.INSTRUCTORS]], batch_size=5000
+        )
+        students = Student.objects.bulk_create([Student(user=user) for user in users[cls.INSTRUCTORS:]], batch_size=5000)
+        courses = Course.objects.bulk_create(
+            [Course(title=f'Course {i}', description='...', instructor=instructor)
+             for i, instructor in enumerate(instructors) for _ in range(2)],
+            batch_size=5000,
+        )
+        rng = random.Random(12)
+        Enrollment.objects.bulk_create(
+            (Enrollment(student=student, course=course)
+             for student in students for course in rng.sample(courses, 3)),
+            batch_size=5000,
+        )
+
+    def timed(self, name, **params):
+        self.client.force_login(self.admin)
+        samples = []
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = self.client.get(reverse(name), params)
+                samples.append((time.perf_counter() - start) * 1000)
+        self.assertEqual(response.status_code, 200)
+        return statistics.median(samples), len(ctx.captured_queries)
+
+    def test_admin_lists_render_within_budget(self):
+        cases = [
+            ('admin_students', {}),
+            ('admin_students', {'sort': '-courses', 'page': 100}),
+            ('admin_students', {'q': 'student0420'}),
+            ('admin_instructors', {}),
+            ('admin_instructors', {'sort': '-students', 'page': 40}),
+            ('admin_instructors', {'q': 'teacher01'}),
+        ]
+        print()
+        for name, params in cases:
+            elapsed, queries = self.timed(name, **params)
+            print(f"{name} {params}: {elapsed:.0f}ms, {queries} queries")
+            self.assertLess(elapsed, self.BUDGET_MS)
+            self.assertLessEqual(queries, 6)
+
+
+@skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class URLBenchmark(TestCase):
+    # المسح بيمشي على كل صف مربوط بالكورس (cascade)، فطبيعي يكبر مع الداتا
+    GROWS_WITH_DATA = {'admin_course_delete:post'}
+
+    def test_query_counts_do_not_grow_with_the_dataset(self):
+        report = benchmarks.run_benchmarks(sizes=('small', 'medium'), samples=5, log=print)
+        small, medium = report['results']['small'], report['results']['medium']
+        for route in benchmarks.ROUTES:
+            if route not in self.GROWS_WITH_DATA:
+                self.assertEqual(small[route]['queries'], medium[route]['queries'], route)
+
+
+@skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class RequestMetricsBenchmark(TestCase):
+    REQUESTS = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        make_courses(make_instructor(), 100)
+
+    def median_ms(self):
+        samples = []
+        for _ in range(self.REQUESTS):
+            cache.clear()
+            start = time.perf_counter()
+            self.client.get(reverse('course_list'))
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def test_sampling_overhead(self):
+        with override_settings(REQUEST_METRICS_SAMPLE_RATE=0):
+            off = self.median_ms()
+        with override_settings(REQUEST_METRICS_SAMPLE_RATE=1):
+            on = self.median_ms()
+        print(f"\ncourse_list median: {off:.2f}ms unsampled, {on:.2f}ms measured")
+        self.assertLess(on, off * 1.2)
+
+
+@skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class PasswordHashingBenchmark(TestCase):
+    def test_logins_per_second_per_core(self):
+        print()
+        for name, (hasher_name, _) in hashers.CONFIGS.items():
+            if not hashers.is_available(hasher_name):
+                continue
+            result = hashers.benchmark_config(name, rounds=3)
+            print(f"{name:16} {result['verify_ms']:8.1f}ms  {result['logins_per_second_per_core']:7.1f} logins/s/core")
+            self.assertGreater(result['logins_per_second_per_core'], 0)
+
+
+@skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run benchmarks')
+class SessionBackendBenchmark(TestCase):
+    def test_authenticated_throughput_per_backend(self):
+        generate_dataset(instructors=3, students=50, courses=10, lessons_per_course=5, seed=1, prefix='bench')
+        results = benchmarks.benchmark_sessions(benchmarks.build_fixture('bench'), samples=30)
+        print()
+        for backend, routes in results.items():
+            for route, result in routes.items():
+                print(f"{backend:15} {route:24} {result['requests_per_second']:8.1f} req/s  {result['queries']} queries")
+                self.assertTrue(result['ok'])
+        # الـ session بتتقري من الكاش أو الـ cookie بدل django_session
+        for backend in ('cached_db', 'cache', 'signed_cookies'):
+            self.assertLess(results[backend]['my_courses']['queries'], results['db']['my_courses']['queries'])
@@ -5,10 +5,13 @@ urlpatterns = [
     # المسارات الأساسية الحالية
     path('', views.home, name='home'),
     path('courses/', views.course_list, name='course_list'),
+    path('courses/search/', views.course_search, name='course_search'),
     path('courses/<int:course_id>/', views.course_detail, name='course_detail'),
     path('enroll/<int:course_id>/', views.enroll_course, name='enroll_course'),
     path('my-courses/', views.my_courses, name='my_courses'),
+    path('my-courses/progress/', views.my_progress, name='my_progress'),
     path('mark-complete/<int:lesson_id>/', views.mark_lesson_complete, name='mark_lesson_complete'),
+    path('progress/sync/', views.sync_progress, name='sync_progress'),
     
 
      # مسارات الادمن
@@ -18,6 +21,7 @@ urlpatterns = [
     path('admin/courses/<int:course_id>/delete/', views.admin_course_delete, name='admin_course_delete'),
     path('admin/instructors/', views.admin_instructors, name='admin_instructors'),
     path('admin/students/', views.admin_students, name='admin_students'),
+    path('admin/cache-stats/', views.admin_cache_stats, name='admin_cache_stats'),
 
     # مسارات التسجيل والدخول
     path('signup/', views.signup, name='signup'),
@@ -1,178 +1,128 @@
 # courses/views.py
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_POST
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.contrib.auth.models import User
-from django.db.models import Avg, Count
-from .models import Course, Lesson, Student, Instructor, LessonProgress, Enrollment, UserProfile
+from django.contrib.auth import get_user_model
+from django.db.models import Avg, Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Course, CourseProgress, Lesson, Student, Instructor, LessonProgress, Enrollment, UserProfile
 from .decorators import admin_required, instructor_required
+from .roles import roles_for
+from .catalog import CATEGORIES, catalog_page, featured_courses, parse_filters
+from .search import search_courses
+from .analytics import get_instructor_analytics
+from .caching import CATALOG_TAG, course_tag, instructor_tag, page_tags_for, tagged_cache
+from .listing import admin_list
+from .outline import get_outline
+from .page_cache import add_page_tags, anonymous_page_cache
+from .stats import get_stats
+from .progress import record_lesson_completion, record_lesson_completions
+
+User = get_user_model()
 
 # ========== النظام الحالي - بدون تغيير ==========
 
+@anonymous_page_cache(lambda request: [CATALOG_TAG])
 def course_list(request):
-    courses = Course.objects.all()
-    return render(request, 'courses/course_list.html', {'courses': courses})
+    filters = parse_filters(request.GET)
+    courses, next_cursor = catalog_page(filters, request.GET.get('cursor'))
+    # الكارت فيه عدد الاشتراكات واسم المدرب، فالصفحة بتتمسح مع أي كورس أو مدرب فيها
+    add_page_tags(request, *page_tags_for(courses))
+
+    # الـ query string من غير الـ cursor عشان لينك الصفحة الجاية يحافظ على الفلاتر
+    params = request.GET.copy()
+    params.pop('cursor', None)
+
+    return render(request, 'courses/course_list.html', {
+        'courses': courses,
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'categories': CATEGORIES,
+        'filter_query': params.urlencode(),
+    })
+
+def course_search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
 
+    courses, has_next = search_courses(query, page)
+    return render(request, 'courses/search.html', {
+        'query': query,
+        'courses': courses,
+        'page': page,
+        'has_next': has_next,
+    })
+
+@anonymous_page_cache(lambda request, course_id: [course_tag(course_id)])
 def course_detail(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    lessons = Lesson.objects.filter(course=course).order_by('order')
-    
-    is_enrolled = False
-    completed_lessons = []
-    progress_percentage = 0
-    completed_count = 0
-    total_lessons = lessons.count()
-    
-    if request.user.is_authenticated and hasattr(request.user, 'student'):
-        is_enrolled = request.user.student.enrolled_courses.filter(id=course_id).exists()
-        
-        if is_enrolled:
-            completed_lessons = LessonProgress.objects.filter(
-                student=request.user.student,
-                lesson__course=course,
-                completed=True
-            ).values_list('lesson_id', flat=True)
-            
-            completed_count = len(completed_lessons)
-            if total_lessons > 0:
-                progress_percentage = int((completed_count / total_lessons) * 100)
+    courses = Course.objects.select_related('instructor__user')
+    if request.user.is_authenticated:
+        # حالة الاشتراك وملخص التقدم جايين مع الكورس في نفس الـ query
+        summary = CourseProgress.objects.filter(
+            course_id=OuterRef('pk'),
+            student__user_id=request.user.id,
+        )
+        courses = courses.annotate(
+            is_enrolled=Exists(
+                Enrollment.objects.filter(
+                    course_id=OuterRef('pk'),
+                    student__user_id=request.user.id,
+                )
+            ),
+            completed_count=Subquery(summary.values('completed_count')[:1]),
+            progress_percentage=Subquery(summary.values('percentage')[:1]),
+        )
+    course = get_object_or_404(courses, id=course_id)
+    lessons = get_outline(course.id)
+    add_page_tags(request, instructor_tag(course.instructor_id))
+    
+    is_enrolled = getattr(course, 'is_enrolled', False)
+    completed_lessons = set()
+    
+    if is_enrolled:
+        completed_lessons = set(LessonProgress.objects.filter(
+            student__user_id=request.user.id,
+            lesson__course_id=course.id,
+            completed=True
+        ).values_list('lesson_id', flat=True))
     
     return render(request, 'courses/course_detail.html', {
         'course': course,
         'lessons': lessons,
         'is_enrolled': is_enrolled,
-        'completed_lessons': list(completed_lessons),
-        'progress_percentage': progress_percentage,
-        'completed_count': completed_count,
-        'total_lessons': total_lessons,
+        'completed_lessons': completed_lessons,
+        'progress_percentage': getattr(course, 'progress_percentage', None) or 0,
+        'completed_count': getattr(course, 'completed_count', None) or 0,
+        'total_lessons': len(lessons),
     })
 
-def create_sample_courses():
-    """إنشاء كورسات تجريبية إذا لم تكن موجودة"""
-    try:
-        instructor_user = User.objects.filter(is_superuser=True).first()
-        if not instructor_user:
-            instructor_user = User.objects.create_user(
-                username='admin_instructor',
-                email='admin@elearn.com',
-                password='admin123'
-            )
-        
-        instructor, created = Instructor.objects.get_or_create(user=instructor_user)
-        
-        sample_courses = [
-            {
-                'title': 'Web Development with Django & React',
-                'description': 'Complete course to learn full-stack web development from beginner to advanced level. Build real-world projects and master modern web technologies.',
-                'price': 0.00,
-                'is_paid': False,
-                'image_url': 'https://cdn.pixabay.com/photo/2020/05/18/16/17/social-media-5187243_1280.png'
-            },
-            {
-                'title': 'Python Programming Mastery',
-                'description': 'Learn Python from basics to advanced topics including OOP, data structures, APIs, and web development with Django.',
-                'price': 99.00,
-                'is_paid': True,
-                'image_url': 'https://cdn.pixabay.com/photo/2016/03/27/18/54/technology-1283624_1280.jpg'
-            },
-            {
-                'title': 'Data Science Fundamentals',
-                'description': 'Master data analysis, machine learning, statistics, and Python for data science. Work with real datasets and build predictive models.',
-                'price': 149.00,
-                'is_paid': True,
-                'image_url': 'https://cdn.pixabay.com/photo/2018/05/08/08/44/artificial-intelligence-3382507_1280.jpg'
-            }
-        ]
-        
-        created_courses = []
-        for i, course_data in enumerate(sample_courses, 1):
-            course, created = Course.objects.get_or_create(
-                title=course_data['title'],
-                defaults={
-                    'description': course_data['description'],
-                    'instructor': instructor,
-                    'price': course_data['price'],
-                    'is_paid': course_data['is_paid']
-                }
-            )
-            
-            if created:
-                lessons_data = [
-                    {'title': 'Introduction to the Course', 'content': 'Welcome and course overview', 'order': 1},
-                    {'title': 'Getting Started', 'content': 'Setup development environment', 'order': 2},
-                    {'title': 'Core Concepts', 'content': 'Learn fundamental concepts and techniques', 'order': 3},
-                    {'title': 'Hands-on Projects', 'content': 'Build real-world applications', 'order': 4},
-                    {'title': 'Advanced Topics', 'content': 'Dive deeper into advanced concepts', 'order': 5},
-                ]
-                
-                for lesson_data in lessons_data:
-                    Lesson.objects.create(
-                        course=course,
-                        title=lesson_data['title'],
-                        content=lesson_data['content'],
-                        order=lesson_data['order']
-                    )
-                
-                created_courses.append(course)
-        
-        return created_courses
-    except Exception as e:
-        print(f"Error creating sample courses: {e}")
-        return []
-
+@anonymous_page_cache(lambda request: [CATALOG_TAG])
 def home(request):
-    if Course.objects.count() == 0:
-        create_sample_courses()
-    
-    total_courses = Course.objects.count()
-    total_students = Student.objects.count()
-    total_instructors = Instructor.objects.count()
-    
-    featured_courses = [
-        {
-            'id': 1,
-            'title': 'Web Development with Django & React',
-            'description': 'Complete course to learn full-stack web development from beginner to advanced level',
-            'image': 'https://cdn.pixabay.com/photo/2020/05/18/16/17/social-media-5187243_1280.png',
-            'instructor': {'user': {'username': 'prof_ahmed'}},
-            'is_paid': False,
-            'price': 0,
-            'rating': 4.7,
-            'reviews': 1234,
-            'students': 5432
-        },
-        {
-            'id': 2,
-            'title': 'Complete Web Development Bootcamp 2025',
-            'description': 'Learn HTML, CSS, JavaScript, React, Node.js, and MongoDB. Build 10+ real projects',
-            'image': 'https://cdn.pixabay.com/photo/2016/11/19/22/25/code-1841550_1280.jpg',
-            'instructor': {'user': {'username': 'emma_wilson'}},
-            'is_paid': True,
-            'price': 299.00,
-            'rating': 4.9,
-            'reviews': 2567,
-            'students': 8921
-        },
-        {
-            'id': 3,
-            'title': 'Cybersecurity Fundamentals',
-            'description': 'Network security, ethical hacking, penetration testing, and security protocols',
-            'image': 'https://cdn.pixabay.com/photo/2018/05/08/08/44/artificial-intelligence-3382507_1280.jpg',
-            'instructor': {'user': {'username': 'dr_sarah'}},
-            'is_paid': True,
-            'price': 279.00,
-            'rating': 4.8,
-            'reviews': 1876,
-            'students': 4215
-        }
-    ]
+    """
+    الكورسات المميزة في query والأرقام من الـ snapshot في التانية (مابيعملش seed لأي داتا).
+    الأرقام من الـ snapshot زي ما هو حتى لو قديم (بيتحدث من الـ signals و refresh_stats)،
+    وبيتحسب هنا بس أول مرة لو مش موجود.
+    الداتا التجريبية بتتعمل من  python manage.py seed_sample_courses
+    """
+    featured = featured_courses()
+    add_page_tags(request, *page_tags_for(featured))
+    stats = get_stats(refresh=False)
     
     return render(request, 'courses/home.html', {
-        'featured_courses': featured_courses,
-        'total_courses': total_courses or 120,
-        'total_students': total_students or 15000,
-        'total_instructors': total_instructors or 85,
+        'featured_courses': featured,
+        'total_courses': stats.active_courses,
+        'total_students': stats.total_students,
+        'total_instructors': stats.total_instructors,
     })
 
 def signup(request):
@@ -197,7 +147,8 @@ def signup(request):
                 Instructor.objects.create(user=user)
                 messages.success(request, f"Instructor account created successfully! Welcome, {user.username}!")
             
-            login(request, user)
+            # فيه أكتر من backend في AUTHENTICATION_BACKENDS، فلازم نقول أنهي واحد
+            login(request, user, backend='courses.backends.RoleModelBackend')
             return redirect('home')
             
         except Exception as e:
@@ -230,68 +181,159 @@ def user_logout(request):
 def enroll_course(request, course_id):
     course = get_object_or_404(Course, id=course_id)
     
-    if not hasattr(request.user, 'student'):
+    student = roles_for(request.user).student
+    if student is None:
         messages.error(request, "Only students can enroll in courses")
         return redirect('course_detail', course_id=course_id)
     
-    student = request.user.student
-    student.enrolled_courses.add(course)
-    messages.success(request, f"Successfully enrolled in {course.title}!")
+    _, created = Enrollment.objects.get_or_create(student=student, course=course)
+    if created:
+        messages.success(request, f"Successfully enrolled in {course.title}!")
+    else:
+        messages.info(request, f"You are already enrolled in {course.title}")
     
     return redirect('course_detail', course_id=course_id)
 
 @login_required
 def my_courses(request):
-    if hasattr(request.user, 'student'):
-        courses = request.user.student.enrolled_courses.all()
+    student = roles_for(request.user).student
+    if student is not None:
+        courses = student.get_courses_progress()
         return render(request, 'courses/my_courses.html', {'courses': courses})
     else:
         messages.error(request, "Only students have enrolled courses")
         return redirect('course_list')
 
 @login_required
+def my_progress(request):
+    """التقدم في كل الكورسات كـ JSON"""
+    student = roles_for(request.user).student
+    if student is None:
+        return JsonResponse({'error': "Only students have enrolled courses"}, status=403)
+    
+    courses = student.get_courses_progress()
+    return JsonResponse({'courses': [
+        {
+            'course_id': course.id,
+            'title': course.title,
+            'completed_lessons': course.completed_lessons,
+            'total_lessons': course.lesson_count,
+            'progress': course.progress,
+        }
+        for course in courses
+    ]})
+
+@login_required
+@require_POST
 def mark_lesson_complete(request, lesson_id):
-    lesson = get_object_or_404(Lesson, id=lesson_id)
-    
-    if not hasattr(request.user, 'student'):
-        messages.error(request, "Only students can mark lessons as complete")
-        return redirect('course_detail', course_id=lesson.course.id)
-    
-    if not request.user.student.enrolled_courses.filter(id=lesson.course.id).exists():
-        messages.error(request, "You must be enrolled in the course to mark lessons as complete")
-        return redirect('course_detail', course_id=lesson.course.id)
-    
-    progress, created = LessonProgress.objects.get_or_create(
-        student=request.user.student,
-        lesson=lesson,
-        defaults={'completed': True}
+    # الـ fetch اللي في صفحة الكورس بيطلب JSON عشان يحدث البار من غير redirect
+    wants_json = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    
+    # الدرس وحالة الاشتراك في query واحدة، والطالب محمل مع اليوزر
+    student_id = roles_for(request.user).student_id
+    lesson = get_object_or_404(
+        Lesson.objects.only('id', 'title', 'course_id').annotate(
+            is_enrolled=Exists(
+                Enrollment.objects.filter(
+                    course_id=OuterRef('course_id'),
+                    student_id=student_id,
+                )
+            ),
+        ),
+        id=lesson_id,
     )
-    if not created:
-        progress.completed = True
-        progress.save()
+    
+    error = None
+    if student_id is None:
+        error = "Only students can mark lessons as complete"
+    elif not lesson.is_enrolled:
+        error = "You must be enrolled in the course to mark lessons as complete"
+    if error:
+        if wants_json:
+            return JsonResponse({'error': error}, status=403)
+        messages.error(request, error)
+        return redirect('course_detail', course_id=lesson.course_id)
+    
+    student = Student(pk=student_id, user_id=request.user.id)
+    summary = record_lesson_completion(student, lesson)
+    
+    if wants_json:
+        return JsonResponse({
+            'lesson_id': lesson.id,
+            'completed': True,
+            'completed_count': summary['completed_count'],
+            'progress': summary['percentage'],
+        })
     
     messages.success(request, f"Lesson '{lesson.title}' marked as completed!")
-    return redirect('course_detail', course_id=lesson.course.id)
+    return redirect('course_detail', course_id=lesson.course_id)
+
+MAX_SYNC_COMPLETIONS = 1000
+
+@login_required
+@require_POST
+def sync_progress(request):
+    """
+    مزامنة دروس خلصت أوفلاين (موبايل) في طلب واحد:
+    {"completions": [{"lesson_id": 1, "completed_at": "2026-01-01T10:00:00Z"}, ...]}
+    """
+    try:
+        payload = json.loads(request.body)
+        items = payload['completions']
+        if not isinstance(items, list):
+            raise TypeError
+        requested = {}
+        now = timezone.now()
+        for item in items:
+            completed_at = now
+            if item.get('completed_at'):
+                completed_at = parse_datetime(item['completed_at'])
+                if completed_at is None:
+                    raise ValueError(item['completed_at'])
+                if timezone.is_naive(completed_at):
+                    completed_at = timezone.make_aware(completed_at)
+            # مش مسموح بوقت في المستقبل
+            requested[int(item['lesson_id'])] = min(completed_at, now)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'error': "Expected {\"completions\": [{\"lesson_id\": ..., \"completed_at\": ...}]}"}, status=400)
+    
+    if len(requested) > MAX_SYNC_COMPLETIONS:
+        return JsonResponse({'error': f"At most {MAX_SYNC_COMPLETIONS} completions per request"}, status=400)
+    
+    student_id = roles_for(request.user).student_id
+    if student_id is None:
+        return JsonResponse({'error': "Only students can mark lessons as complete"}, status=403)
+    
+    # الاشتراك في كل الكورسات بيتشيك في query واحدة: الدروس اللي كورساتها الطالب مشترك فيها بس
+    allowed = dict(Lesson.objects.filter(
+        pk__in=requested,
+        course_id__in=Enrollment.objects.filter(student_id=student_id).values('course_id'),
+    ).values_list('pk', 'course_id'))
+    
+    record_lesson_completions(student_id, [
+        (lesson_id, course_id, requested[lesson_id]) for lesson_id, course_id in allowed.items()
+    ])
+    
+    return JsonResponse({
+        'accepted': sorted(allowed),
+        'rejected': sorted(set(requested) - set(allowed)),
+    })
 
 # ========== النظام الجديد للادمن ==========
 
 @login_required  
 @admin_required
 def admin_dashboard(request):
-    from .models import CustomUser
-    
-    total_courses = Course.objects.count()
-    total_students = CustomUser.objects.filter(role='student').count()
-    total_instructors = CustomUser.objects.filter(role='instructor').count()
-    total_enrollments = Enrollment.objects.count()
-    
-    courses = Course.objects.all().order_by('-created_at')[:10]
+    # الأرقام من الـ snapshot (lookup واحد) بدل COUNT على كل جدول
+    stats = get_stats()
+    courses = Course.objects.select_related('instructor__user').order_by('-created_at', '-id')[:10]
     
     context = {
-        'total_courses': total_courses,
-        'total_students': total_students, 
-        'total_instructors': total_instructors,
-        'total_enrollments': total_enrollments,
+        'stats': stats,
+        'total_courses': stats.total_courses,
+        'total_students': stats.total_students,
+        'total_instructors': stats.total_instructors,
+        'total_enrollments': stats.total_enrollments,
         'courses': courses,
     }
     return render(request, 'admin/dashboard.html', context)
@@ -387,93 +429,112 @@ def admin_course_delete(request, course_id):
     
     return render(request, 'admin/courses/confirm_delete.html', {'course': course})
 
+# أعمدة الترتيب المسموحة: الاسم في الـ URL -> الحقل.
+# الترتيب بالعدد (courses و students) بطيء على الجداول الكبيرة: مفيش عداد محفوظ على الطالب أو المدرب،
+# فالـ subquery بتتحسب لكل صف قبل الـ LIMIT. الترتيب بباقي الأعمدة بيحسبها لصفوف الصفحة بس
+INSTRUCTOR_SORTS = {
+    'username': 'user__username',
+    'email': 'user__email',
+    'courses': 'courses_count',
+    'students': 'total_students_count',
+    'joined': 'user__date_joined',
+}
+
+STUDENT_SORTS = {
+    'username': 'user__username',
+    'email': 'user__email',
+    'courses': 'enrolled_courses_count',
+    'joined': 'user__date_joined',
+    'last_login': 'user__last_login',
+}
+
 @login_required
 @admin_required
 def admin_instructors(request):
     """إدارة المدربين"""
-    instructors = Instructor.objects.all().select_related('user')
-    
-    # حساب عدد الطلاب لكل مدرب
-    for instructor in instructors:
-        instructor.total_students_count = Student.objects.filter(
-            enrolled_courses__instructor=instructor
-        ).distinct().count()
-    
-    context = {
-        'instructors': instructors,
-    }
+    # عدد الكورسات والطلاب لكل مدرب في نفس الـ query كـ subqueries مربوطة بالصف،
+    # فلو الترتيب مش بالعدد SQLite بيحسبها لصفوف الصفحة بس بدل GROUP BY على الجدول كله
+    courses = Course.objects.filter(instructor_id=OuterRef('pk')).order_by().values('instructor_id')
+    students = Enrollment.objects.filter(course__instructor_id=OuterRef('pk')).order_by().values('course__instructor_id')
+    instructors = Instructor.objects.select_related('user').annotate(
+        courses_count=Coalesce(Subquery(courses.annotate(total=Count('pk')).values('total')), 0),
+        total_students_count=Coalesce(
+            Subquery(students.annotate(total=Count('student_id', distinct=True)).values('total')), 0
+        ),
+    )
+    context = admin_list(
+        request, instructors, INSTRUCTOR_SORTS, '-students', ['user__username', 'user__email'],
+    )
     return render(request, 'admin/instructors.html', context)
 
 @login_required
 @admin_required
 def admin_students(request):
     """إدارة الطلاب"""
-    students = Student.objects.all().select_related('user')
-    
-    # حساب عدد الكورسات لكل طالب
-    for student in students:
-        student.enrolled_courses_count = student.enrolled_courses.count()
-    
-    context = {
-        'students': students,
-    }
+    # عدد الكورسات لكل طالب من جدول Enrollment في نفس الـ query (subquery على الـ unique index)
+    enrollments = Enrollment.objects.filter(student_id=OuterRef('pk')).order_by().values('student_id')
+    students = Student.objects.select_related('user').annotate(
+        enrolled_courses_count=Coalesce(Subquery(enrollments.annotate(total=Count('pk')).values('total')), 0)
+    )
+    context = admin_list(
+        request, students, STUDENT_SORTS, '-joined', ['user__username', 'user__email'],
+    )
     return render(request, 'admin/students.html', context)
 
+@login_required
+@admin_required
+def admin_cache_stats(request):
+    """hits و misses الكاش لكل namespace في الـ process ده - لتحديد حجم الكاش"""
+    return JsonResponse({
+        'backend': tagged_cache.backend.__class__.__name__,
+        'namespaces': tagged_cache.metrics(),
+    })
+
 # ========== النظام الحالي للمدربين - بدون تغيير ==========
 
+@anonymous_page_cache(lambda request, instructor_id: [instructor_tag(instructor_id)])
 def instructor_profile(request, instructor_id):
-    """صفحة البروفايل الخاصة بالمدرب"""
-    instructor = get_object_or_404(Instructor, id=instructor_id)
-    
-    # إحصائيات المدرب
-    instructor_stats = {
-        'total_courses': instructor.course_set.count(),
-        'total_students': Student.objects.filter(
-            enrolled_courses__instructor=instructor
-        ).distinct().count(),
-        'total_lessons': Lesson.objects.filter(course__instructor=instructor).count(),
-    }
+    """صفحة البروفايل الخاصة بالمدرب - كلها من كاش الإحصائيات من غير ولا query"""
+    analytics = get_instructor_analytics(instructor_id)
+    if analytics is None:
+        raise Http404("Instructor not found")
+    
+    add_page_tags(request, *(course_tag(course['id']) for course in analytics['courses']))
     
     context = {
-        'instructor': instructor,
-        'stats': instructor_stats,
+        'instructor': analytics['instructor'],
+        'courses': analytics['courses'],
+        'stats': analytics['stats'],
     }
     return render(request, 'instructors/instructor_profile.html', context)
 
 @login_required
 def instructor_dashboard(request):
     """لوحة تحكم المدرب"""
-    try:
-        instructor = Instructor.objects.get(user=request.user)
-    except Instructor.DoesNotExist:
+    instructor_id = roles_for(request.user).instructor_id
+    if instructor_id is None:
         messages.error(request, "You are not registered as an instructor")
         return redirect('home')
     
-    # الكورسات الخاصة بهذا المدرب
-    courses = Course.objects.filter(instructor=instructor)
-    
-    # إحصائيات المدرب
-    total_students = Student.objects.filter(
-        enrolled_courses__instructor=instructor
-    ).distinct().count()
-    
-    total_lessons = Lesson.objects.filter(course__instructor=instructor).count()
+    # الكورسات والإحصائيات من الكاش، ولو مش موجود بتتحسب في queries مجمعة
+    analytics = get_instructor_analytics(instructor_id)
+    stats = analytics['stats']
     
     context = {
-        'instructor': instructor,
-        'courses': courses,
-        'total_courses': courses.count(),
-        'total_students': total_students,
-        'total_lessons': total_lessons,
+        'instructor': analytics['instructor'],
+        'courses': analytics['courses'],
+        'stats': stats,
+        'total_courses': stats['total_courses'],
+        'total_students': stats['total_students'],
+        'total_lessons': stats['total_lessons'],
     }
     return render(request, 'instructors/instructor_dashboard.html', context)
 
 @login_required
 def create_course(request):
     """إنشاء كورس جديد"""
-    try:
-        instructor = Instructor.objects.get(user=request.user)
-    except Instructor.DoesNotExist:
+    instructor = roles_for(request.user).instructor
+    if instructor is None:
         messages.error(request, "You are not registered as an instructor")
         return redirect('home')
     
@@ -514,12 +575,11 @@ def create_course(request):
 @login_required
 def edit_course(request, course_id):
     """تعديل كورس موجود"""
-    try:
-        instructor = Instructor.objects.get(user=request.user)
-        course = get_object_or_404(Course, id=course_id, instructor=instructor)
-    except Instructor.DoesNotExist:
+    instructor = roles_for(request.user).instructor
+    if instructor is None:
         messages.error(request, "You are not registered as an instructor")
         return redirect('home')
+    course = get_object_or_404(Course, id=course_id, instructor=instructor)
     
     if request.method == 'POST':
         # هنا هتضيفي معالجة التعديل
@@ -541,7 +601,7 @@ def edit_course(request, course_id):
 @login_required
 def become_instructor(request):
     """طلب الانضمام كمدرب"""
-    if hasattr(request.user, 'instructor'):
+    if roles_for(request.user).is_instructor:
         messages.info(request, "You are already an instructor")
         return redirect('instructor_dashboard')
     
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,11 +44,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'courses.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'courses.middleware.EnrollmentMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -73,12 +78,105 @@ WSGI_APPLICATION = 'elearning_platform.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# DB_ENGINE=sqlite (الافتراضي) أو postgres (DB_NAME / DB_USER / DB_PASSWORD / DB_HOST / DB_PORT)
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    # DB_POOL=1 = الـ pool بتاع Django 5.1+ (محتاج psycopg[pool]) - مابيشتغلش مع CONN_MAX_AGE.
+    # من غيره الـ connection بتفضل مفتوحة DB_CONN_MAX_AGE ثانية بدل ما تتفتح مع كل طلب
+    DB_POOL = os.environ.get('DB_POOL', '') == '1'
+    _database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'elearning'),
+        'USER': os.environ.get('DB_USER', 'elearning'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if DB_POOL:
+        _database['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    # الكتابة بتبدأ BEGIN IMMEDIATE فبتاخد القفل من الأول وتستنى timeout ثانية لو حد تاني بيكتب،
+    # بدل transaction بتقرا وبعدين تفشل بـ "database is locked" وهي بتحاول تكتب.
+    # WAL: القراية مابتستناش الكتابة، و synchronous=NORMAL آمن معاه (آخر commit بس ممكن يضيع لو الجهاز فصل).
+    # ملفات -wal و -shm جنب الداتابيز متجاهلة في .gitignore. SQLITE_WAL=0 لفايل سيستم مابيدعمش WAL (NFS)
+    SQLITE_PATH = Path(os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3')).resolve()
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') == '1'
+    _database = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': SQLITE_PATH,
+        'OPTIONS': {
+            'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                ('PRAGMA journal_mode=WAL;PRAGMA synchronous=NORMAL;' if SQLITE_WAL else '')
+                + f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))};"
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
     }
+
+_database['TEST'] = {
+    # تاريخ الـ migrations فيه فرعين متعارضين، فالتستات بتبني الجداول من الموديلات مباشرة
+    'MIGRATE': False,
 }
+if DB_ENGINE != 'postgres':
+    # ملف مش memory عشان تستات الـ threads تشتغل على نفس الداتابيز.
+    # أوامر الـ benchmark بتستخدم اسم تاني (benchmarks.benchmark_database) فمابيمسحوش بعض
+    _database['TEST']['NAME'] = BASE_DIR / 'test_db.sqlite3'
+
+DATABASES = {'default': _database}
+
+
+# Cache
+# CACHE_BACKEND=locmem (الافتراضي) أو file أو redis (مع REDIS_URL).
+# طبقة الـ tags اللي في courses/caching.py شغالة فوق أي واحد فيهم.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'redis':
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    }
+elif CACHE_BACKEND == 'file':
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+else:
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'elearning',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+
+# الـ sessions في كاش لوحدها: مسح الكاش بتاع الصفحات (cache.clear) مايعملش logout لحد
+if CACHE_BACKEND == 'redis':
+    # clear() في redis بيمسح الـ db كلها، فالـ sessions محتاجة db تانية
+    _sessions_cache = {**_default_cache, 'LOCATION': os.environ.get('SESSION_REDIS_URL', 'redis://127.0.0.1:6379/2')}
+elif CACHE_BACKEND == 'file':
+    _sessions_cache = {**_default_cache, 'LOCATION': os.path.join(_default_cache['LOCATION'], 'sessions')}
+else:
+    _sessions_cache = {**_default_cache, 'LOCATION': 'elearning-sessions', 'OPTIONS': {'MAX_ENTRIES': 20000}}
+
+CACHES = {'default': _default_cache, 'sessions': _sessions_cache}
+
+# الـ alias اللي الكاش بتاع الكورسات بيستخدمه
+COURSES_CACHE_ALIAS = 'default'
+
+# مدة كاش الصفحات العامة للزوار بالثواني (بتتمسح قبلها مع أي تعديل في بياناتها)
+PAGE_CACHE_TIMEOUT = 300
 
 
 # Password validation
@@ -99,8 +197,81 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-#AUTH_USER_MODEL = 'courses.CustomUser'
+AUTH_USER_MODEL = 'courses.CustomUser'
+
+# Password hashing
+# PASSWORD_HASHER=scrypt (الافتراضي) أو argon2 (محتاج argon2-cffi) أو pbkdf2.
+# التكلفة من هنا (courses/hashers.py)، والأرقام اختارناها من: python manage.py benchmark_passwords
+# أي hash مكتوب بـ hasher تاني أو بتكلفة قديمة بيتعمله rehash لوحده في أول login ناجح
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2**14))
+PASSWORD_SCRYPT_BLOCK_SIZE = 8
+PASSWORD_SCRYPT_PARALLELISM = 1
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19 * 1024))  # KiB
+PASSWORD_ARGON2_PARALLELISM = 1
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+
+_PASSWORD_HASHERS = {
+    'scrypt': 'courses.hashers.ScryptPasswordHasher',
+    'argon2': 'courses.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'courses.hashers.PBKDF2PasswordHasher',
+}
+# الأول بيكتب، والباقي بيقروا الـ hashes القديمة لحد ما تتحدث
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
 
+# RoleModelBackend بيحمل أدوار يوزر الـ session في نفس الـ query (courses/backends.py).
+# ModelBackend موجود عشان الـ sessions القديمة اللي اتعملت بيه تفضل شغالة لحد ما تخلص
+AUTHENTICATION_BACKENDS = [
+    'courses.backends.RoleModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
+# Sessions
+# SESSION_BACKEND=db أو cached_db أو cache أو signed_cookies - الفرق بينهم في courses/sessions.py.
+# db و cached_db محتاجين clear_expired_sessions من الـ cron.
+# cached_db و cache محتاجين كاش مشترك بين الـ workers: الـ locmem لكل process لوحده، فـ session
+# اتمسحت (logout) أو اتغيرت في worker تفضل في كاش التانيين. فالافتراضي cached_db مع redis بس
+
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db' if CACHE_BACKEND == 'redis' else 'db')
+if SESSION_BACKEND in ('cached_db', 'cache') and CACHE_BACKEND != 'redis':
+    raise ImproperlyConfigured(f"SESSION_BACKEND={SESSION_BACKEND} needs a shared cache: set CACHE_BACKEND=redis")
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+SESSION_CACHE_ALIAS = 'sessions'
+
+
+# أقصى عمر (بالثواني) لأرقام لوحة الأدمن قبل ما تتحسب تاني
+STATS_SNAPSHOT_MAX_AGE = 300
+
+# قياس الطلبات (RequestMetricsMiddleware): نسبة الطلبات اللي بتتقاس من 0 لـ 1،
+# الطلب اللي أبطأ من SLOW_MS أو فيه SQL متكرر بيتسجل warning
+REQUEST_METRICS_SAMPLE_RATE = float(os.environ.get('REQUEST_METRICS_SAMPLE_RATE', '1.0' if DEBUG else '0.05'))
+REQUEST_METRICS_SLOW_MS = 500
+REQUEST_METRICS_DUPLICATE_THRESHOLD = 3
+# N+1 في التطوير بيطلع warning في الـ console، وفي الإنتاج بيتسجل في الـ log بس
+REQUEST_METRICS_REPEATED_QUERIES = 'warn' if DEBUG else 'log'
+REQUEST_METRICS_HEADER = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'courses.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
 
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
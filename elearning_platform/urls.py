@@ -23,8 +23,8 @@ from . import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('courses/', include('courses.urls')),
     path('', include('courses.urls')), 
+    path('courses/', include('courses.urls')),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('', home, name='home'),
 ]
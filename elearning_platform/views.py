@@ -1,7 +1,9 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.auth.models import User
-from courses.models import Course, Instructor, Enrollment
+from django.contrib.auth import get_user_model
+from courses.stats import get_stats
+
+User = get_user_model()
 
 def is_superuser(user):
     return user.is_superuser
@@ -13,20 +15,15 @@ def home(request):
 @login_required
 @user_passes_test(is_superuser)
 def admin_dashboard(request):
-    # بيانات حقيقية من الداتابيز
-    total_users = User.objects.count()
-    total_courses = Course.objects.count()
-    total_instructors = Instructor.objects.count()
-    total_students = User.objects.filter(is_staff=False, is_superuser=False).count()
-    
-    # عدد الطلاب المسجلين في كورسات
-    total_enrollments = Enrollment.objects.count()
+    # بيانات من الـ stats snapshot بدل COUNT(*) على كل جدول في كل تحميل
+    stats = get_stats()
     
     context = {
-        'total_users': total_users,
-        'total_courses': total_courses,
-        'total_instructors': total_instructors,
-        'total_students': total_students,
-        'total_enrollments': total_enrollments,
+        'stats': stats,
+        'total_users': stats.total_users,
+        'total_courses': stats.total_courses,
+        'total_instructors': stats.total_instructors,
+        'total_students': stats.total_students,
+        'total_enrollments': stats.total_enrollments,
     }
     return render(request, 'admin/dashboard.html', context)
\ No newline at end of file